@@ -0,0 +1,355 @@
+"""Persistence for analyses, cover letters and their source documents.
+
+Uses the MongoDB service from docker-compose (``MONGO_URL`` / ``DB_NAME``)
+through a pooled async motor client.  Resume and job description texts are
+stored once per content hash in ``documents`` (zlib-compressed above
+``STORE_COMPRESS_THRESHOLD`` bytes) and referenced from the analysis and
+cover letter records.
+
+``ANALYSIS_STORE=memory`` (the default when ``MONGO_URL`` is unset) swaps in
+an in-process stand-in with the same interface for tests and local runs.
+
+When MongoDB cannot be reached the store fails fast for a backoff period
+(``STORE_RETRY_BACKOFF`` seconds, doubling up to ``STORE_MAX_BACKOFF``)
+instead of waiting out the server selection timeout on every call, and
+``persist_*`` writes run in the background (``in_background``) so storage
+never adds latency to a response.
+"""
+import asyncio
+import hashlib
+import os
+import time
+import zlib
+from datetime import datetime
+from typing import AsyncIterator, Awaitable, Dict, Optional, Set, Tuple
+
+
+def content_hash(text: str) -> str:
+    """Stable hash for a document, insensitive to surrounding whitespace"""
+    return hashlib.sha256(text.strip().encode("utf-8")).hexdigest()
+
+
+def _pack_text(text: str, threshold: int) -> dict:
+    raw = text.encode("utf-8")
+    if len(raw) >= threshold:
+        return {"encoding": "zlib", "body": zlib.compress(raw, 6), "size": len(raw)}
+    return {"encoding": "utf-8", "body": text, "size": len(raw)}
+
+
+def _unpack_text(document: dict) -> str:
+    if document.get("encoding") == "zlib":
+        return zlib.decompress(bytes(document["body"])).decode("utf-8")
+    return document["body"]
+
+
+class MemoryAnalysisStore:
+    """In-process stand-in used for tests and when MongoDB is not configured"""
+
+    def __init__(self, compress_threshold: int = 4096, max_items: int = 1000):
+        self.compress_threshold = compress_threshold
+        self.max_items = max_items
+        self._documents: Dict[str, dict] = {}
+        self._analyses: Dict[str, dict] = {}
+        self._cover_letters: Dict[str, dict] = {}
+
+    async def connect(self):
+        return None
+
+    async def close(self):
+        return None
+
+    def _referenced(self, digest: str) -> bool:
+        return any(digest in (record.get("resume_hash"), record.get("job_hash"))
+                   for collection in (self._analyses, self._cover_letters) for record in collection.values())
+
+    def _bound(self, collection: Dict[str, dict]):
+        # Oldest first: dicts keep insertion order.  An evicted record takes the
+        # documents only it referenced along
+        while len(collection) > self.max_items:
+            record = collection.pop(next(iter(collection)))
+            for digest in {record.get("resume_hash"), record.get("job_hash")} - {None}:
+                if not self._referenced(digest):
+                    self._documents.pop(digest, None)
+
+    def _bound_documents(self):
+        while len(self._documents) > self.max_items:
+            digest = next(iter(self._documents))
+            del self._documents[digest]
+            # Records whose texts are gone could not be loaded any more
+            for collection in (self._analyses, self._cover_letters):
+                for key in [key for key, record in collection.items()
+                            if digest in (record.get("resume_hash"), record.get("job_hash"))]:
+                    del collection[key]
+
+    async def save_document(self, kind: str, text: str) -> str:
+        digest = content_hash(text)
+        if digest in self._documents:
+            # Saving again marks it recently used, so it outlives the record about to reference it
+            self._documents[digest] = self._documents.pop(digest)
+        else:
+            self._documents[digest] = {"_id": digest, "kind": kind, "created_at": datetime.utcnow(),
+                                       **_pack_text(text, self.compress_threshold)}
+            self._bound_documents()
+        return digest
+
+    async def get_document(self, digest: str) -> Optional[str]:
+        document = self._documents.get(digest)
+        return _unpack_text(document) if document else None
+
+    async def set_indexed(self, digest: str, indexed: bool) -> bool:
+        """Flag whether a document belongs in the job index; False if it is not stored"""
+        document = self._documents.get(digest)
+        if document is None:
+            return False
+        document["indexed"] = indexed
+        return True
+
+    async def iter_documents(self, kind: str, limit: int, indexed_only: bool = False) -> AsyncIterator[Tuple[str, str]]:
+        """(content hash, text) of stored documents of one kind, newest first"""
+        matches = [d for d in reversed(list(self._documents.values()))
+                   if d["kind"] == kind and not (indexed_only and d.get("indexed") is False)]
+        for document in matches[:limit]:
+            yield document["_id"], _unpack_text(document)
+
+    async def save_analysis(self, record: dict):
+        self._analyses[record["_id"]] = dict(record)
+        self._bound(self._analyses)
+
+    async def get_analysis(self, analysis_id: str) -> Optional[dict]:
+        record = self._analyses.get(analysis_id)
+        return dict(record) if record else None
+
+    async def find_analysis(self, job_hash: str, resume_hash: str) -> Optional[dict]:
+        matches = [r for r in self._analyses.values() if r["job_hash"] == job_hash and r["resume_hash"] == resume_hash]
+        return dict(max(matches, key=lambda r: r["created_at"])) if matches else None
+
+    async def save_cover_letter(self, record: dict):
+        self._cover_letters[record["_id"]] = dict(record)
+        self._bound(self._cover_letters)
+
+    async def get_cover_letter(self, cover_letter_id: str) -> Optional[dict]:
+        record = self._cover_letters.get(cover_letter_id)
+        return dict(record) if record else None
+
+
+class StoreUnavailableError(Exception):
+    """MongoDB failed recently; calls fail fast until the backoff expires"""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class MongoAnalysisStore:
+    def __init__(self, url: str, db_name: str, compress_threshold: int = 4096, pool_size: int = 20,
+                 retry_backoff: float = 5.0, max_backoff: float = 300.0):
+        self.url = url
+        self.db_name = db_name
+        self.compress_threshold = compress_threshold
+        self.pool_size = pool_size
+        self.retry_backoff = retry_backoff
+        self.max_backoff = max_backoff
+        self._client = None
+        self._db = None
+        self._failures = 0
+        self._down_until = 0.0
+
+    def _trip(self, error: Exception) -> StoreUnavailableError:
+        self._failures += 1
+        delay = min(self.retry_backoff * 2 ** (self._failures - 1), self.max_backoff)
+        self._down_until = time.monotonic() + delay
+        print(f"⚠️ Analysis store unavailable, retrying in {delay:.0f}s: {error}")
+        return StoreUnavailableError(f"MongoDB unavailable: {error}", retry_after=delay)
+
+    def _check_available(self):
+        remaining = self._down_until - time.monotonic()
+        if remaining > 0:
+            raise StoreUnavailableError(f"MongoDB unavailable, retrying in {remaining:.0f}s", retry_after=remaining)
+
+    async def connect(self):
+        self._check_available()
+        if self._db is not None:
+            return
+        if self._client is None:
+            from motor.motor_asyncio import AsyncIOMotorClient
+            self._client = AsyncIOMotorClient(self.url, maxPoolSize=self.pool_size, serverSelectionTimeoutMS=5000)
+        db = self._client[self.db_name]
+        try:
+            await db.documents.create_index("created_at")
+            await db.documents.create_index([("kind", 1), ("created_at", -1)])
+            await db.analyses.create_index("created_at")
+            await db.analyses.create_index([("job_hash", 1), ("resume_hash", 1), ("created_at", -1)])
+            await db.cover_letters.create_index("created_at")
+            await db.cover_letters.create_index([("job_hash", 1), ("resume_hash", 1)])
+        except Exception as e:
+            raise self._trip(e) from e
+        # Only mark connected once the indexes exist, so a failed start is retried
+        self._db = db
+        self._failures = 0
+        print(f"🗄️ Connected analysis store to MongoDB database '{self.db_name}'")
+
+    async def _run(self, operation):
+        """Run ``operation(db)``, opening the breaker when MongoDB does not answer"""
+        await self.connect()
+        try:
+            result = await operation(self._db)
+        except Exception as e:
+            raise self._trip(e) from e
+        self._failures = 0
+        return result
+
+    async def close(self):
+        if self._client is not None:
+            self._client.close()
+            self._client = self._db = None
+
+    async def save_document(self, kind: str, text: str) -> str:
+        digest = content_hash(text)
+        # The content hash is the _id, so identical documents are stored once
+        await self._run(lambda db: db.documents.update_one(
+            {"_id": digest},
+            {"$setOnInsert": {"kind": kind, "created_at": datetime.utcnow(), **_pack_text(text, self.compress_threshold)}},
+            upsert=True,
+        ))
+        return digest
+
+    async def get_document(self, digest: str) -> Optional[str]:
+        document = await self._run(lambda db: db.documents.find_one({"_id": digest}))
+        return _unpack_text(document) if document else None
+
+    async def set_indexed(self, digest: str, indexed: bool) -> bool:
+        result = await self._run(lambda db: db.documents.update_one({"_id": digest}, {"$set": {"indexed": indexed}}))
+        return result.matched_count > 0
+
+    async def iter_documents(self, kind: str, limit: int, indexed_only: bool = False) -> AsyncIterator[Tuple[str, str]]:
+        await self.connect()
+        query = {"kind": kind}
+        if indexed_only:
+            query["indexed"] = {"$ne": False}
+        cursor = self._db.documents.find(query).sort("created_at", -1).limit(limit)
+        try:
+            async for document in cursor:
+                yield document["_id"], _unpack_text(document)
+        except Exception as e:
+            raise self._trip(e) from e
+
+    async def save_analysis(self, record: dict):
+        await self._run(lambda db: db.analyses.replace_one({"_id": record["_id"]}, record, upsert=True))
+
+    async def get_analysis(self, analysis_id: str) -> Optional[dict]:
+        return await self._run(lambda db: db.analyses.find_one({"_id": analysis_id}))
+
+    async def find_analysis(self, job_hash: str, resume_hash: str) -> Optional[dict]:
+        return await self._run(lambda db: db.analyses.find_one(
+            {"job_hash": job_hash, "resume_hash": resume_hash}, sort=[("created_at", -1)]
+        ))
+
+    async def save_cover_letter(self, record: dict):
+        await self._run(lambda db: db.cover_letters.replace_one({"_id": record["_id"]}, record, upsert=True))
+
+    async def get_cover_letter(self, cover_letter_id: str) -> Optional[dict]:
+        return await self._run(lambda db: db.cover_letters.find_one({"_id": cover_letter_id}))
+
+
+def create_analysis_store():
+    mongo_url = os.environ.get("MONGO_URL")
+    kind = os.environ.get("ANALYSIS_STORE", "mongo" if mongo_url else "memory").lower()
+    threshold = int(os.environ.get("STORE_COMPRESS_THRESHOLD", "4096"))
+    if kind == "mongo" and mongo_url:
+        return MongoAnalysisStore(
+            mongo_url,
+            os.environ.get("DB_NAME", "resumeai"),
+            compress_threshold=threshold,
+            pool_size=int(os.environ.get("MONGO_POOL_SIZE", "20")),
+            retry_backoff=float(os.environ.get("STORE_RETRY_BACKOFF", "5")),
+            max_backoff=float(os.environ.get("STORE_MAX_BACKOFF", "300")),
+        )
+    return MemoryAnalysisStore(
+        compress_threshold=threshold,
+        max_items=int(os.environ.get("STORE_MEMORY_MAX_ITEMS", "1000")),
+    )
+
+
+analysis_store = create_analysis_store()
+
+_background_writes: Set[asyncio.Task] = set()
+
+
+def in_background(write: Awaitable[None]) -> asyncio.Task:
+    """Run a ``persist_*`` call without making the response wait for it"""
+    task = asyncio.ensure_future(write)
+    # The loop only keeps weak references to tasks
+    _background_writes.add(task)
+    task.add_done_callback(_background_writes.discard)
+    return task
+
+
+async def flush_writes():
+    """Wait for background writes still in flight (shutdown, tests)"""
+    if _background_writes:
+        await asyncio.gather(*_background_writes, return_exceptions=True)
+
+
+async def persist_analysis(response: dict) -> None:
+    """Store an /api/analyze response; failures are logged, never raised"""
+    try:
+        resume_hash = await analysis_store.save_document("resume", response["original_resume"])
+        job_hash = await analysis_store.save_document("job_description", response["job_description"])
+        await analysis_store.save_analysis({
+            "_id": response["analysis_id"],
+            "analysis": response["analysis"],
+            "resume_hash": resume_hash,
+            "job_hash": job_hash,
+            "source_info": response.get("source_info"),
+            "created_at": response["created_at"],
+        })
+    except Exception as e:
+        print(f"⚠️ Could not persist analysis {response.get('analysis_id')}: {e}")
+
+
+async def persist_cover_letter(response: dict, job_description: str, resume_text: str) -> None:
+    try:
+        resume_hash = await analysis_store.save_document("resume", resume_text)
+        job_hash = await analysis_store.save_document("job_description", job_description)
+        await analysis_store.save_cover_letter({
+            "_id": response["cover_letter_id"],
+            "short_version": response["short_version"],
+            "long_version": response["long_version"],
+            "resume_hash": resume_hash,
+            "job_hash": job_hash,
+            "created_at": response["created_at"],
+        })
+    except Exception as e:
+        print(f"⚠️ Could not persist cover letter {response.get('cover_letter_id')}: {e}")
+
+
+async def load_analysis(analysis_id: str) -> Optional[dict]:
+    """Rebuild the /api/analyze response shape from storage"""
+    record = await analysis_store.get_analysis(analysis_id)
+    if record is None:
+        return None
+    resume = await analysis_store.get_document(record["resume_hash"])
+    job_description = await analysis_store.get_document(record["job_hash"])
+    if resume is None or job_description is None:
+        # A record without its texts cannot be rebuilt (or scored)
+        return None
+    return {
+        "analysis_id": record["_id"],
+        "analysis": record["analysis"],
+        "original_resume": resume,
+        "job_description": job_description,
+        "created_at": record["created_at"],
+        "source_info": record.get("source_info"),
+    }
+
+
+async def load_cover_letter(cover_letter_id: str) -> Optional[dict]:
+    record = await analysis_store.get_cover_letter(cover_letter_id)
+    if record is None:
+        return None
+    return {
+        "cover_letter_id": record["_id"],
+        "short_version": record["short_version"],
+        "long_version": record["long_version"],
+        "created_at": record["created_at"],
+    }
@@ -0,0 +1,220 @@
+"""Local ATS keyword matching, no model call involved.
+
+Both texts are tokenized and skill aliases are folded to one canonical token
+via the skills taxonomy ("JS" in the resume matches "JavaScript" in the
+posting).  Candidate keywords and n-grams are extracted from the job description and
+weighted by where they appear (requirements count more than the company
+blurb) and how often.  The resume is then scanned once with an Aho-Corasick
+automaton built over the keywords' normalized token sequences, so matching is
+linear in the resume length however many keywords there are.
+
+``score_resume`` returns coverage, matched and missing terms and a weighted
+score in a few milliseconds, which is what ``/api/ats-score`` serves and what
+``/api/analyze`` includes ahead of the model result.  Automata are cached per
+job description, so scoring many resumes against one posting only builds it
+once.
+"""
+import os
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from analysis_store import content_hash
+from prompt_compression import CRITICAL, DROP, HIGH, JD_SECTION_RULES, LOW, MEDIUM, segment
+from skills_taxonomy import taxonomy
+from text_tokens import normalize_token, tokenize
+from ttl_cache import TTLCache
+
+STOPWORDS = frozenset("""
+a about above across after again all also an and any are as at be because been before being below between both
+but by can could did do does doing during each either etc every few for from further had has have having he her
+here how i if in into is it its itself just may me might more most must my no nor not of off on once only or
+other our ours out over own per same shall she should so some such than that the their them then there these
+they this those through to too under until up upon us very via was we well were what when where which while who
+whom why will with within without would you your yours
+ability able across year years plus strong excellent good great work working team teams role position candidate
+candidates including include includes using use used within new etc e.g i.e like looking join help make
+experience experienced knowledge understanding skills skill proven demonstrated familiarity preferred required
+requirements responsibilities qualifications opportunity company job based related relevant various multiple
+build building built own owning drive driving deliver delivering ensure ensuring support supporting partner
+collaborate collaborating operate operating high low fast paced environment world class best changing day
+""".split())
+
+# Section priority -> weight of a keyword occurrence in that section
+SECTION_WEIGHTS = {CRITICAL: 3.0, HIGH: 2.0, MEDIUM: 1.0, LOW: 0.5, DROP: 0.0}
+
+
+@dataclass
+class Keyword:
+    tokens: Tuple[str, ...]
+    display: str
+    weight: float
+
+
+class AhoCorasick:
+    """Multi-pattern matcher over token sequences (the alphabet is tokens)"""
+
+    def __init__(self, patterns: List[Tuple[str, ...]]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[int]] = [[]]
+        for index, pattern in enumerate(patterns):
+            state = 0
+            for token in pattern:
+                nxt = self._goto[state].get(token)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][token] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                state = nxt
+            self._out[state].append(index)
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for token, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and token not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                candidate = self._goto[fallback].get(token, 0)
+                self._fail[nxt] = candidate if candidate != nxt else 0
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def count(self, tokens: List[str]) -> Dict[int, int]:
+        """Occurrences of each pattern index in ``tokens``"""
+        counts: Dict[int, int] = {}
+        state = 0
+        for token in tokens:
+            while state and token not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(token, 0)
+            for index in self._out[state]:
+                counts[index] = counts.get(index, 0) + 1
+        return counts
+
+
+_STOP_KEYS = frozenset(normalize_token(word) for word in STOPWORDS)
+
+
+def is_content_token(token: str) -> bool:
+    """Whether a normalized token can be (part of) a keyword"""
+    return token not in _STOP_KEYS and len(token) > 1 and any(c.isalpha() for c in token)
+
+
+def extract_keywords(job_description: str, max_terms: Optional[int] = None) -> List[Keyword]:
+    """Weighted unigrams plus bigrams/trigrams that recur in the posting"""
+    max_terms = max_terms or int(os.environ.get("ATS_MAX_TERMS", "40"))
+    weights: Dict[Tuple[str, ...], float] = {}
+    counts: Dict[Tuple[str, ...], int] = {}
+    display: Dict[Tuple[str, ...], str] = {}
+
+    for section in segment(job_description, JD_SECTION_RULES):
+        weight = SECTION_WEIGHTS[section.priority]
+        if weight == 0:
+            continue
+        for line in section.lines:
+            pairs = taxonomy.canonical_tokens(tokenize(line))
+            for n in (1, 2, 3):
+                for start in range(len(pairs) - n + 1):
+                    gram = pairs[start:start + n]
+                    tokens = tuple(t for t, _ in gram)
+                    # n-grams may not start or end on a stopword, nor contain one
+                    if not all(is_content_token(t) for t in tokens):
+                        continue
+                    weights[tokens] = weights.get(tokens, 0.0) + weight
+                    counts[tokens] = counts.get(tokens, 0) + 1
+                    display.setdefault(tokens, " ".join(s for _, s in gram))
+
+    # One-off word pairs are mostly noise; recurring ones are real phrases
+    phrases = {tokens for tokens in weights if len(tokens) > 1 and counts[tokens] >= 2}
+    # A word that only ever occurs inside a kept phrase adds nothing on its own
+    subsumed = {(token,) for phrase in phrases for token in phrase if counts[(token,)] <= counts[phrase]}
+
+    keywords = []
+    for tokens, weight in weights.items():
+        if len(tokens) > 1:
+            if tokens not in phrases:
+                continue
+            weight *= 1 + 0.5 * (len(tokens) - 1)
+        elif tokens in subsumed:
+            continue
+        keywords.append(Keyword(tokens, display[tokens], round(weight, 2)))
+    keywords.sort(key=lambda k: (-k.weight, k.display))
+    return keywords[:max_terms]
+
+
+@dataclass
+class AtsMatcher:
+    keywords: List[Keyword]
+    automaton: AhoCorasick = field(repr=False)
+
+    @classmethod
+    def for_job(cls, job_description: str) -> "AtsMatcher":
+        keywords = extract_keywords(job_description)
+        return cls(keywords, AhoCorasick([k.tokens for k in keywords]))
+
+
+@dataclass
+class AtsScore:
+    score: int
+    coverage: float
+    matched: List[dict]
+    missing: List[dict]
+    total_terms: int
+    elapsed_ms: float
+
+    def as_dict(self) -> dict:
+        return {
+            "score": self.score,
+            "coverage": self.coverage,
+            "matched": self.matched,
+            "missing": self.missing,
+            "total_terms": self.total_terms,
+            "elapsed_ms": self.elapsed_ms,
+        }
+
+
+_matchers: TTLCache[AtsMatcher] = TTLCache(
+    max_items=int(os.environ.get("ATS_MATCHER_CACHE_ITEMS", "500")),
+    ttl_seconds=float(os.environ.get("ATS_MATCHER_CACHE_TTL", "3600")),
+)
+
+
+def matcher_for(job_description: str) -> AtsMatcher:
+    key = f"{content_hash(job_description)}:{taxonomy.version}"
+    matcher = _matchers.get(key)
+    if matcher is None:
+        matcher = AtsMatcher.for_job(job_description)
+        _matchers.set(key, matcher)
+    return matcher
+
+
+def score_resume(job_description: str, resume_text: str) -> AtsScore:
+    """Keyword coverage of the resume against the posting, weighted by importance"""
+    started = time.perf_counter()
+    matcher = matcher_for(job_description)
+    counts = matcher.automaton.count([token for token, _ in taxonomy.canonical_tokens(tokenize(resume_text))])
+
+    matched, missing = [], []
+    matched_weight = total_weight = 0.0
+    for index, keyword in enumerate(matcher.keywords):
+        total_weight += keyword.weight
+        if counts.get(index):
+            matched_weight += keyword.weight
+            matched.append({"term": keyword.display, "weight": keyword.weight, "count": counts[index]})
+        else:
+            missing.append({"term": keyword.display, "weight": keyword.weight})
+
+    total = len(matcher.keywords)
+    return AtsScore(
+        score=round(100 * matched_weight / total_weight) if total_weight else 0,
+        coverage=round(len(matched) / total, 3) if total else 0.0,
+        matched=matched,
+        missing=missing,
+        total_terms=total,
+        elapsed_ms=round((time.perf_counter() - started) * 1000, 2),
+    )
@@ -0,0 +1,197 @@
+"""Offline bulk analysis over a manifest of resume x posting pairs.
+
+    python bulk_analyze.py manifest.jsonl --resumes-dir ./resumes \\
+        --output results.jsonl --concurrency 8
+
+The manifest is JSONL or CSV with one pair per row:
+
+* ``resume`` - file name (PDF/DOCX/TXT) inside ``--resumes-dir``
+* ``job_description`` - posting text or URL
+* ``id`` - optional stable pair id (defaults to a hash of resume + posting)
+* ``kind`` - optional ``analysis`` (default) or ``cover_letter``
+
+Results are appended to ``--output`` as they finish, and finished pair ids
+go to a checkpoint file (``<output>.checkpoint`` by default).  Re-running
+the same command skips finished pairs.  Failed pairs are written to the
+output but not checkpointed, so a re-run retries them.
+
+Extraction, scraping and model calls go through the same functions as
+``server.py``, including the retry engine, router and mock backends.
+"""
+import argparse
+import asyncio
+import csv
+import hashlib
+import json
+import os
+import sys
+import time
+from typing import Dict, List, Optional, Set
+
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+
+from analysis_store import analysis_store, flush_writes
+from model_scheduler import BATCH, call_class
+from server import (
+    extract_text_from_docx,
+    extract_text_from_pdf,
+    resolve_job_description,
+    run_analysis_job,
+    run_cover_letter_job,
+)
+
+HANDLERS = {"analysis": run_analysis_job, "cover_letter": run_cover_letter_job}
+
+
+def load_manifest(path: str) -> List[dict]:
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.lower().endswith(".csv"):
+            rows = list(csv.DictReader(f))
+        else:
+            rows = [json.loads(line) for line in f if line.strip()]
+    for row in rows:
+        if not row.get("resume") or not row.get("job_description"):
+            raise ValueError(f"Manifest row needs 'resume' and 'job_description': {row}")
+        row.setdefault("kind", "analysis")
+        if not row.get("id"):
+            digest = hashlib.sha1(f"{row['resume']}\0{row['job_description']}\0{row['kind']}".encode("utf-8"))
+            row["id"] = digest.hexdigest()[:16]
+    return rows
+
+
+def load_finished_ids(checkpoint_path: str, output_path: str) -> Set[str]:
+    """Finished ids from the checkpoint, plus any succeeded lines it missed"""
+    finished: Set[str] = set()
+    if os.path.exists(checkpoint_path):
+        with open(checkpoint_path, encoding="utf-8") as f:
+            finished.update(line.strip() for line in f if line.strip())
+    if os.path.exists(output_path):
+        with open(output_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # a line cut off by the interruption
+                if record.get("status") == "succeeded":
+                    finished.add(record["id"])
+    return finished
+
+
+class ResumeCache:
+    """Extracts each resume file once, however many postings it is paired with"""
+
+    def __init__(self, resumes_dir: str):
+        self.resumes_dir = resumes_dir
+        self._texts: Dict[str, asyncio.Task] = {}
+
+    def _extract(self, name: str) -> str:
+        path = os.path.join(self.resumes_dir, name)
+        with open(path, "rb") as f:
+            content = f.read()
+        ext = name.lower().rsplit(".", 1)[-1]
+        if ext == "pdf":
+            return extract_text_from_pdf(content)
+        if ext == "docx":
+            return extract_text_from_docx(content)
+        return content.decode("utf-8").strip()
+
+    async def get(self, name: str) -> str:
+        if name not in self._texts:
+            self._texts[name] = asyncio.ensure_future(asyncio.to_thread(self._extract, name))
+        return await self._texts[name]
+
+
+class ResultWriter:
+    def __init__(self, output_path: str, checkpoint_path: str):
+        self._output = open(output_path, "a", encoding="utf-8")
+        self._checkpoint = open(checkpoint_path, "a", encoding="utf-8")
+        self._lock = asyncio.Lock()
+
+    def _append(self, line: str, finished_id: Optional[str]):
+        self._output.write(line)
+        self._output.flush()
+        os.fsync(self._output.fileno())
+        if finished_id is not None:
+            self._checkpoint.write(finished_id + "\n")
+            self._checkpoint.flush()
+
+    async def write(self, record: dict):
+        line = json.dumps(jsonable_encoder(record)) + "\n"
+        finished_id = record["id"] if record["status"] == "succeeded" else None
+        async with self._lock:
+            # fsync blocks; keep it off the loop so model calls keep flowing
+            await asyncio.to_thread(self._append, line, finished_id)
+
+    def close(self):
+        self._output.close()
+        self._checkpoint.close()
+
+
+async def process_pair(row: dict, resumes: ResumeCache, writer: ResultWriter, slots: asyncio.Semaphore):
+    started = time.monotonic()
+    record = {"id": row["id"], "resume": row["resume"], "kind": row["kind"]}
+    try:
+        async with slots:
+            resume_text = await resumes.get(row["resume"])
+            payload = {
+                "job_description": row["job_description"],
+                "resolved_job_description": await resolve_job_description(row["job_description"]),
+                "resume_text": resume_text,
+                "resume_source": "file",
+                "file_type": row["resume"].rsplit(".", 1)[-1],
+            }
+            record["result"] = await HANDLERS[row["kind"]](payload)
+        record["status"] = "succeeded"
+    except HTTPException as e:
+        record.update(status="failed", status_code=e.status_code, error=e.detail)
+    except Exception as e:
+        record.update(status="failed", status_code=500, error=str(e))
+    record["seconds"] = round(time.monotonic() - started, 2)
+    await writer.write(record)
+    return record["status"]
+
+
+async def run(args) -> int:
+    rows = load_manifest(args.manifest)
+    checkpoint_path = args.checkpoint or f"{args.output}.checkpoint"
+    finished = load_finished_ids(checkpoint_path, args.output)
+    pending = [row for row in rows if row["id"] not in finished]
+    unknown = {row["kind"] for row in pending} - set(HANDLERS)
+    if unknown:
+        raise ValueError(f"Unknown kind(s) in manifest: {sorted(unknown)}")
+    print(f"📋 {len(rows)} pairs in manifest, {len(rows) - len(pending)} already finished, {len(pending)} to run")
+
+    resumes = ResumeCache(args.resumes_dir)
+    writer = ResultWriter(args.output, checkpoint_path)
+    slots = asyncio.Semaphore(args.concurrency)
+    call_class.set(BATCH)
+    counts = {"succeeded": 0, "failed": 0}
+    try:
+        tasks = [asyncio.ensure_future(process_pair(row, resumes, writer, slots)) for row in pending]
+        for done, finished_task in enumerate(asyncio.as_completed(tasks), start=1):
+            counts[await finished_task] += 1
+            if done % args.progress_every == 0 or done == len(tasks):
+                print(f"⏱️ {done}/{len(tasks)} done ({counts['succeeded']} ok, {counts['failed']} failed)")
+    finally:
+        writer.close()
+        # Results are persisted in the background; asyncio.run would cancel the last writes
+        await flush_writes()
+        await analysis_store.close()
+    return 0 if counts["failed"] == 0 else 1
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Run resume x posting analyses in bulk with checkpointing")
+    parser.add_argument("manifest", help="JSONL or CSV manifest of pairs")
+    parser.add_argument("--resumes-dir", default=".", help="Directory containing the resume files")
+    parser.add_argument("--output", required=True, help="JSONL file results are appended to")
+    parser.add_argument("--checkpoint", help="Checkpoint file (default: <output>.checkpoint)")
+    parser.add_argument("--concurrency", type=int, default=int(os.environ.get("AI_BATCH_PARALLELISM", "4")))
+    parser.add_argument("--progress-every", type=int, default=10)
+    args = parser.parse_args(argv)
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
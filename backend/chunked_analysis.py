@@ -0,0 +1,168 @@
+"""Map-reduce analysis for resumes and CVs too long for one prompt.
+
+The resume is split at its section headings and the sections are packed into
+chunks of at most ``AI_CHUNK_TOKENS`` tokens (a section larger than that is
+split between lines).  Each chunk is analyzed against the same job
+description, or its digest when digests are enabled, at most
+``AI_CHUNK_PARALLELISM`` chunks at a time.  The partial analyses are then
+reduced into the standard ``Analysis`` shape:
+
+* suggestions are deduplicated on the quoted resume text, ordered by
+  priority and impact, and capped at ``AI_CHUNK_MAX_SUGGESTIONS``
+* skills gaps are merged, dropping anything another part of the resume
+  actually mentions
+* ATS keywords are merged, most frequently reported first
+* the score is recomputed for the whole resume from the best section score
+  and the keyword coverage of the full text
+"""
+import asyncio
+import os
+import re
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from prompt_compression import RESUME_SECTION_RULES, MEDIUM, count_tokens, segment
+from response_schemas import Analysis, Suggestion
+
+# Every heading-like line starts a chunkable section, not only the known ones
+_ANY_HEADING_RULES = RESUME_SECTION_RULES + [(re.compile(r"."), MEDIUM)]
+_IMPACT_ORDER = {"High": 0, "Medium": 1, "Low": 2}
+
+
+def chunk_settings():
+    return (
+        int(os.environ.get("AI_CHUNK_TOKENS", "1500")),
+        int(os.environ.get("AI_CHUNK_PARALLELISM", "4")),
+    )
+
+
+def should_chunk(resume_text: str) -> bool:
+    """Whether a resume is long enough that ``AI_ANALYSIS_MODE=auto`` chunks it"""
+    return count_tokens(resume_text) > int(os.environ.get("AI_CHUNK_THRESHOLD_TOKENS", "3000"))
+
+
+def _split_lines(heading: str, lines: List[str], chunk_tokens: int) -> List[str]:
+    pieces, current, used = [], [], count_tokens(heading)
+    for line in lines:
+        cost = count_tokens(line)
+        if current and used + cost > chunk_tokens:
+            pieces.append("\n".join(([heading] if heading else []) + current))
+            current, used = [], count_tokens(heading)
+        current.append(line)
+        used += cost
+    if current:
+        pieces.append("\n".join(([heading] if heading else []) + current))
+    return pieces
+
+
+def split_resume(resume_text: str, chunk_tokens: int) -> List[str]:
+    """Pack whole sections into chunks of at most ``chunk_tokens`` tokens"""
+    chunks: List[str] = []
+    current: List[str] = []
+    used = 0
+    for section in segment(resume_text, _ANY_HEADING_RULES):
+        if section.tokens > chunk_tokens:
+            pieces = _split_lines(section.heading, section.lines, chunk_tokens)
+        else:
+            pieces = ["\n".join(([section.heading] if section.heading else []) + section.lines)]
+        for piece in pieces:
+            cost = count_tokens(piece)
+            if current and used + cost > chunk_tokens:
+                chunks.append("\n\n".join(current))
+                current, used = [], 0
+            current.append(piece)
+            used += cost
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks or [resume_text]
+
+
+def _normalize(text: Optional[str]) -> str:
+    return re.sub(r"\W+", " ", (text or "").lower()).strip()
+
+
+def _score_value(score: str) -> Optional[int]:
+    match = re.search(r"(\d{1,3})\s*/\s*100", score or "")
+    return int(match.group(1)) if match else None
+
+
+def reduce_analyses(parts: List[Analysis], resume_text: str) -> Analysis:
+    """Merge per-chunk analyses into one analysis of the whole resume"""
+    resume_normalized = f" {_normalize(resume_text)} "
+
+    suggestions: Dict[str, Suggestion] = {}
+    for part in parts:
+        for suggestion in part.suggestions:
+            key = _normalize(suggestion.current_text) or "new:" + _normalize(suggestion.suggested_text)
+            existing = suggestions.get(key)
+            # Keep the more urgent version of a duplicate
+            if existing is None or (suggestion.priority, _IMPACT_ORDER[suggestion.impact_level]) < (
+                    existing.priority, _IMPACT_ORDER[existing.impact_level]):
+                suggestions[key] = suggestion
+    ordered = sorted(suggestions.values(), key=lambda s: (s.priority, _IMPACT_ORDER[s.impact_level]))
+    ordered = ordered[:int(os.environ.get("AI_CHUNK_MAX_SUGGESTIONS", "20"))]
+
+    # A chunk only sees its own sections, so it reports skills that live in
+    # other sections as gaps; keep only what the full resume does not mention
+    gaps: Dict[str, str] = {}
+    for part in parts:
+        for gap in part.skills_gap:
+            key = _normalize(gap)
+            if key and key not in gaps and f" {key} " not in resume_normalized:
+                gaps[key] = gap
+
+    keyword_counts: Dict[str, int] = {}
+    keyword_text: Dict[str, str] = {}
+    first_seen: Dict[str, int] = {}
+    for part in parts:
+        for keyword in part.ats_keywords:
+            key = _normalize(keyword)
+            if not key:
+                continue
+            keyword_counts[key] = keyword_counts.get(key, 0) + 1
+            keyword_text.setdefault(key, keyword)
+            first_seen.setdefault(key, len(first_seen))
+    keywords = sorted(keyword_counts, key=lambda k: (-keyword_counts[k], first_seen[k]))
+
+    covered = sum(1 for key in keywords if f" {key} " in resume_normalized)
+    coverage = round(100 * covered / len(keywords)) if keywords else None
+    section_scores = [value for value in (_score_value(p.overall_score) for p in parts) if value is not None]
+    best = max(section_scores) if section_scores else None
+    if best is not None and coverage is not None:
+        score = round((best + coverage) / 2)
+    else:
+        score = best if best is not None else coverage
+    reasoning = f"Combined from {len(parts)} resume parts"
+    if best is not None:
+        reasoning += f"; strongest part scored {best}/100"
+    if coverage is not None:
+        reasoning += f"; the full resume covers {covered} of {len(keywords)} ATS keywords"
+
+    return Analysis(
+        skills_gap=list(gaps.values()),
+        suggestions=ordered,
+        ats_keywords=[keyword_text[k] for k in keywords],
+        overall_score=f"{score}/100 - {reasoning}" if score is not None else reasoning,
+    )
+
+
+async def run_chunked_analysis(job_description: str, resume_text: str,
+                               analyze_chunk: Callable[[str, str], Awaitable[dict]]) -> dict:
+    """Analyze the resume chunk by chunk with ``analyze_chunk(jd, chunk)`` and reduce the results"""
+    chunk_tokens, parallelism = chunk_settings()
+    chunks = split_resume(resume_text, chunk_tokens)
+    print(f"🧩 Chunked analysis - {count_tokens(resume_text)} resume tokens in {len(chunks)} chunks")
+    slots = asyncio.Semaphore(parallelism)
+
+    async def analyze(chunk: str) -> Analysis:
+        async with slots:
+            return Analysis.model_validate(await analyze_chunk(job_description, chunk))
+
+    tasks = [asyncio.ensure_future(analyze(chunk)) for chunk in chunks]
+    try:
+        parts = await asyncio.gather(*tasks)
+    except BaseException:
+        # A failed chunk fails the analysis, like a failed single-prompt call
+        for task in tasks:
+            task.cancel()
+        raise
+    return reduce_analyses(list(parts), resume_text).model_dump()
@@ -0,0 +1,180 @@
+"""Provider-side context caching for the static system prompts.
+
+Gemini can store a prompt prefix server-side (``CachedContent``) so later
+requests only send and bill the variable part.  Opt-in with
+``AI_CONTEXT_CACHE=true`` (needs the ``google-genai`` SDK).  The registry
+below creates one cache per (model, API key, system prompt), refreshes it
+shortly before its TTL runs out and remembers (model, API key) pairs that
+refuse caching (unsupported model, prompt below the provider's minimum size,
+missing SDK) so those calls quietly use the normal LlmChat path.
+
+Caches belong to the project of the key that created them, so every key gets
+its own ``genai.Client``; nothing touches the SDK's process-wide
+configuration, which other backends may share.
+
+Cache creation always happens in a background task; a request never waits
+for it.  Per-request input-token and latency savings are kept in
+``context_cache_stats``.
+"""
+import asyncio
+import hashlib
+import os
+import time
+from typing import Dict, Tuple
+
+
+class _CacheEntry:
+    def __init__(self, content, model: str, expires_at: float):
+        self.content = content
+        self.model = model
+        self.expires_at = expires_at
+
+
+class ContextCacheStats:
+    def __init__(self):
+        self.cached_requests = 0
+        self.uncached_requests = 0
+        self.cached_input_tokens = 0
+        self.total_input_tokens = 0
+        self.cached_latency = 0.0
+        self.uncached_latency = 0.0
+        self.creations = 0
+        self.creation_failures = 0
+
+    def record(self, cached: bool, seconds: float, prompt_tokens: int = 0, cached_tokens: int = 0):
+        if cached:
+            self.cached_requests += 1
+            self.cached_latency += seconds
+        else:
+            self.uncached_requests += 1
+            self.uncached_latency += seconds
+        self.total_input_tokens += prompt_tokens
+        self.cached_input_tokens += cached_tokens
+
+    def as_dict(self) -> dict:
+        avg_cached = self.cached_latency / self.cached_requests if self.cached_requests else None
+        avg_uncached = self.uncached_latency / self.uncached_requests if self.uncached_requests else None
+        return {
+            "cached_requests": self.cached_requests,
+            "uncached_requests": self.uncached_requests,
+            "cached_input_tokens": self.cached_input_tokens,
+            "total_input_tokens": self.total_input_tokens,
+            "avg_cached_tokens_per_request": round(self.cached_input_tokens / self.cached_requests) if self.cached_requests else 0,
+            "avg_latency_cached": avg_cached,
+            "avg_latency_uncached": avg_uncached,
+            "avg_latency_saved": (avg_uncached - avg_cached) if avg_cached is not None and avg_uncached is not None else None,
+            "creations": self.creations,
+            "creation_failures": self.creation_failures,
+        }
+
+
+class ContextCacheRegistry:
+    def __init__(self, enabled: bool, ttl_seconds: int, refresh_margin: int, unsupported_retry_seconds: int = 3600):
+        self.enabled = enabled
+        self.ttl_seconds = ttl_seconds
+        self.refresh_margin = refresh_margin
+        self.unsupported_retry_seconds = unsupported_retry_seconds
+        self._entries: Dict[str, _CacheEntry] = {}
+        self._unsupported_until: Dict[Tuple[str, str], float] = {}  # (model, key fingerprint)
+        self._creating: Dict[str, asyncio.Task] = {}
+        self._clients: Dict[str, object] = {}
+
+    @staticmethod
+    def _fingerprint(text: str) -> str:
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()[:16]
+
+    def _key(self, model: str, api_key: str, system_prompt: str) -> str:
+        return f"{model}:{self._fingerprint(api_key)}:{self._fingerprint(system_prompt)}"
+
+    def _client(self, api_key: str):
+        client = self._clients.get(api_key)
+        if client is None:
+            from google import genai
+
+            client = self._clients[api_key] = genai.Client(api_key=api_key)
+        return client
+
+    def lookup(self, model: str, api_key: str, system_prompt: str):
+        """Return a live cache entry, scheduling creation or refresh as needed"""
+        if not self.enabled:
+            return None
+        now = time.time()
+        if self._unsupported_until.get((model, self._fingerprint(api_key)), 0) > now:
+            return None
+
+        key = self._key(model, api_key, system_prompt)
+        entry = self._entries.get(key)
+        if (entry is None or entry.expires_at - now < self.refresh_margin) and key not in self._creating:
+            self._creating[key] = asyncio.ensure_future(self._create_or_refresh(key, model, api_key, system_prompt))
+        if entry is not None and entry.expires_at > now + 5:
+            return entry
+        return None
+
+    async def _create_or_refresh(self, key: str, model: str, api_key: str, system_prompt: str):
+        entry = self._entries.get(key)
+        try:
+            from google.genai import types
+
+            client = self._client(api_key)
+            ttl = f"{self.ttl_seconds}s"
+            if entry is not None and entry.expires_at > time.time():
+                # Extending the TTL keeps the same cache warm without re-uploading the prefix
+                await client.aio.caches.update(name=entry.content.name, config=types.UpdateCachedContentConfig(ttl=ttl))
+                entry.expires_at = time.time() + self.ttl_seconds
+                return
+
+            cached = await client.aio.caches.create(
+                model=model,
+                config=types.CreateCachedContentConfig(
+                    display_name=f"resumeai-{key.split(':')[-1]}",
+                    system_instruction=system_prompt,
+                    ttl=ttl,
+                ),
+            )
+            self._entries[key] = _CacheEntry(cached, model, time.time() + self.ttl_seconds)
+            context_cache_stats.creations += 1
+            print(f"🧊 Registered context cache {cached.name} for {model}")
+        except Exception as e:
+            context_cache_stats.creation_failures += 1
+            if self._entries.pop(key, None) is not None:
+                # A failed refresh just means the next request re-creates the cache
+                print(f"⚠️ Context cache refresh failed for {model}: {e}")
+                return
+            self._unsupported_until[(model, self._fingerprint(api_key))] = time.time() + self.unsupported_retry_seconds
+            print(f"ℹ️ Context caching unavailable for {model}, using uncached prompts: {e}")
+        finally:
+            self._creating.pop(key, None)
+
+    async def generate(self, entry: _CacheEntry, api_key: str, user_text: str, json_mode: bool = False) -> str:
+        """Send the variable part of the prompt against a registered cache"""
+        from google.genai import types
+
+        config = types.GenerateContentConfig(
+            cached_content=entry.content.name,
+            response_mime_type="application/json" if json_mode else None,
+        )
+        started = time.monotonic()
+        response = await self._client(api_key).aio.models.generate_content(
+            model=entry.model, contents=user_text, config=config)
+        usage = getattr(response, "usage_metadata", None)
+        context_cache_stats.record(
+            cached=True,
+            seconds=time.monotonic() - started,
+            prompt_tokens=getattr(usage, "prompt_token_count", 0) or 0,
+            cached_tokens=getattr(usage, "cached_content_token_count", 0) or 0,
+        )
+        return response.text
+
+    def invalidate(self, entry: _CacheEntry):
+        for key, known in list(self._entries.items()):
+            if known is entry:
+                del self._entries[key]
+
+
+context_cache_stats = ContextCacheStats()
+
+context_cache = ContextCacheRegistry(
+    enabled=os.environ.get("AI_CONTEXT_CACHE", "false").lower() == "true",
+    ttl_seconds=int(os.environ.get("AI_CONTEXT_CACHE_TTL", "3600")),
+    refresh_margin=int(os.environ.get("AI_CONTEXT_CACHE_REFRESH_MARGIN", "300")),
+)
@@ -0,0 +1,341 @@
+"""Server-side DOCX/PDF rendering of resumes and cover letters.
+
+Both formats are rendered from templates prepared once at import time:
+
+* DOCX: a python-docx document with the page margins and the Normal, Title,
+  Heading 1 and List Bullet styles set up, kept as bytes; every render opens
+  a copy.  ``EXPORT_DOCX_TEMPLATE`` points at a house-style .docx instead
+  (it needs the same four styles).
+* PDF: a small built-in writer using the standard Helvetica fonts, so no
+  font files or PDF library are needed.  Font metrics, the font objects and
+  the page geometry are precomputed; a render only lays out lines and
+  writes compressed content streams.
+
+Plain text is split into blocks first: for resumes the first line is the
+name, heading-like lines naming a known section become headings and
+"-"/"*"/bullet lines become list items; cover letters are paragraphs.
+
+Rendered files are cached by content hash of (kind, format, template, text),
+so exporting the same document twice renders it once.
+"""
+import hashlib
+import io
+import os
+import re
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from docx import Document
+from docx.shared import Inches, Pt
+
+from analysis_store import content_hash
+from prompt_compression import RESUME_SECTION_RULES, looks_like_heading
+from ttl_cache import TTLCache
+
+MEDIA_TYPES = {
+    "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    "pdf": "application/pdf",
+    "txt": "text/plain; charset=utf-8",
+}
+
+TITLE, HEADING, BULLET, TEXT, BLANK = "title", "heading", "bullet", "text", "blank"
+_BULLET = re.compile(r"^\s*(?:[-*\u2022\u25aa\u25cf\u25e6\u2023\u2043]|\d+[.)])\s+")
+
+
+@dataclass
+class Block:
+    kind: str
+    text: str = ""
+
+
+def resume_blocks(text: str) -> List[Block]:
+    blocks: List[Block] = []
+    for raw in text.splitlines():
+        line = raw.strip()
+        if not line:
+            if blocks and blocks[-1].kind != BLANK:
+                blocks.append(Block(BLANK))
+        elif not any(b.kind != BLANK for b in blocks):
+            blocks.append(Block(TITLE, line))
+        elif looks_like_heading(line) and any(rule.search(line) for rule, _ in RESUME_SECTION_RULES):
+            blocks.append(Block(HEADING, line.rstrip(":").lstrip("# ")))
+        elif _BULLET.match(line):
+            blocks.append(Block(BULLET, _BULLET.sub("", line, count=1)))
+        else:
+            blocks.append(Block(TEXT, line))
+    return blocks
+
+
+def letter_blocks(text: str) -> List[Block]:
+    blocks: List[Block] = []
+    for raw in text.splitlines():
+        line = raw.strip()
+        if line:
+            blocks.append(Block(TEXT, line))
+        elif blocks and blocks[-1].kind != BLANK:
+            blocks.append(Block(BLANK))
+    return blocks
+
+
+# ---------------------------------------------------------------------------
+# DOCX
+
+def _build_docx_template() -> bytes:
+    path = os.environ.get("EXPORT_DOCX_TEMPLATE")
+    if path:
+        with open(path, "rb") as f:
+            return f.read()
+    document = Document()
+    for section in document.sections:
+        section.top_margin = section.bottom_margin = Inches(0.7)
+        section.left_margin = section.right_margin = Inches(0.8)
+    styles = document.styles
+    styles["Normal"].font.name = "Calibri"
+    styles["Normal"].font.size = Pt(10.5)
+    styles["Normal"].paragraph_format.space_after = Pt(2)
+    styles["Title"].font.size = Pt(20)
+    styles["Heading 1"].font.size = Pt(12.5)
+    styles["Heading 1"].paragraph_format.space_before = Pt(10)
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+_DOCX_TEMPLATE = _build_docx_template()
+_DOCX_STYLES = {TITLE: "Title", HEADING: "Heading 1", BULLET: "List Bullet", TEXT: "Normal"}
+
+
+def render_docx(blocks: List[Block]) -> bytes:
+    document = Document(io.BytesIO(_DOCX_TEMPLATE))
+    body = document.element.body
+    for paragraph in list(document.paragraphs):  # a house template may carry sample text
+        body.remove(paragraph._element)
+    for block in blocks:
+        if block.kind == BLANK:
+            continue
+        document.add_paragraph(block.text, style=_DOCX_STYLES[block.kind])
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+# ---------------------------------------------------------------------------
+# PDF
+
+# Advance widths (1/1000 em) of printable ASCII, from the Adobe Helvetica AFMs
+_HELVETICA = [
+    278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,
+    1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,
+    333, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,
+    556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584,
+]
+_HELVETICA_BOLD = [
+    278, 333, 474, 556, 556, 889, 722, 238, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 333, 333, 584, 584, 584, 611,
+    975, 722, 722, 722, 722, 667, 611, 778, 722, 278, 556, 722, 611, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 333, 278, 333, 584, 556,
+    333, 556, 611, 556, 611, 556, 333, 611, 611, 278, 278, 556, 278, 889, 611, 611,
+    611, 611, 389, 556, 333, 611, 556, 778, 556, 556, 500, 389, 280, 389, 584,
+]
+# A few common non-ASCII WinAnsi glyphs; other accented letters are close to 556
+_EXTRA_WIDTHS = {"\u2013": 556, "\u2014": 1000, "\u2018": 222, "\u2019": 222, "\u201c": 333,
+                 "\u201d": 333, "\u2022": 350, "\u2026": 1000, "\u20ac": 556}
+
+
+def _width_table(ascii_widths: List[int]) -> Dict[str, int]:
+    table = {chr(32 + i): width for i, width in enumerate(ascii_widths)}
+    table.update(_EXTRA_WIDTHS)
+    return table
+
+
+_FONTS = {"F1": _width_table(_HELVETICA), "F2": _width_table(_HELVETICA_BOLD)}
+
+
+@dataclass(frozen=True)
+class PdfTemplate:
+    page_width: float
+    page_height: float
+    margin: float = 54.0
+    # block kind -> (font, size, leading, space before)
+    styles: Tuple[Tuple[str, str, float, float, float], ...] = (
+        (TITLE, "F2", 18.0, 22.0, 0.0),
+        (HEADING, "F2", 12.0, 15.0, 8.0),
+        (BULLET, "F1", 10.5, 13.5, 0.0),
+        (TEXT, "F1", 10.5, 13.5, 0.0),
+        (BLANK, "F1", 10.5, 7.0, 0.0),
+    )
+
+    def style(self, kind: str) -> Tuple[str, float, float, float]:
+        for name, font, size, leading, before in self.styles:
+            if name == kind:
+                return font, size, leading, before
+        raise KeyError(kind)
+
+
+PAGE_SIZES = {"a4": (595.28, 841.89), "letter": (612.0, 792.0)}
+PDF_TEMPLATE = PdfTemplate(*PAGE_SIZES.get(os.environ.get("EXPORT_PAGE_SIZE", "a4").lower(), PAGE_SIZES["a4"]))
+
+# Objects shared by every PDF: 1 catalog, 2 page tree, 3/4 fonts
+_FONT_OBJECTS = (
+    b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+    b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>",
+)
+_FALLBACKS = str.maketrans({"\u2192": "->", "\u2190": "<-", "\u2212": "-", "\u00a0": " ", "\u2009": " ",
+                            "\u25aa": "\u2022", "\u25cf": "\u2022", "\u25e6": "\u2022"})
+
+
+def _text_width(text: str, font: str, size: float) -> float:
+    widths = _FONTS[font]
+    return sum(widths.get(char, 556) for char in text) * size / 1000
+
+
+def _wrap(text: str, font: str, size: float, width: float) -> List[str]:
+    lines: List[str] = []
+    current = ""
+    for word in text.split():
+        candidate = f"{current} {word}" if current else word
+        if _text_width(candidate, font, size) <= width:
+            current = candidate
+            continue
+        if current:
+            lines.append(current)
+        # A word longer than the line is split wherever it has to be
+        while _text_width(word, font, size) > width:
+            cut = len(word) - 1
+            while cut > 1 and _text_width(word[:cut], font, size) > width:
+                cut -= 1
+            lines.append(word[:cut])
+            word = word[cut:]
+        current = word
+    if current:
+        lines.append(current)
+    return lines or [""]
+
+
+def _pdf_string(text: str) -> bytes:
+    encoded = text.translate(_FALLBACKS).encode("cp1252", errors="replace")
+    return b"(" + encoded.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)") + b")"
+
+
+def _layout(blocks: List[Block], template: PdfTemplate) -> List[List[bytes]]:
+    """Content-stream operators, one list per page"""
+    pages: List[List[bytes]] = [[]]
+    top = template.page_height - template.margin
+    y = top
+    text_width = template.page_width - 2 * template.margin
+    for block in blocks:
+        font, size, leading, before = template.style(block.kind)
+        if block.kind == BLANK:
+            y -= leading
+            continue
+        indent = 14.0 if block.kind == BULLET else 0.0
+        lines = _wrap(block.text, font, size, text_width - indent)
+        if y < top:
+            y -= before
+        for number, line in enumerate(lines):
+            if y - leading < template.margin:
+                pages.append([])
+                y = top
+            y -= leading
+            x = template.margin + indent
+            if block.kind == BULLET and number == 0:
+                pages[-1].append(b"BT /F1 %.1f Tf %.2f %.2f Td %s Tj ET" % (size, x - 10, y, _pdf_string("\u2022")))
+            pages[-1].append(b"BT /%s %.1f Tf %.2f %.2f Td %s Tj ET" % (font.encode(), size, x, y, _pdf_string(line)))
+    return pages
+
+
+def render_pdf(blocks: List[Block], template: PdfTemplate = PDF_TEMPLATE) -> bytes:
+    pages = _layout(blocks, template)
+    objects: List[bytes] = [b"", b""]  # catalog and page tree are filled in last
+    objects.extend(_FONT_OBJECTS)
+    page_ids = []
+    for operators in pages:
+        stream = zlib.compress(b"\n".join(operators))
+        objects.append(b"<< /Length %d /Filter /FlateDecode >>\nstream\n%s\nendstream" % (len(stream), stream))
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %.2f %.2f] /Resources << /Font << /F1 3 0 R /F2 4 0 R >> >>"
+            b" /Contents %d 0 R >>" % (template.page_width, template.page_height, content_id))
+        page_ids.append(len(objects))
+    objects[0] = b"<< /Type /Catalog /Pages 2 0 R >>"
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % page for page in page_ids), len(page_ids))
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n%s\nendobj\n" % (number, body))
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for offset in offsets:
+        out.write(b"%010d 00000 n \n" % offset)
+    out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+    return out.getvalue()
+
+
+# ---------------------------------------------------------------------------
+
+_TEMPLATE_VERSION = hashlib.blake2b(_DOCX_TEMPLATE + repr(PDF_TEMPLATE).encode(), digest_size=6).hexdigest()
+
+
+class ExportStats:
+    def __init__(self):
+        self.renders = 0
+        self.render_ms_total = 0.0
+        self.bytes_rendered = 0
+
+    def as_dict(self) -> dict:
+        return {
+            "renders": self.renders,
+            "mean_render_ms": round(self.render_ms_total / self.renders, 2) if self.renders else 0.0,
+            "bytes_rendered": self.bytes_rendered,
+        }
+
+
+export_stats = ExportStats()
+
+_renders: TTLCache[bytes] = TTLCache(
+    max_items=int(os.environ.get("EXPORT_CACHE_MAX_ITEMS", "200")),
+    ttl_seconds=float(os.environ.get("EXPORT_CACHE_TTL", "3600")),
+)
+
+
+def export_key(kind: str, file_format: str, text: str) -> str:
+    """Cache key and ETag of one rendered document"""
+    return content_hash(f"{kind}\x1f{file_format}\x1f{_TEMPLATE_VERSION}\x1f{text}")
+
+
+def render_document(kind: str, file_format: str, text: str) -> Tuple[bytes, str]:
+    """(file bytes, cache key); ``kind`` is "resume" or "cover_letter" """
+    key = export_key(kind, file_format, text)
+    cached = _renders.get(key)
+    if cached is not None:
+        return cached, key
+    started = time.perf_counter()
+    if file_format == "txt":
+        rendered = text.encode("utf-8")
+    else:
+        blocks = resume_blocks(text) if kind == "resume" else letter_blocks(text)
+        rendered = render_docx(blocks) if file_format == "docx" else render_pdf(blocks)
+    export_stats.renders += 1
+    export_stats.render_ms_total += (time.perf_counter() - started) * 1000
+    export_stats.bytes_rendered += len(rendered)
+    _renders.set(key, rendered)
+    return rendered, key
+
+
+def iter_chunks(data: bytes, chunk_size: Optional[int] = None) -> Iterator[bytes]:
+    chunk_size = chunk_size or int(os.environ.get("EXPORT_CHUNK_BYTES", "65536"))
+    view = memoryview(data)
+    for start in range(0, len(data), chunk_size):
+        yield bytes(view[start:start + chunk_size])
+
+
+def export_cache_stats() -> dict:
+    return {**export_stats.as_dict(), "cache": _renders.stats()}
@@ -0,0 +1,173 @@
+"""Facet-parallel resume analysis.
+
+Instead of one large call that produces ``skills_gap``, ``suggestions``,
+``ats_keywords`` and ``overall_score`` together, facet mode sends one compact
+prompt per facet concurrently and merges the answers into the usual
+``Analysis`` shape.  Latency is then bound by the slowest facet (the
+suggestions) instead of the whole document, and the short facets are
+available as soon as they land.
+
+``iter_facet_analysis`` yields events as facets complete; the suggestions
+facet is streamed and yields each suggestion as soon as it has been fully
+received.  ``run_facet_analysis`` collects the events into the merged dict.
+"""
+import asyncio
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from model_client import send_model_message, stream_model_message
+from response_schemas import Analysis, IncrementalJSONParser, MalformedResponseError, Suggestion, parse_analysis
+from retry_engine import ProviderError, RetryPolicy, UnknownProviderError, classify_provider_exception, run_with_retry
+
+_FACET_PREAMBLE = """You are a senior resume optimization specialist with deep expertise in ATS systems and hiring manager expectations. You are given a job description and a candidate's resume.
+
+"""
+
+_NO_FABRICATION = """
+
+ZERO FABRICATION RULE: never add skills, metrics, employers, titles, dates, credentials or achievements that are not explicitly in the resume. Only rephrase, reorganize and emphasize what is already there."""
+
+FACET_PROMPTS: Dict[str, str] = {
+    "ats_keywords": _FACET_PREAMBLE + """List the keywords an applicant tracking system will match for this job, most important first, using the job description's own wording.
+
+Return only this JSON: {"ats_keywords": ["keyword", "..."]}""",
+    "skills_gap": _FACET_PREAMBLE + """List the specific skills, tools and qualifications the job description asks for that are missing or underrepresented in the resume.
+
+Return only this JSON: {"skills_gap": ["skill", "..."]}""",
+    "overall_score": _FACET_PREAMBLE + """Score how well the resume currently fits the job, from 0 to 100, with a one or two sentence justification and the improvement potential.
+
+Return only this JSON: {"overall_score": "X/100 - reasoning"}""",
+    "suggestions": _FACET_PREAMBLE + """Suggest specific, actionable improvements to the resume text for this job, highest impact first.
+
+Return only this JSON:
+{"suggestions": [{"section": "summary|experience|skills|achievements|education", "current_text": "exact text copied from the resume, or null when adding new content", "suggested_text": "optimized replacement text", "reason": "why this change increases interview potential", "impact_level": "High|Medium|Low", "priority": 1-10}]}""" + _NO_FABRICATION,
+}
+
+# Facets answered by a single short call; suggestions are streamed
+QUICK_FACETS = ("ats_keywords", "skills_gap", "overall_score")
+
+
+def build_facet_user_message(job_description: str, resume_text: str) -> str:
+    return f"""
+            JOB DESCRIPTION:
+            {job_description}
+
+            CURRENT RESUME:
+            {resume_text}
+
+            Please provide the requested part of the analysis in the specified JSON format.
+            """
+
+
+def _parse_facet(facet: str, response: str):
+    try:
+        return getattr(parse_analysis(response), facet)
+    except MalformedResponseError as e:
+        raise UnknownProviderError(f"Model returned malformed {facet} JSON: {e}") from e
+
+
+async def _quick_facet(facet: str, user_message: str, policy: RetryPolicy):
+    async def attempt():
+        response = await send_model_message(FACET_PROMPTS[facet], user_message, f"analysis_{facet}", json_mode=True)
+        return _parse_facet(facet, response)
+
+    return await run_with_retry(attempt, label=f"AI Analysis facet {facet}", policy=policy)
+
+
+async def _stream_suggestions(user_message: str, emit) -> List[Suggestion]:
+    """Stream the suggestions facet, emitting each suggestion once it is complete"""
+    parser = IncrementalJSONParser()
+    emitted: List[Suggestion] = []
+
+    def flush(final: bool):
+        try:
+            items = parser.snapshot().get("suggestions") or []
+        except (MalformedResponseError, AttributeError):
+            return
+        # The last item may still be arriving until the whole document has been read
+        complete = items if final else items[:-1]
+        for item in complete[len(emitted):]:
+            try:
+                suggestion = Suggestion.model_validate(item)
+            except Exception:
+                continue
+            emitted.append(suggestion)
+            emit(("suggestion", suggestion.model_dump()))
+
+    async for chunk in stream_model_message(FACET_PROMPTS["suggestions"], user_message, "analysis_suggestions", json_mode=True):
+        parser.feed(chunk)
+        if "}" in chunk:
+            flush(final=False)
+    flush(final=True)
+    return emitted
+
+
+async def _suggestions_facet(user_message: str, policy: RetryPolicy, emit) -> List[Suggestion]:
+    try:
+        return await _stream_suggestions(user_message, emit)
+    except Exception as e:
+        error = classify_provider_exception(e)
+        if not error.retryable:
+            raise error from e
+        print(f"⚠️ Suggestions stream failed ({error.error_type}), retrying without streaming")
+    # Anything already emitted is superseded by the final merged result
+    return await _quick_facet("suggestions", user_message, policy)
+
+
+async def iter_facet_analysis(job_description: str, resume_text: str,
+                              policy: Optional[RetryPolicy] = None) -> AsyncIterator[Tuple[str, object]]:
+    """Yield ``(facet, value)`` as facets finish, ``("suggestion", dict)`` as
+    suggestions stream in, and finally ``("analysis", merged_dict)``.
+
+    Raises the first facet's ``ProviderError`` if any facet ultimately fails.
+    """
+    policy = policy or RetryPolicy.from_env()
+    user_message = build_facet_user_message(job_description, resume_text)
+    events: asyncio.Queue = asyncio.Queue()
+
+    async def quick(facet: str):
+        value = await _quick_facet(facet, user_message, policy)
+        events.put_nowait((facet, value))
+        return value
+
+    async def suggestions():
+        value = await _suggestions_facet(user_message, policy, events.put_nowait)
+        events.put_nowait(("suggestions", [s.model_dump() for s in value]))
+        return value
+
+    tasks = {facet: asyncio.ensure_future(quick(facet)) for facet in QUICK_FACETS}
+    tasks["suggestions"] = asyncio.ensure_future(suggestions())
+    pending = set(tasks.values())
+    try:
+        while pending:
+            getter = asyncio.ensure_future(events.get())
+            done, _ = await asyncio.wait(pending | {getter}, return_when=asyncio.FIRST_COMPLETED)
+            if getter in done:
+                yield getter.result()
+            else:
+                getter.cancel()
+            for task in done - {getter}:
+                pending.discard(task)
+                if task.exception() is not None:
+                    error = task.exception()
+                    raise error if isinstance(error, ProviderError) else classify_provider_exception(error)
+        while not events.empty():
+            yield events.get_nowait()
+
+        merged = Analysis(
+            ats_keywords=tasks["ats_keywords"].result(),
+            skills_gap=tasks["skills_gap"].result(),
+            overall_score=tasks["overall_score"].result(),
+            suggestions=tasks["suggestions"].result(),
+        )
+        yield "analysis", merged.model_dump()
+    finally:
+        for task in tasks.values():
+            task.cancel()
+
+
+async def run_facet_analysis(job_description: str, resume_text: str, policy: Optional[RetryPolicy] = None) -> dict:
+    """Facet mode for callers that only want the merged analysis"""
+    async for facet, value in iter_facet_analysis(job_description, resume_text, policy):
+        if facet == "analysis":
+            return value
+    raise UnknownProviderError("Facet analysis finished without a result")
@@ -0,0 +1,191 @@
+"""Request hedging for model calls.
+
+If a call has not returned by a percentile of recently observed latency, an
+identical backup request is fired; whichever finishes first wins and the other
+is cancelled.  A hedge budget caps the extra spend to a fraction of traffic.
+The backup takes its own ``model_scheduler`` slot at speculative priority, and
+is skipped when no slot is free, so hedging never exceeds
+``AI_MAX_CONCURRENT_CALLS``.
+"""
+import asyncio
+import os
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from model_scheduler import SPECULATIVE, model_scheduler
+
+
+class LatencyTracker:
+    """Rolling window of successful call latencies (seconds)"""
+
+    def __init__(self, window: int = 200):
+        self._samples = deque(maxlen=window)
+
+    def record(self, seconds: float):
+        self._samples.append(seconds)
+
+    def __len__(self):
+        return len(self._samples)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * (len(ordered) - 1)))))
+        return ordered[index]
+
+    def summary(self) -> dict:
+        return {
+            "samples": len(self._samples),
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+        }
+
+
+class HedgeBudget:
+    """Allows hedges for at most ``ratio`` of the calls in a sliding window"""
+
+    def __init__(self, ratio: float = 0.1, window_seconds: float = 60.0):
+        self.ratio = ratio
+        self.window_seconds = window_seconds
+        self._calls = deque()
+        self._hedges = deque()
+
+    def _prune(self, now: float):
+        cutoff = now - self.window_seconds
+        while self._calls and self._calls[0] < cutoff:
+            self._calls.popleft()
+        while self._hedges and self._hedges[0] < cutoff:
+            self._hedges.popleft()
+
+    def record_call(self):
+        self._calls.append(time.monotonic())
+
+    def try_acquire(self) -> bool:
+        now = time.monotonic()
+        self._prune(now)
+        if len(self._hedges) + 1 > max(1.0, self.ratio * len(self._calls)):
+            return False
+        self._hedges.append(now)
+        return True
+
+
+class HedgeStats:
+    def __init__(self):
+        self.calls = 0
+        self.hedges_fired = 0
+        self.hedge_wins = 0
+        self.primary_wins_after_hedge = 0
+        self.budget_denied = 0
+        self.slot_denied = 0
+
+    def as_dict(self) -> dict:
+        return {
+            "calls": self.calls,
+            "hedges_fired": self.hedges_fired,
+            "hedge_wins": self.hedge_wins,
+            "primary_wins_after_hedge": self.primary_wins_after_hedge,
+            "hedge_win_rate": round(self.hedge_wins / self.hedges_fired, 3) if self.hedges_fired else 0.0,
+            "budget_denied": self.budget_denied,
+            "slot_denied": self.slot_denied,
+        }
+
+
+class Hedger:
+    """Tracks latency for one kind of call and hedges it when it runs long"""
+
+    def __init__(self, enabled: bool, percentile: float, min_samples: int, min_delay: float, budget: HedgeBudget):
+        self.enabled = enabled
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self.budget = budget
+        self.latency = LatencyTracker()
+        self.stats = HedgeStats()
+
+    def hedge_delay(self) -> Optional[float]:
+        if not self.enabled or len(self.latency) < self.min_samples:
+            return None
+        return max(self.min_delay, self.latency.percentile(self.percentile))
+
+    async def _timed(self, make_call: Callable[[], Awaitable[Any]]):
+        started = time.monotonic()
+        result = await make_call()
+        self.latency.record(time.monotonic() - started)
+        return result
+
+    async def _hedged(self, make_call: Callable[[], Awaitable[Any]]):
+        # The primary holds the caller's slot; the backup needs one of its own
+        async with model_scheduler.slot(SPECULATIVE):
+            return await self._timed(make_call)
+
+    async def call(self, make_call: Callable[[], Awaitable[Any]], label: str = "model call") -> Any:
+        self.stats.calls += 1
+        self.budget.record_call()
+        delay = self.hedge_delay()
+        if delay is None:
+            return await self._timed(make_call)
+
+        primary = asyncio.ensure_future(self._timed(make_call))
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done:
+            return primary.result()
+
+        if model_scheduler.headroom() < 1:
+            self.stats.slot_denied += 1
+            return await primary
+        if not self.budget.try_acquire():
+            self.stats.budget_denied += 1
+            return await primary
+
+        print(f"🪁 {label} still running after {delay:.1f}s, firing hedge request")
+        self.stats.hedges_fired += 1
+        hedge = asyncio.ensure_future(self._hedged(make_call))
+        pending = {primary, hedge}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                succeeded = [task for task in done if task.exception() is None]
+                if succeeded:
+                    winner = hedge if hedge in succeeded else primary
+                    if winner is hedge:
+                        self.stats.hedge_wins += 1
+                    else:
+                        self.stats.primary_wins_after_hedge += 1
+                    return winner.result()
+                if not pending:
+                    # Both attempts failed; surface the primary's error
+                    return primary.result()
+        finally:
+            for task in (primary, hedge):
+                if not task.done():
+                    task.cancel()
+
+
+_budget = HedgeBudget(
+    ratio=float(os.environ.get("AI_HEDGE_BUDGET_RATIO", "0.1")),
+)
+
+_hedgers: Dict[str, Hedger] = {}
+
+
+def get_hedger(kind: str) -> Hedger:
+    """One hedger per call kind, since analysis and cover letters have different latency profiles"""
+    if kind not in _hedgers:
+        _hedgers[kind] = Hedger(
+            enabled=os.environ.get("AI_HEDGE_ENABLED", "false").lower() == "true",
+            percentile=float(os.environ.get("AI_HEDGE_PERCENTILE", "95")),
+            min_samples=int(os.environ.get("AI_HEDGE_MIN_SAMPLES", "20")),
+            min_delay=float(os.environ.get("AI_HEDGE_MIN_DELAY", "2.0")),
+            budget=_budget,
+        )
+    return _hedgers[kind]
+
+
+def hedging_stats() -> dict:
+    return {
+        kind: {"latency": hedger.latency.summary(), **hedger.stats.as_dict(), "enabled": hedger.enabled}
+        for kind, hedger in _hedgers.items()
+    }
@@ -0,0 +1,227 @@
+"""Local retrieval index over stored job postings.
+
+Answers "which of these postings fit this resume best" on the CPU without a
+model call, so only the top-k need to go through ``get_ai_response``.
+
+Two signals are combined:
+
+* BM25 over an inverted index of normalized (taxonomy-folded) tokens
+* cosine similarity of signed hashing-vectorizer embeddings (unigrams and
+  bigrams, sublinear tf, L2-normalized) kept in one NumPy matrix, so scoring
+  every posting is a single matrix-vector product
+
+Both scores are scaled to [0, 1] and mixed with ``JOB_MATCH_BM25_WEIGHT``.
+Postings can be added, replaced and deleted at any time; deleted rows are
+zeroed and their slots reused.
+
+Postings are keyed by content hash, the same id the analysis store uses for
+job description documents, so the index is rebuilt from the store at
+startup (``warm_from_store``).  Deleted postings are flagged in the store so
+they stay out after a restart, and the index holds at most
+``JOB_INDEX_MAX_POSTINGS``, evicting the least recently added.
+"""
+import asyncio
+import hashlib
+import math
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from ats_scorer import is_content_token
+from skills_taxonomy import taxonomy
+from text_tokens import tokenize
+
+
+def _terms(text: str) -> List[str]:
+    return [token for token, _ in taxonomy.canonical_tokens(tokenize(text)) if is_content_token(token)]
+
+
+def _bucket(feature: str, dim: int):
+    digest = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+    # Signed hashing keeps collisions from only ever adding up
+    return digest % dim, 1.0 if (digest >> 63) & 1 else -1.0
+
+
+@dataclass
+class Posting:
+    posting_id: str
+    title: str
+    job_description: str
+    source_url: Optional[str]
+    added_at: float
+
+    def public_view(self, include_text: bool = True) -> dict:
+        view = {
+            "posting_id": self.posting_id,
+            "title": self.title,
+            "source_url": self.source_url,
+        }
+        if include_text:
+            view["job_description"] = self.job_description
+        return view
+
+
+class JobIndex:
+    def __init__(self, dim: int = 1024, k1: float = 1.2, b: float = 0.75, bm25_weight: float = 0.5,
+                 max_postings: int = 20000):
+        self.dim = dim
+        self.max_postings = max_postings
+        self.k1 = k1
+        self.b = b
+        self.bm25_weight = bm25_weight
+        self._vectors = np.zeros((64, dim), dtype=np.float32)
+        self._lengths = np.zeros(64, dtype=np.float32)
+        self._postings: Dict[str, Dict[int, int]] = {}  # term -> {slot: tf}
+        self._doc_terms: Dict[int, Dict[str, int]] = {}
+        self._slots: "OrderedDict[str, int]" = OrderedDict()  # insertion order, oldest first
+        self._docs: Dict[int, Posting] = {}
+        self._free: List[int] = []
+        self._next_slot = 0
+        self._total_length = 0
+        self.evicted = 0
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def _embed(self, terms: List[str]) -> np.ndarray:
+        counts: Dict[str, int] = {}
+        for feature in terms + [f"{a} {b}" for a, b in zip(terms, terms[1:])]:
+            counts[feature] = counts.get(feature, 0) + 1
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for feature, count in counts.items():
+            index, sign = _bucket(feature, self.dim)
+            vector[index] += sign * (1.0 + math.log(count))
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _allocate(self) -> int:
+        if self._free:
+            return self._free.pop()
+        slot = self._next_slot
+        self._next_slot += 1
+        if slot >= len(self._lengths):
+            capacity = len(self._lengths) * 2
+            self._vectors = np.vstack([self._vectors, np.zeros((capacity - len(self._lengths), self.dim), dtype=np.float32)])
+            self._lengths = np.concatenate([self._lengths, np.zeros(capacity - len(self._lengths), dtype=np.float32)])
+        return slot
+
+    def add(self, posting_id: str, job_description: str, title: Optional[str] = None,
+            source_url: Optional[str] = None) -> Posting:
+        """Insert a posting, replacing any earlier version with the same id"""
+        self.remove(posting_id)
+        terms = _terms(job_description)
+        slot = self._allocate()
+        tf: Dict[str, int] = {}
+        for term in terms:
+            tf[term] = tf.get(term, 0) + 1
+        for term, count in tf.items():
+            self._postings.setdefault(term, {})[slot] = count
+        first_line = next((line.strip() for line in job_description.splitlines() if line.strip()), "")
+        posting = Posting(posting_id, title or first_line[:120], job_description, source_url, time.time())
+        self._doc_terms[slot] = tf
+        self._docs[slot] = posting
+        self._slots[posting_id] = slot
+        self._vectors[slot] = self._embed(terms)
+        self._lengths[slot] = len(terms)
+        self._total_length += len(terms)
+        while len(self._slots) > self.max_postings:
+            self.remove(next(iter(self._slots)))
+            self.evicted += 1
+        return posting
+
+    def remove(self, posting_id: str) -> bool:
+        slot = self._slots.pop(posting_id, None)
+        if slot is None:
+            return False
+        for term in self._doc_terms.pop(slot):
+            postings = self._postings[term]
+            postings.pop(slot, None)
+            if not postings:
+                del self._postings[term]
+        del self._docs[slot]
+        self._total_length -= int(self._lengths[slot])
+        self._vectors[slot] = 0.0
+        self._lengths[slot] = 0.0
+        self._free.append(slot)
+        return True
+
+    def get(self, posting_id: str) -> Optional[Posting]:
+        slot = self._slots.get(posting_id)
+        return self._docs.get(slot) if slot is not None else None
+
+    def _bm25(self, query_terms: List[str]) -> np.ndarray:
+        size = self._next_slot
+        scores = np.zeros(size, dtype=np.float32)
+        count = len(self._docs)
+        avgdl = self._total_length / count if count else 1.0
+        norm = self.k1 * (1 - self.b + self.b * self._lengths[:size] / max(avgdl, 1.0))
+        for term in set(query_terms):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            slots = np.fromiter(postings.keys(), dtype=np.int64, count=len(postings))
+            tfs = np.fromiter(postings.values(), dtype=np.float32, count=len(postings))
+            scores[slots] += idf * tfs * (self.k1 + 1) / (tfs + norm[slots])
+        return scores
+
+    def search(self, text: str, top_k: int = 10) -> List[dict]:
+        """Best-matching postings for a resume (or any query text)"""
+        if not self._docs:
+            return []
+        terms = _terms(text)
+        size = self._next_slot
+        bm25 = self._bm25(terms)
+        cosine = np.clip(self._vectors[:size] @ self._embed(terms), 0.0, 1.0)
+        peak = bm25.max()
+        combined = self.bm25_weight * (bm25 / peak if peak > 0 else bm25) + (1 - self.bm25_weight) * cosine
+
+        active = np.fromiter(self._docs.keys(), dtype=np.int64, count=len(self._docs))
+        top_k = min(top_k, len(active))
+        best = active[np.argpartition(-combined[active], top_k - 1)[:top_k]]
+        best = best[np.argsort(-combined[best])]
+        return [
+            {
+                **self._docs[int(slot)].public_view(),
+                "score": round(float(combined[slot]), 4),
+                "bm25": round(float(bm25[slot]), 3),
+                "cosine": round(float(cosine[slot]), 4),
+            }
+            for slot in best
+        ]
+
+    def stats(self) -> dict:
+        return {
+            "postings": len(self._docs),
+            "max_postings": self.max_postings,
+            "evicted": self.evicted,
+            "terms": len(self._postings),
+            "dim": self.dim,
+            "matrix_bytes": int(self._vectors.nbytes),
+        }
+
+
+job_index = JobIndex(
+    dim=int(os.environ.get("JOB_INDEX_HASH_DIM", "1024")),
+    bm25_weight=float(os.environ.get("JOB_MATCH_BM25_WEIGHT", "0.5")),
+    max_postings=int(os.environ.get("JOB_INDEX_MAX_POSTINGS", "20000")),
+)
+
+
+async def warm_from_store(store, limit: int, index: JobIndex = job_index) -> int:
+    """Index the job descriptions already in the analysis store, skipping deleted postings"""
+    documents = [item async for item in store.iter_documents("job_description", min(limit, index.max_postings),
+                                                                indexed_only=True)]
+    added = 0
+    # Oldest first, so eviction order matches age
+    for digest, text in reversed(documents):
+        if index.get(digest) is None:
+            index.add(digest, text)
+            added += 1
+            if added % 200 == 0:
+                await asyncio.sleep(0)  # indexing is CPU work; let requests through
+    return added
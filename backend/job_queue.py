@@ -0,0 +1,371 @@
+"""In-process job queue for analyses and cover letters.
+
+Jobs are submitted with a kind, a JSON-serializable payload and a priority,
+picked up by a pool of asyncio workers and kept for a retention period so
+clients can poll for the result.  The storage backend is pluggable:
+
+* ``memory`` (default) - heap + dict, single process
+* ``sqlite`` - ``JOB_QUEUE_SQLITE_PATH``, survives restarts
+* ``redis`` - ``JOB_QUEUE_REDIS_URL``, any Redis-compatible server
+
+Configured with ``JOB_QUEUE_BACKEND``, ``JOB_QUEUE_WORKERS``,
+``JOB_QUEUE_EXPIRY`` (seconds a job may wait before it expires) and
+``JOB_QUEUE_RETENTION`` (seconds finished jobs are kept).
+"""
+import asyncio
+import heapq
+import json
+import os
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from fastapi import HTTPException
+
+from model_scheduler import BATCH, INTERACTIVE, SPECULATIVE, call_class
+
+# Lower numbers run first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_NORMAL = 5
+PRIORITY_BATCH = 10
+PRIORITY_SPECULATIVE = 20  # work nobody has asked for yet
+
+
+def call_class_for(priority: int) -> str:
+    """Model scheduler class for the calls a job of this priority makes"""
+    if priority < PRIORITY_NORMAL:
+        return INTERACTIVE
+    if priority < PRIORITY_SPECULATIVE:
+        return BATCH
+    return SPECULATIVE
+
+
+QUEUED, RUNNING, SUCCEEDED, FAILED, EXPIRED = "queued", "running", "succeeded", "failed", "expired"
+FINISHED_STATES = {SUCCEEDED, FAILED, EXPIRED}
+
+
+@dataclass
+class Job:
+    kind: str
+    payload: dict
+    priority: int = PRIORITY_NORMAL
+    id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    status: str = QUEUED
+    result: Optional[Any] = None
+    error: Optional[Any] = None
+    error_status: Optional[int] = None
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    expires_at: Optional[float] = None
+    retain_until: Optional[float] = None
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self), default=str)
+
+    @classmethod
+    def from_json(cls, data: str) -> "Job":
+        return cls(**json.loads(data))
+
+    def public_view(self) -> dict:
+        view = {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "priority": self.priority,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+        if self.status == SUCCEEDED:
+            view["result"] = self.result
+        elif self.status in (FAILED, EXPIRED):
+            view["error"] = self.error
+        return view
+
+
+class MemoryQueueBackend:
+    def __init__(self):
+        self._heap = []
+        self._jobs: Dict[str, Job] = {}
+        self._sequence = 0
+
+    async def put(self, job: Job):
+        self._jobs[job.id] = job
+        self._sequence += 1
+        heapq.heappush(self._heap, (job.priority, self._sequence, job.id))
+
+    async def pop(self) -> Optional[Job]:
+        while self._heap:
+            _, _, job_id = heapq.heappop(self._heap)
+            job = self._jobs.get(job_id)
+            if job is not None and job.status == QUEUED:
+                return job
+        return None
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    async def update(self, job: Job):
+        self._jobs[job.id] = job
+
+    async def remove(self, job_id: str):
+        self._jobs.pop(job_id, None)
+
+    async def all_jobs(self) -> List[Job]:
+        return list(self._jobs.values())
+
+
+class SQLiteQueueBackend:
+    def __init__(self, path: str):
+        import sqlite3
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs (id TEXT PRIMARY KEY, status TEXT, priority INTEGER, "
+            "created_at REAL, data TEXT)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_queue ON jobs (status, priority, created_at)")
+        self._lock = asyncio.Lock()
+
+    async def _run(self, fn):
+        async with self._lock:
+            return await asyncio.to_thread(fn)
+
+    async def put(self, job: Job):
+        await self.update(job)
+
+    async def pop(self) -> Optional[Job]:
+        def claim():
+            row = self._conn.execute(
+                "SELECT data FROM jobs WHERE status = ? ORDER BY priority, created_at LIMIT 1", (QUEUED,)
+            ).fetchone()
+            if not row:
+                return None
+            # Claim it in the same step so other workers/processes skip it
+            job = Job.from_json(row[0])
+            job.status = RUNNING
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ?, data = ? WHERE id = ? AND status = ?",
+                (RUNNING, job.to_json(), job.id, QUEUED),
+            )
+            return job if cursor.rowcount == 1 else None
+        return await self._run(claim)
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        def load():
+            row = self._conn.execute("SELECT data FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            return Job.from_json(row[0]) if row else None
+        return await self._run(load)
+
+    async def update(self, job: Job):
+        def save():
+            self._conn.execute(
+                "INSERT OR REPLACE INTO jobs (id, status, priority, created_at, data) VALUES (?, ?, ?, ?, ?)",
+                (job.id, job.status, job.priority, job.created_at, job.to_json()),
+            )
+        await self._run(save)
+
+    async def remove(self, job_id: str):
+        await self._run(lambda: self._conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,)))
+
+    async def all_jobs(self) -> List[Job]:
+        rows = await self._run(lambda: self._conn.execute("SELECT data FROM jobs").fetchall())
+        return [Job.from_json(row[0]) for row in rows]
+
+
+class RedisQueueBackend:
+    """Jobs in a hash, queued ids in a sorted set scored by priority then age"""
+
+    def __init__(self, url: str, prefix: str = "resumeai:jobs"):
+        import redis.asyncio as redis
+        self._redis = redis.from_url(url)
+        self._jobs_key = f"{prefix}:data"
+        self._queue_key = f"{prefix}:queue"
+
+    async def put(self, job: Job):
+        await self.update(job)
+        await self._redis.zadd(self._queue_key, {job.id: job.priority * 1e10 + job.created_at})
+
+    async def pop(self) -> Optional[Job]:
+        while True:
+            popped = await self._redis.zpopmin(self._queue_key)
+            if not popped:
+                return None
+            job = await self.get(popped[0][0].decode())
+            if job is not None and job.status == QUEUED:
+                return job
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        data = await self._redis.hget(self._jobs_key, job_id)
+        return Job.from_json(data) if data else None
+
+    async def update(self, job: Job):
+        await self._redis.hset(self._jobs_key, job.id, job.to_json())
+
+    async def remove(self, job_id: str):
+        await self._redis.hdel(self._jobs_key, job_id)
+        await self._redis.zrem(self._queue_key, job_id)
+
+    async def all_jobs(self) -> List[Job]:
+        values = await self._redis.hvals(self._jobs_key)
+        return [Job.from_json(v) for v in values]
+
+
+def create_queue_backend():
+    kind = os.environ.get("JOB_QUEUE_BACKEND", "memory").lower()
+    if kind == "sqlite":
+        return SQLiteQueueBackend(os.environ.get("JOB_QUEUE_SQLITE_PATH", "jobs.sqlite3"))
+    if kind == "redis":
+        return RedisQueueBackend(os.environ.get("JOB_QUEUE_REDIS_URL", "redis://localhost:6379/0"))
+    return MemoryQueueBackend()
+
+
+JobHandler = Callable[[dict], Awaitable[Any]]
+
+
+class JobQueue:
+    def __init__(self, backend, workers: int = 4, expiry_seconds: float = 600, retention_seconds: float = 3600):
+        self.backend = backend
+        self.worker_count = workers
+        self.expiry_seconds = expiry_seconds
+        self.retention_seconds = retention_seconds
+        self._handlers: Dict[str, JobHandler] = {}
+        self._workers: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._done_events: Dict[str, asyncio.Event] = {}
+        self._last_purge = 0.0
+        self.completed = 0
+        self.failed = 0
+        self.expired = 0
+
+    def register(self, kind: str, handler: JobHandler):
+        self._handlers[kind] = handler
+
+    async def start(self):
+        if self._workers:
+            return
+        self._wakeup = asyncio.Event()
+        self._workers = [asyncio.ensure_future(self._worker(i)) for i in range(self.worker_count)]
+        print(f"🧵 Job queue started with {self.worker_count} workers ({self.backend.__class__.__name__})")
+
+    async def stop(self):
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def submit(self, kind: str, payload: dict, priority: int = PRIORITY_NORMAL,
+                     expiry_seconds: Optional[float] = None) -> Job:
+        if kind not in self._handlers:
+            raise HTTPException(status_code=400, detail=f"Unknown job kind: {kind}")
+        await self.start()
+        job = Job(kind=kind, payload=payload, priority=priority)
+        job.expires_at = job.created_at + (expiry_seconds or self.expiry_seconds)
+        self._done_events[job.id] = asyncio.Event()
+        await self.backend.put(job)
+        self._wakeup.set()
+        return job
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        return await self.backend.get(job_id)
+
+    async def wait(self, job_id: str, poll_interval: float = 0.25) -> Job:
+        """Wait for a job to finish (event-driven in-process, polling otherwise)"""
+        event = self._done_events.get(job_id)
+        while True:
+            job = await self.backend.get(job_id)
+            if job is None:
+                raise HTTPException(status_code=404, detail="Job not found")
+            if job.status in FINISHED_STATES:
+                return job
+            if event is not None:
+                try:
+                    await asyncio.wait_for(event.wait(), timeout=5)
+                except asyncio.TimeoutError:
+                    pass
+            else:
+                await asyncio.sleep(poll_interval)
+
+    async def _finish(self, job: Job, status: str):
+        job.status = status
+        job.finished_at = time.time()
+        job.retain_until = job.finished_at + self.retention_seconds
+        await self.backend.update(job)
+        event = self._done_events.pop(job.id, None)
+        if event is not None:
+            event.set()
+
+    async def _worker(self, index: int):
+        while True:
+            try:
+                await self._purge_if_due()
+                job = await self.backend.pop()
+                if job is None:
+                    self._wakeup.clear()
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), timeout=1.0)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                await self._execute(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"❌ Job worker {index} error: {e}")
+                await asyncio.sleep(1)
+
+    async def _execute(self, job: Job):
+        if job.expires_at and time.time() > job.expires_at:
+            job.error = {"error_type": "expired", "message": "Job expired before a worker picked it up", "retryable": True}
+            job.error_status = 503
+            self.expired += 1
+            await self._finish(job, EXPIRED)
+            return
+
+        job.status = RUNNING
+        job.started_at = time.time()
+        await self.backend.update(job)
+        call_class.set(call_class_for(job.priority))
+        try:
+            job.result = await self._handlers[job.kind](job.payload)
+            self.completed += 1
+            await self._finish(job, SUCCEEDED)
+        except HTTPException as e:
+            job.error, job.error_status = e.detail, e.status_code
+            self.failed += 1
+            await self._finish(job, FAILED)
+        except Exception as e:
+            job.error, job.error_status = str(e), 500
+            self.failed += 1
+            await self._finish(job, FAILED)
+
+    async def _purge_if_due(self):
+        now = time.time()
+        if now - self._last_purge < 60:
+            return
+        self._last_purge = now
+        for job in await self.backend.all_jobs():
+            if job.status in FINISHED_STATES and job.retain_until and now > job.retain_until:
+                await self.backend.remove(job.id)
+
+    async def stats(self) -> dict:
+        counts: Dict[str, int] = {}
+        for job in await self.backend.all_jobs():
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return {
+            "backend": self.backend.__class__.__name__,
+            "workers": self.worker_count,
+            "by_status": counts,
+            "completed": self.completed,
+            "failed": self.failed,
+            "expired": self.expired,
+        }
+
+
+job_queue = JobQueue(
+    create_queue_backend(),
+    workers=int(os.environ.get("JOB_QUEUE_WORKERS", "4")),
+    expiry_seconds=float(os.environ.get("JOB_QUEUE_EXPIRY", "600")),
+    retention_seconds=float(os.environ.get("JOB_QUEUE_RETENTION", "3600")),
+)
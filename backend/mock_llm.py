@@ -0,0 +1,291 @@
+"""Mock LLM provider for offline load, latency and retry testing.
+
+Two ways to use it, both behind the same ``send_model_message`` interface the
+real endpoints use:
+
+* In-process: ``AI_MODEL_BACKENDS=mock:default``
+* Out-of-process: run ``python mock_llm.py --port 8100`` and set
+  ``AI_MODEL_BACKENDS=mock_http:http://localhost:8100``
+
+Behavior is configured through environment variables::
+
+    MOCK_LLM_LATENCY=lognormal:6,0.4   # fixed:S | uniform:A,B | lognormal:MEDIAN,SIGMA
+    MOCK_LLM_TAIL_PROB=0.02            # chance of a stalled call ...
+    MOCK_LLM_TAIL_LATENCY=30           # ... and how long it stalls (seconds)
+    MOCK_LLM_TOKENS_PER_SECOND=0       # >0 adds output-length time and paces streaming
+    MOCK_LLM_ERROR_429=0.0             # probability of a rate-limit error
+    MOCK_LLM_ERROR_503=0.0             # probability of an overload error
+    MOCK_LLM_ERROR_TIMEOUT=0.0         # probability of a timeout
+    MOCK_LLM_RETRY_AFTER=2             # Retry-After sent with 429s
+    MOCK_LLM_SEED=                     # fixed seed for reproducible runs
+
+Canned responses are schema-valid for every prompt the backend sends;
+``register_canned_response`` lets new prompt kinds add their own.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import re
+from typing import AsyncIterator, Callable, List, Optional, Tuple
+
+from retry_engine import ProviderTimeoutError, RateLimitError, ServiceUnavailableError
+
+
+class MockLLMConfig:
+    def __init__(self):
+        self.latency = os.environ.get("MOCK_LLM_LATENCY", "lognormal:6,0.4")
+        self.tail_prob = float(os.environ.get("MOCK_LLM_TAIL_PROB", "0.02"))
+        self.tail_latency = float(os.environ.get("MOCK_LLM_TAIL_LATENCY", "30"))
+        self.tokens_per_second = float(os.environ.get("MOCK_LLM_TOKENS_PER_SECOND", "0"))
+        self.error_429 = float(os.environ.get("MOCK_LLM_ERROR_429", "0"))
+        self.error_503 = float(os.environ.get("MOCK_LLM_ERROR_503", "0"))
+        self.error_timeout = float(os.environ.get("MOCK_LLM_ERROR_TIMEOUT", "0"))
+        self.retry_after = float(os.environ.get("MOCK_LLM_RETRY_AFTER", "2"))
+        seed = os.environ.get("MOCK_LLM_SEED")
+        self.random = random.Random(int(seed) if seed else None)
+
+    def sample_latency(self) -> float:
+        if self.random.random() < self.tail_prob:
+            return self.tail_latency
+        kind, _, params = self.latency.partition(":")
+        values = [float(v) for v in params.split(",") if v.strip()]
+        if kind == "fixed":
+            return values[0]
+        if kind == "uniform":
+            return self.random.uniform(values[0], values[1])
+        median, sigma = values[0], values[1] if len(values) > 1 else 0.4
+        return self.random.lognormvariate(math.log(median), sigma)
+
+    def sample_error(self) -> Optional[str]:
+        roll = self.random.random()
+        for kind, probability in (("429", self.error_429), ("503", self.error_503), ("timeout", self.error_timeout)):
+            if roll < probability:
+                return kind
+            roll -= probability
+        return None
+
+
+# --- Canned responses -------------------------------------------------------
+
+_canned: List[Tuple[Callable[[str], bool], Callable[[str, str], dict]]] = []
+
+
+def register_canned_response(matches: Callable[[str], bool], build: Callable[[str, str], dict]):
+    """Register a builder for prompts whose system prompt ``matches``.
+
+    Later registrations win, so specific prompt kinds can override the
+    generic analysis response.
+    """
+    _canned.insert(0, (matches, build))
+
+
+def _between(text: str, start_labels: List[str], end_pattern: str) -> str:
+    for label in start_labels:
+        index = text.find(label)
+        if index >= 0:
+            rest = text[index + len(label):]
+            end = re.search(end_pattern, rest)
+            return (rest[:end.start()] if end else rest).strip()
+    return ""
+
+
+def _keywords(text: str, limit: int) -> List[str]:
+    seen = []
+    for word in re.findall(r"\b[A-Z][A-Za-z+#.]{1,20}\b", text):
+        if word.lower() not in (w.lower() for w in seen):
+            seen.append(word)
+        if len(seen) >= limit:
+            break
+    return seen
+
+
+def _analysis_response(system_prompt: str, user_text: str) -> dict:
+    job = _between(user_text, ["JOB DESCRIPTION:"], r"\n\s*(CURRENT RESUME|CANDIDATE'S RESUME):")
+    resume = _between(user_text, ["CURRENT RESUME:", "CANDIDATE'S RESUME:"], r"\n\s*Please ")
+    resume_lines = [line.strip() for line in resume.splitlines() if len(line.strip()) > 20]
+    job_keywords = _keywords(job, 12)
+    missing = [k for k in job_keywords if k.lower() not in resume.lower()]
+    suggestions = []
+    for index, line in enumerate(resume_lines[:5]):
+        suggestions.append({
+            "section": "experience",
+            "current_text": line,
+            "suggested_text": f"{line.rstrip('.')}, aligned with {', '.join(job_keywords[:2]) or 'the role'}.",
+            "reason": "Connects existing experience to the job's stated requirements.",
+            "impact_level": ["High", "Medium", "Low"][index % 3],
+            "priority": index + 1,
+        })
+    coverage = 100 - int(100 * len(missing) / max(1, len(job_keywords)))
+    return {
+        "skills_gap": missing[:6],
+        "suggestions": suggestions,
+        "ats_keywords": job_keywords,
+        "overall_score": f"{max(30, coverage)}/100 - Mock score based on keyword coverage",
+    }
+
+
+def _cover_letter_response(system_prompt: str, user_text: str) -> dict:
+    body = "I am excited to apply for this role. " * 20
+    return {
+        "short_version": ("Dear Hiring Manager,\n\n" + body[:1200]).strip(),
+        "long_version": ("Dear Hiring Manager,\n\n" + body * 2).strip(),
+    }
+
+
+def _job_digest_response(system_prompt: str, user_text: str) -> dict:
+    posting = _between(user_text, ["JOB POSTING:"], r"$")
+    keywords = _keywords(posting, 12)
+    lines = [line.strip("-• ").strip() for line in posting.splitlines() if len(line.strip()) > 20]
+    return {
+        "role_title": lines[0][:80] if lines else "",
+        "seniority": "senior" if "senior" in posting.lower() else "mid",
+        "must_have": keywords[:6],
+        "nice_to_have": keywords[6:],
+        "responsibilities": lines[1:6],
+        "keywords": keywords,
+    }
+
+
+def _resume_digest_response(system_prompt: str, user_text: str) -> dict:
+    resume = _between(user_text, ["RESUME:"], r"$")
+    lines = [line.strip() for line in resume.splitlines() if line.strip()]
+    return {
+        "headline": lines[0] if lines else "",
+        "skills": _keywords(resume, 15),
+        "roles": [{"title": "", "company": "", "dates": "", "highlights": [l for l in lines[1:] if len(l) > 20][:6]}],
+        "education": [],
+        "certifications": [],
+    }
+
+
+register_canned_response(lambda system_prompt: True, _analysis_response)
+register_canned_response(lambda system_prompt: "short_version" in system_prompt, _cover_letter_response)
+for _facet in ("ats_keywords", "skills_gap", "overall_score", "suggestions"):
+    # Facet prompts (facet_analysis.py) ask for a single key of the analysis
+    register_canned_response(
+        lambda system_prompt, facet=_facet: '{"%s":' % facet in system_prompt,
+        lambda system_prompt, user_text, facet=_facet: {facet: _analysis_response(system_prompt, user_text)[facet]},
+    )
+register_canned_response(lambda system_prompt: '"must_have"' in system_prompt, _job_digest_response)
+register_canned_response(lambda system_prompt: '"highlights"' in system_prompt, _resume_digest_response)
+
+
+def canned_response(system_prompt: str, user_text: str) -> str:
+    for matches, build in _canned:
+        if matches(system_prompt):
+            return json.dumps(build(system_prompt, user_text))
+    return "{}"
+
+
+# --- In-process provider ----------------------------------------------------
+
+class MockLLM:
+    def __init__(self, config: Optional[MockLLMConfig] = None):
+        self.config = config or MockLLMConfig()
+        self.calls = 0
+
+    def _raise_injected(self, error: str):
+        if error == "429":
+            raise RateLimitError("Mock rate limit exceeded", retry_after=self.config.retry_after, status_code=429)
+        if error == "503":
+            raise ServiceUnavailableError("Mock model is overloaded", status_code=503)
+        raise ProviderTimeoutError("Mock request timed out")
+
+    def _output_seconds(self, text: str) -> float:
+        if self.config.tokens_per_second <= 0:
+            return 0.0
+        return (len(text) / 4) / self.config.tokens_per_second
+
+    async def generate(self, system_prompt: str, user_text: str) -> str:
+        self.calls += 1
+        latency = self.config.sample_latency()
+        error = self.config.sample_error()
+        if error == "timeout":
+            await asyncio.sleep(latency)
+            self._raise_injected(error)
+        if error:
+            # Rejections come back quickly, like a real provider
+            await asyncio.sleep(min(latency, 0.2))
+            self._raise_injected(error)
+        text = canned_response(system_prompt, user_text)
+        await asyncio.sleep(latency + self._output_seconds(text))
+        return text
+
+    async def stream(self, system_prompt: str, user_text: str, chunk_chars: int = 64) -> AsyncIterator[str]:
+        """Yield the canned response in chunks at the configured token rate"""
+        self.calls += 1
+        error = self.config.sample_error()
+        await asyncio.sleep(self.config.sample_latency())
+        if error:
+            self._raise_injected(error)
+        text = canned_response(system_prompt, user_text)
+        per_chunk = self._output_seconds(text[:chunk_chars])
+        for start in range(0, len(text), chunk_chars):
+            if per_chunk:
+                await asyncio.sleep(per_chunk)
+            yield text[start:start + chunk_chars]
+
+
+mock_llm = MockLLM()
+
+
+async def generate_over_http(base_url: str, system_prompt: str, user_text: str) -> str:
+    """Client for the out-of-process mock server"""
+    import aiohttp
+
+    async with aiohttp.ClientSession() as session:
+        async with session.post(
+            f"{base_url.rstrip('/')}/v1/generate",
+            json={"system_prompt": system_prompt, "user_text": user_text},
+        ) as response:
+            if response.status >= 400:
+                # ClientResponseError carries status and headers for classification
+                response.raise_for_status()
+            payload = await response.json()
+            return payload["text"]
+
+
+# --- Out-of-process server --------------------------------------------------
+
+def create_mock_app():
+    from fastapi import FastAPI
+    from fastapi.responses import JSONResponse
+    from pydantic import BaseModel
+
+    class GenerateRequest(BaseModel):
+        system_prompt: str
+        user_text: str
+
+    app = FastAPI(title="Mock LLM Provider")
+    provider = MockLLM()
+
+    @app.post("/v1/generate")
+    async def generate(request: GenerateRequest):
+        try:
+            text = await provider.generate(request.system_prompt, request.user_text)
+        except RateLimitError as e:
+            return JSONResponse({"error": e.detail}, status_code=429, headers={"Retry-After": str(int(e.retry_after or 1))})
+        except ServiceUnavailableError as e:
+            return JSONResponse({"error": e.detail}, status_code=503)
+        except ProviderTimeoutError as e:
+            return JSONResponse({"error": e.detail}, status_code=504)
+        return {"text": text}
+
+    @app.get("/v1/stats")
+    async def stats():
+        return {"calls": provider.calls}
+
+    return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the mock LLM provider as a standalone server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    args = parser.parse_args()
+
+    import uvicorn
+    uvicorn.run(create_mock_app(), host=args.host, port=args.port)
@@ -0,0 +1,125 @@
+"""Model-call layer shared by every endpoint that talks to an LLM.
+
+``send_model_message`` owns the LlmChat plumbing so that cross-cutting
+behavior (scheduling, backend routing, hedging, context caching) lives in one place rather than in each
+prompt function.  ``mock`` / ``mock_http`` backends (see mock_llm.py) stand in
+for a real provider when testing offline.
+"""
+import os
+import time
+import uuid
+from typing import AsyncIterator
+
+from context_cache import context_cache, context_cache_stats
+from hedging import get_hedger
+from mock_llm import generate_over_http, mock_llm
+from model_router import ModelBackend, model_router
+from model_scheduler import model_scheduler
+from prompt_compression import count_tokens
+from retry_engine import AuthenticationError, UnknownProviderError, classify_provider_exception
+
+
+def model_headroom() -> int:
+    """Model-call slots nobody is using or waiting for"""
+    return model_scheduler.headroom()
+
+
+async def _send_cached(backend: ModelBackend, system_prompt: str, user_text: str, json_mode: bool):
+    """Try the provider's context cache; None means use the normal path"""
+    if backend.provider != "gemini":
+        return None
+    cached = context_cache.lookup(backend.model, backend.api_key, system_prompt)
+    if cached is None:
+        return None
+    try:
+        return await context_cache.generate(cached, backend.api_key, user_text, json_mode=json_mode)
+    except Exception as e:
+        error = classify_provider_exception(e)
+        if not isinstance(error, UnknownProviderError):
+            raise error from e
+        # Most likely the cache expired or was evicted server-side
+        context_cache.invalidate(cached)
+        print(f"⚠️ Cached prompt call failed, falling back to uncached prompt: {e}")
+        return None
+
+
+async def _send_once(backend: ModelBackend, system_prompt: str, user_text: str, session_prefix: str, json_mode: bool = False) -> str:
+    api_key = backend.api_key
+    if not api_key:
+        print(f"❌ API key for {backend.name} not found")
+        raise AuthenticationError(f"{backend.api_key_env} not configured")
+
+    if backend.provider == "mock":
+        return await mock_llm.generate(system_prompt, user_text)
+    if backend.provider == "mock_http":
+        try:
+            return await generate_over_http(backend.model, system_prompt, user_text)
+        except Exception as e:
+            raise classify_provider_exception(e) from e
+
+    cached_response = await _send_cached(backend, system_prompt, user_text, json_mode)
+    if cached_response is not None:
+        return cached_response
+
+    from emergentintegrations.llm.chat import LlmChat, UserMessage
+
+    started = time.monotonic()
+    chat = LlmChat(
+        api_key=api_key,
+        session_id=f"{session_prefix}_{uuid.uuid4()}",
+        system_message=system_prompt
+    ).with_model(backend.provider, backend.model)
+
+    try:
+        response = await chat.send_message(UserMessage(text=user_text))
+    except Exception as e:
+        raise classify_provider_exception(e) from e
+    if backend.provider == "gemini":
+        # LlmChat does not expose usage, so uncached input is estimated locally
+        context_cache_stats.record(
+            cached=False,
+            seconds=time.monotonic() - started,
+            prompt_tokens=count_tokens(system_prompt) + count_tokens(user_text),
+        )
+    return str(response)
+
+
+async def send_model_message(system_prompt: str, user_text: str, session_prefix: str, json_mode: bool = False) -> str:
+    """Send one prompt to the best healthy backend, hedging the call if it runs long.
+
+    ``json_mode`` asks the provider for structured JSON output where the call
+    path supports it (the Gemini SDK path); LlmChat relies on the prompt.
+    """
+    async def call_backend(backend: ModelBackend) -> str:
+        hedger = get_hedger(f"{session_prefix}@{backend.name}")
+        return await hedger.call(
+            lambda: _send_once(backend, system_prompt, user_text, session_prefix, json_mode),
+            label=f"{session_prefix} on {backend.name}"
+        )
+
+    async with model_scheduler.slot():
+        return await model_router.route(call_backend, label=session_prefix)
+
+
+async def stream_model_message(system_prompt: str, user_text: str, session_prefix: str, json_mode: bool = False) -> AsyncIterator[str]:
+    """Yield the response in chunks as it is generated.
+
+    Only the in-process mock streams today; other providers go through
+    ``send_model_message`` (routing, hedging, caching) and yield the whole
+    response as one chunk, so callers can use a single code path.
+    """
+    candidates = model_router.candidates()
+    backend = candidates[0] if candidates else None
+    if backend is None or backend.provider != "mock":
+        yield await send_model_message(system_prompt, user_text, session_prefix, json_mode)
+        return
+    async with model_scheduler.slot():
+        started = time.monotonic()
+        try:
+            async for chunk in mock_llm.stream(system_prompt, user_text):
+                yield chunk
+        except Exception as e:
+            error = classify_provider_exception(e)
+            backend.record_failure(error, model_router.cooldown, model_router.failure_threshold)
+            raise error from e
+        backend.record_success(time.monotonic() - started)
@@ -0,0 +1,171 @@
+"""Latency-aware routing across several configured model backends.
+
+Backends are configured with ``AI_MODEL_BACKENDS`` as a comma-separated list
+of ``provider:model`` pairs, in preference order::
+
+    AI_MODEL_BACKENDS=gemini:gemini-2.0-flash,openai:gpt-4o-mini,anthropic:claude-3-5-haiku-latest
+
+Each backend keeps a rolling latency window, an error-rate average and its
+rate-limit/circuit state.  Requests go to the best healthy backend and fail
+over to the next one on overload, rate limiting or timeouts.
+"""
+import os
+import time
+from typing import Awaitable, Callable, List, Optional, TypeVar
+
+from hedging import LatencyTracker
+from retry_engine import (
+    AuthenticationError,
+    ProviderError,
+    RateLimitError,
+    classify_provider_exception,
+)
+
+T = TypeVar("T")
+
+PROVIDER_KEY_ENV = {
+    "gemini": "GEMINI_API_KEY",
+    "openai": "OPENAI_API_KEY",
+    "anthropic": "ANTHROPIC_API_KEY",
+}
+
+DEFAULT_BACKENDS = "gemini:gemini-2.0-flash"
+
+# Providers that run locally and need no API key (see mock_llm.py)
+KEYLESS_PROVIDERS = {"mock", "mock_http"}
+
+
+class ModelBackend:
+    """One provider/model pair and its live health"""
+
+    def __init__(self, provider: str, model: str, api_key_env: Optional[str] = None):
+        self.provider = provider
+        self.model = model
+        self.api_key_env = api_key_env or PROVIDER_KEY_ENV.get(provider, f"{provider.upper()}_API_KEY")
+        self.latency = LatencyTracker(window=100)
+        self.error_rate = 0.0
+        self.consecutive_failures = 0
+        self.rate_limited_until = 0.0
+        self.circuit_open_until = 0.0
+        self.last_failure_at = 0.0
+        self.requests = 0
+        self.failures = 0
+
+    @property
+    def name(self) -> str:
+        return f"{self.provider}:{self.model}"
+
+    @property
+    def api_key(self) -> Optional[str]:
+        if self.provider in KEYLESS_PROVIDERS:
+            return "mock"
+        return os.environ.get(self.api_key_env)
+
+    def is_healthy(self, now: float) -> bool:
+        return now >= self.rate_limited_until and now >= self.circuit_open_until
+
+    def score(self, now: float, half_life: float) -> float:
+        """Lower is better: typical latency inflated by recent errors.
+
+        The error penalty halves every ``half_life`` seconds without failures
+        so a backend that was skipped after an incident is probed again.
+        """
+        p50 = self.latency.percentile(50)
+        expected = p50 if p50 is not None else 5.0
+        decay = 0.5 ** ((now - self.last_failure_at) / half_life) if half_life > 0 else 0.0
+        return expected * (1.0 + 4.0 * self.error_rate * decay)
+
+    def record_success(self, seconds: float):
+        self.requests += 1
+        self.latency.record(seconds)
+        self.error_rate *= 0.9
+        self.consecutive_failures = 0
+
+    def record_failure(self, error: ProviderError, cooldown: float, failure_threshold: int):
+        now = time.monotonic()
+        self.requests += 1
+        self.failures += 1
+        self.error_rate = self.error_rate * 0.9 + 0.1
+        self.consecutive_failures += 1
+        self.last_failure_at = now
+        if isinstance(error, RateLimitError):
+            self.rate_limited_until = now + (error.retry_after if error.retry_after is not None else cooldown)
+        elif isinstance(error, AuthenticationError):
+            # A bad key will not fix itself between requests
+            self.circuit_open_until = now + cooldown * 10
+        elif self.consecutive_failures >= failure_threshold:
+            self.circuit_open_until = now + cooldown
+
+    def status(self) -> dict:
+        now = time.monotonic()
+        return {
+            "backend": self.name,
+            "healthy": self.is_healthy(now),
+            "latency": self.latency.summary(),
+            "error_rate": round(self.error_rate, 3),
+            "requests": self.requests,
+            "failures": self.failures,
+            "rate_limited_for_seconds": round(max(0.0, self.rate_limited_until - now), 1),
+            "circuit_open_for_seconds": round(max(0.0, self.circuit_open_until - now), 1),
+        }
+
+
+class ModelRouter:
+    def __init__(self, backends: List[ModelBackend], cooldown: float = 30.0, failure_threshold: int = 3):
+        self.backends = backends
+        self.cooldown = cooldown
+        self.failure_threshold = failure_threshold
+
+    @classmethod
+    def from_env(cls) -> "ModelRouter":
+        backends = []
+        for entry in os.environ.get("AI_MODEL_BACKENDS", DEFAULT_BACKENDS).split(","):
+            entry = entry.strip()
+            if not entry:
+                continue
+            provider, _, model = entry.partition(":")
+            backends.append(ModelBackend(provider.strip().lower(), model.strip()))
+        return cls(
+            backends,
+            cooldown=float(os.environ.get("AI_ROUTER_COOLDOWN", "30")),
+            failure_threshold=int(os.environ.get("AI_ROUTER_FAILURE_THRESHOLD", "3")),
+        )
+
+    def candidates(self) -> List[ModelBackend]:
+        """Configured backends, healthy ones first, each group best-scored first"""
+        now = time.monotonic()
+        configured = [b for b in self.backends if b.api_key]
+        healthy = sorted((b for b in configured if b.is_healthy(now)), key=lambda b: b.score(now, self.cooldown))
+        # Unhealthy backends are a last resort, soonest-to-recover first
+        unhealthy = sorted(
+            (b for b in configured if not b.is_healthy(now)),
+            key=lambda b: max(b.rate_limited_until, b.circuit_open_until),
+        )
+        return healthy + unhealthy
+
+    async def route(self, call: Callable[[ModelBackend], Awaitable[T]], label: str = "model call") -> T:
+        candidates = self.candidates()
+        if not candidates:
+            raise AuthenticationError("No model backend has an API key configured")
+
+        last_error: Optional[ProviderError] = None
+        for backend in candidates:
+            started = time.monotonic()
+            try:
+                result = await call(backend)
+            except Exception as e:
+                error = classify_provider_exception(e)
+                backend.record_failure(error, self.cooldown, self.failure_threshold)
+                last_error = error
+                print(f"🔀 {label} failed on {backend.name} ({error.error_type}), trying next backend")
+                continue
+            backend.record_success(time.monotonic() - started)
+            return result
+
+        raise last_error
+
+    def status(self) -> List[dict]:
+        return [b.status() for b in self.backends]
+
+
+model_router = ModelRouter.from_env()
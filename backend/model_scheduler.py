@@ -0,0 +1,211 @@
+"""Priority-aware scheduling of model calls.
+
+Interactive requests, batch runs and speculative prefetches share one quota
+(``AI_MAX_CONCURRENT_CALLS`` calls in flight).  A plain semaphore serves them
+first come, first served, so a 50-posting batch queued ahead of a user at the
+UI makes that user wait for all of it.  Every model call instead takes a slot
+from ``model_scheduler``, tagged with a class:
+
+* ``interactive`` - someone is waiting on the response (the default)
+* ``batch`` - ``/api/analyze/batch``, bulk runs and ``/api/jobs`` work
+* ``speculative`` - prefetches nobody has asked for yet
+
+Free slots go to waiting calls by weighted fair queueing across classes
+(``AI_SCHEDULER_WEIGHTS``, default ``interactive:8,batch:2,speculative:1``),
+so batch work keeps moving while interactive calls get most of the
+capacity.  When the oldest interactive call is expected to wait longer than
+``AI_INTERACTIVE_SLO_SECONDS``, interactive calls get every free slot until
+the backlog clears, and queued speculative calls are preempted: they fail with
+``PreemptedError`` without reaching the provider.  Calls already running are
+never interrupted.
+
+The class comes from the ``call_class`` context variable, which the job queue
+sets from the job priority and the batch endpoint sets for its tasks.
+Per-class queue depth, in-flight calls and wait times are reported under
+``model_scheduler`` in ``/api/metrics``.
+"""
+import asyncio
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Deque, Dict, Optional
+
+from retry_engine import PreemptedError
+
+INTERACTIVE = "interactive"
+BATCH = "batch"
+SPECULATIVE = "speculative"
+CALL_CLASSES = (INTERACTIVE, BATCH, SPECULATIVE)
+
+# Class of the model calls made by the current task
+call_class: ContextVar[str] = ContextVar("model_call_class", default=INTERACTIVE)
+
+
+def parse_weights(spec: str) -> Dict[str, float]:
+    """``"interactive:8,batch:2"`` -> weights for every class (missing ones get 1)"""
+    weights = {name: 1.0 for name in CALL_CLASSES}
+    for part in spec.split(","):
+        name, _, value = part.partition(":")
+        name = name.strip().lower()
+        if name in weights and value.strip():
+            weights[name] = max(float(value), 0.01)
+    return weights
+
+
+@dataclass
+class _Waiter:
+    call_class: str
+    start_tag: float
+    finish_tag: float
+    enqueued_at: float
+    future: asyncio.Future
+
+
+class _ClassStats:
+    def __init__(self):
+        self.in_flight = 0
+        self.served = 0
+        self.preempted = 0
+        self.waits: Deque[float] = deque(maxlen=1000)  # seconds, most recent calls
+
+    def as_dict(self, depth: int, weight: float) -> dict:
+        waits = sorted(self.waits)
+        return {
+            "weight": weight,
+            "queue_depth": depth,
+            "in_flight": self.in_flight,
+            "served": self.served,
+            "preempted": self.preempted,
+            "wait_ms": {
+                "mean": round(1000 * sum(waits) / len(waits), 1) if waits else 0.0,
+                "p95": round(1000 * waits[int(0.95 * (len(waits) - 1))], 1) if waits else 0.0,
+                "max": round(1000 * waits[-1], 1) if waits else 0.0,
+            },
+        }
+
+
+class ModelScheduler:
+    def __init__(self, capacity: int, weights: Dict[str, float], interactive_slo: float):
+        self.capacity = max(capacity, 1)
+        self.weights = weights
+        self.interactive_slo = interactive_slo
+        self._queues: Dict[str, Deque[_Waiter]] = {name: deque() for name in CALL_CLASSES}
+        self._last_finish = {name: 0.0 for name in CALL_CLASSES}
+        self._virtual_time = 0.0
+        self._in_flight = 0
+        self._service_seconds: Optional[float] = None  # moving average of call duration
+        self._stats = {name: _ClassStats() for name in CALL_CLASSES}
+        self.slo_escalations = 0
+
+    def waiting(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+
+    def headroom(self) -> int:
+        """Slots nobody is using or waiting for"""
+        return max(self.capacity - self._in_flight - self.waiting(), 0)
+
+    def _slo_at_risk(self, now: float) -> bool:
+        queue = self._queues[INTERACTIVE]
+        if not queue:
+            return False
+        # Time the oldest call has waited plus a rough estimate of the rest of the backlog
+        backlog = (self._service_seconds or 0.0) * len(queue) / self.capacity
+        return now - queue[0].enqueued_at + backlog > self.interactive_slo
+
+    def _preempt_speculative(self):
+        queue = self._queues[SPECULATIVE]
+        while queue:
+            waiter = queue.popleft()
+            if not waiter.future.done():
+                waiter.future.set_exception(PreemptedError())
+                self._stats[SPECULATIVE].preempted += 1
+
+    def _next_waiter(self, now: float) -> Optional[_Waiter]:
+        if self._slo_at_risk(now):
+            self.slo_escalations += 1
+            self._preempt_speculative()
+            return self._queues[INTERACTIVE].popleft()
+        heads = [queue[0] for queue in self._queues.values() if queue]
+        if not heads:
+            return None
+        waiter = min(heads, key=lambda w: (w.finish_tag, w.enqueued_at))
+        self._queues[waiter.call_class].popleft()
+        return waiter
+
+    def _grant(self, name: str, waited: float):
+        self._in_flight += 1
+        stats = self._stats[name]
+        stats.in_flight += 1
+        stats.served += 1
+        stats.waits.append(waited)
+
+    def _dispatch(self):
+        now = time.monotonic()
+        while self._in_flight < self.capacity:
+            waiter = self._next_waiter(now)
+            if waiter is None:
+                return
+            if waiter.future.done():
+                continue  # cancelled while queued
+            self._virtual_time = max(self._virtual_time, waiter.start_tag)
+            self._grant(waiter.call_class, now - waiter.enqueued_at)
+            waiter.future.set_result(None)
+
+    def _release(self, name: str, seconds: Optional[float]):
+        self._in_flight -= 1
+        self._stats[name].in_flight -= 1
+        if seconds is not None:
+            self._service_seconds = seconds if self._service_seconds is None else 0.8 * self._service_seconds + 0.2 * seconds
+        self._dispatch()
+
+    async def _acquire(self, name: str):
+        if self._in_flight < self.capacity and not self.waiting():
+            self._grant(name, 0.0)
+            return
+        start = max(self._virtual_time, self._last_finish[name])
+        self._last_finish[name] = start + 1.0 / self.weights[name]
+        waiter = _Waiter(name, start, self._last_finish[name], time.monotonic(),
+                         asyncio.get_running_loop().create_future())
+        self._queues[name].append(waiter)
+        self._dispatch()
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled() and waiter.future.exception() is None:
+                # The slot was granted just as the caller went away
+                self._release(name, None)
+            elif waiter in self._queues[name]:
+                self._queues[name].remove(waiter)
+            raise
+
+    @asynccontextmanager
+    async def slot(self, name: Optional[str] = None):
+        """Hold one model-call slot for the duration of the block"""
+        name = name or call_class.get()
+        await self._acquire(name)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._release(name, time.monotonic() - started)
+
+    def stats(self) -> dict:
+        return {
+            "capacity": self.capacity,
+            "in_flight": self._in_flight,
+            "interactive_slo_seconds": self.interactive_slo,
+            "mean_call_seconds": round(self._service_seconds or 0.0, 3),
+            "slo_escalations": self.slo_escalations,
+            "classes": {name: self._stats[name].as_dict(len(self._queues[name]), self.weights[name])
+                        for name in CALL_CLASSES},
+        }
+
+
+model_scheduler = ModelScheduler(
+    capacity=int(os.environ.get("AI_MAX_CONCURRENT_CALLS", "8")),
+    weights=parse_weights(os.environ.get("AI_SCHEDULER_WEIGHTS", "interactive:8,batch:2,speculative:1")),
+    interactive_slo=float(os.environ.get("AI_INTERACTIVE_SLO_SECONDS", "2")),
+)
@@ -0,0 +1,281 @@
+"""Near-duplicate job description detection.
+
+The same posting keeps coming back with trivial differences: reposted with a
+new date or requisition number, pasted with different whitespace, scraped
+from a URL with tracking parameters, or with a changed EEO/benefits footer.
+Exact content hashes miss all of these, so caches keyed on them would too.
+
+Each job description is fingerprinted with a 64-bit SimHash over word
+3-shingles of its normalized text, with boilerplate sections (benefits, EEO,
+"about us", application instructions), URLs, dates and requisition numbers
+left out.  Fingerprints are indexed by bands: with a threshold of ``k``
+differing bits the 64 bits are split into ``k + 1`` bands, and any posting
+within ``k`` bits must agree with the query on at least one whole band, so a
+lookup only compares a few candidates.  A candidate only counts as the same
+posting when its title line matches and the Jaccard similarity of the two
+shingle sets reaches ``JD_DEDUPE_MIN_JACCARD``; SimHash alone happily pairs
+"Senior" and "Junior" versions of one template.
+
+``job_key(text)`` returns the cache key for a job description: the content
+hash of the first equivalent posting seen, or the text's own hash when it is
+new.  The digest cache keys on it and reports reuse through
+``record_reuse``; ``canonical_url`` does the same for the scrape cache.
+Analyses are only reused for identical text, since a changed requirement
+line in a near-duplicate must still be analyzed.
+"""
+import hashlib
+import os
+import re
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import numpy as np
+
+from analysis_store import content_hash
+from prompt_compression import DROP, JD_SECTION_RULES, segment
+from text_tokens import tokenize
+from ttl_cache import TTLCache
+
+FINGERPRINT_BITS = 64
+
+_URL = re.compile(r"https?://\S+|www\.\S+", re.IGNORECASE)
+_TRACKING_PARAMS = re.compile(
+    r"^(utm_\w+|gclid|fbclid|msclkid|mc_cid|mc_eid|ref|refid|referrer|source|src|trk|trackingid|"
+    r"_hs\w+|campaign|cmp|ccuid|jobsource|lever-source|gh_src|igshid)$",
+    re.IGNORECASE,
+)
+
+
+def canonical_url(url: str) -> str:
+    """``url`` without fragment, tracking parameters or cosmetic differences"""
+    parts = urlsplit(url.strip())
+    query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+                   if not _TRACKING_PARAMS.match(k))
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, urlencode(query), ""))
+
+
+def _keep(token: str) -> bool:
+    # Dates, requisition numbers and salary figures change between reposts;
+    # short numbers ("5+ years") are requirements and stay
+    return any(c.isalpha() for c in token) or len(token) < 4
+
+
+def _line_tokens(line: str) -> List[str]:
+    return [token for token, _ in tokenize(_URL.sub(" ", line)) if _keep(token)]
+
+
+def posting_tokens(text: str) -> List[str]:
+    """Normalized content tokens of a posting, boilerplate sections and URLs left out"""
+    tokens: List[str] = []
+    for section in segment(text, JD_SECTION_RULES):
+        if section.priority == DROP:
+            continue
+        for line in [section.heading] + section.lines if section.heading else section.lines:
+            tokens.extend(_line_tokens(line))
+    return tokens
+
+
+def posting_title(text: str) -> str:
+    """Normalized first line, which reposts keep and sibling postings change"""
+    for line in text.splitlines():
+        tokens = _line_tokens(line)
+        if tokens:
+            return " ".join(tokens)
+    return ""
+
+
+def _feature_hash(feature: str) -> int:
+    return int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def shingle_hashes(tokens: List[str], shingle: int = 3) -> Dict[int, int]:
+    """Hashed word shingles -> occurrence count"""
+    features: Dict[int, int] = {}
+    for start in range(max(len(tokens) - shingle + 1, 1 if tokens else 0)):
+        hashed = _feature_hash(" ".join(tokens[start:start + shingle]))
+        features[hashed] = features.get(hashed, 0) + 1
+    return features
+
+
+_BITS = np.arange(FINGERPRINT_BITS, dtype=np.uint64)
+
+
+def simhash(features: Dict[int, int]) -> int:
+    """64-bit SimHash of weighted feature hashes"""
+    if not features:
+        return 0
+    hashes = np.fromiter(features.keys(), dtype=np.uint64, count=len(features))
+    counts = np.fromiter(features.values(), dtype=np.int64, count=len(features))
+    bits = ((hashes[:, None] >> _BITS) & np.uint64(1)).astype(np.int64)
+    weights = counts @ (2 * bits - 1)
+    return int(sum(1 << bit for bit in np.flatnonzero(weights > 0)))
+
+
+def jaccard(a: np.ndarray, b: np.ndarray) -> float:
+    """Jaccard similarity of two sorted, unique hash arrays"""
+    shared = len(np.intersect1d(a, b, assume_unique=True))
+    union = len(a) + len(b) - shared
+    return shared / union if union else 1.0
+
+
+@dataclass
+class _Entry:
+    fingerprint: int
+    title: str
+    shingles: np.ndarray  # sorted unique shingle hashes
+
+
+class SimHashIndex:
+    """Entries whose fingerprints are within ``threshold`` bits, found via ``threshold + 1`` exact-match bands"""
+
+    def __init__(self, threshold: int, max_items: int):
+        self.threshold = threshold
+        self.max_items = max_items
+        bands = threshold + 1
+        width = FINGERPRINT_BITS // bands
+        self._bands = [(i * width, FINGERPRINT_BITS if i == bands - 1 else (i + 1) * width) for i in range(bands)]
+        self._tables: List[Dict[int, Set[str]]] = [{} for _ in self._bands]
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _band_values(self, fingerprint: int):
+        for table, (start, end) in zip(self._tables, self._bands):
+            yield table, (fingerprint >> start) & ((1 << (end - start)) - 1)
+
+    def add(self, key: str, entry: _Entry):
+        self._entries[key] = entry
+        for table, value in self._band_values(entry.fingerprint):
+            table.setdefault(value, set()).add(key)
+        while len(self._entries) > self.max_items:
+            self._remove(*self._entries.popitem(last=False))
+
+    def _remove(self, key: str, entry: _Entry):
+        for table, value in self._band_values(entry.fingerprint):
+            bucket = table.get(value)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del table[value]
+
+    def candidates(self, fingerprint: int) -> List[Tuple[str, int, _Entry]]:
+        """(key, Hamming distance, entry) within the threshold, closest first"""
+        found = {}
+        for table, value in self._band_values(fingerprint):
+            for key in table.get(value, ()):
+                if key not in found:
+                    entry = self._entries[key]
+                    distance = bin(entry.fingerprint ^ fingerprint).count("1")
+                    if distance <= self.threshold:
+                        found[key] = (key, distance, entry)
+        return sorted(found.values(), key=lambda c: c[1])
+
+
+@dataclass
+class JobKey:
+    key: str            # content hash of the representative posting
+    content_hash: str   # content hash of this text
+    distance: int       # 0 for identical normalized text
+
+    @property
+    def reused(self) -> bool:
+        return self.key != self.content_hash
+
+
+class NearDuplicateDetector:
+    def __init__(self, enabled: bool, threshold: int, min_jaccard: float, min_shingles: int,
+                 max_items: int, ttl_seconds: float):
+        self.enabled = enabled
+        self.min_jaccard = min_jaccard
+        self.min_shingles = min_shingles
+        self._index = SimHashIndex(threshold, max_items)
+        # content hash / normalized hash -> representative key
+        self._aliases: TTLCache[str] = TTLCache(max_items=max_items * 4, ttl_seconds=ttl_seconds)
+        self.lookups = 0
+        self.new_postings = 0
+        self.exact_matches = 0
+        self.near_matches = 0
+        self.rejected_candidates = 0
+        self.near_distance_total = 0
+        self.reuse: Dict[str, Dict[str, int]] = {}
+
+    def _nearest(self, entry: _Entry) -> Optional[Tuple[str, int]]:
+        for key, distance, candidate in self._index.candidates(entry.fingerprint):
+            if candidate.title == entry.title and jaccard(candidate.shingles, entry.shingles) >= self.min_jaccard:
+                return key, distance
+            self.rejected_candidates += 1
+        return None
+
+    def job_key(self, text: str) -> JobKey:
+        """Cache key for a job description, shared by its near-duplicates"""
+        digest = content_hash(text)
+        if not self.enabled:
+            return JobKey(digest, digest, 0)
+        self.lookups += 1
+        known = self._aliases.get(digest)
+        if known is not None:
+            return JobKey(known, digest, 0)
+
+        tokens = posting_tokens(text)
+        normalized = "n:" + content_hash(" ".join(tokens))
+        representative = self._aliases.get(normalized)
+        distance = 0
+        if representative is None:
+            features = shingle_hashes(tokens)
+            entry = _Entry(simhash(features), posting_title(text),
+                           np.unique(np.fromiter(features.keys(), dtype=np.uint64, count=len(features))))
+            # Short texts have too few shingles for a meaningful fingerprint
+            indexable = len(features) >= self.min_shingles
+            match = self._nearest(entry) if indexable else None
+            if match is None:
+                representative = digest
+                self.new_postings += 1
+                if indexable:
+                    self._index.add(digest, entry)
+            else:
+                representative, distance = match
+                self.near_matches += 1
+                self.near_distance_total += distance
+                print(f"♻️ Job description {digest[:12]} is a near-duplicate of {representative[:12]} (distance {distance})")
+            self._aliases.set(normalized, representative)
+        elif representative != digest:
+            self.exact_matches += 1
+        self._aliases.set(digest, representative)
+        return JobKey(representative, digest, distance)
+
+    def record_reuse(self, cache: str, original: str, duplicate: str, distance: int = 0):
+        """Count a cache hit that was only possible because of deduplication"""
+        if original == duplicate:
+            return
+        counts = self.reuse.setdefault(cache, {"hits": 0, "max_distance": 0})
+        counts["hits"] += 1
+        counts["max_distance"] = max(counts["max_distance"], distance)
+        print(f"♻️ Reusing {cache} of {original[:80]} for {duplicate[:80]}")
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "threshold_bits": self._index.threshold,
+            "indexed": len(self._index),
+            "lookups": self.lookups,
+            "new_postings": self.new_postings,
+            "normalized_matches": self.exact_matches,
+            "near_matches": self.near_matches,
+            "rejected_candidates": self.rejected_candidates,
+            "mean_near_distance": round(self.near_distance_total / self.near_matches, 2) if self.near_matches else 0.0,
+            "reuse": self.reuse,
+        }
+
+
+near_duplicates = NearDuplicateDetector(
+    enabled=os.environ.get("JD_DEDUPE_ENABLED", "true").lower() == "true",
+    threshold=int(os.environ.get("JD_DEDUPE_MAX_DISTANCE", "6")),
+    min_jaccard=float(os.environ.get("JD_DEDUPE_MIN_JACCARD", "0.9")),
+    min_shingles=int(os.environ.get("JD_DEDUPE_MIN_SHINGLES", "20")),
+    max_items=int(os.environ.get("JD_DEDUPE_MAX_ITEMS", "10000")),
+    ttl_seconds=float(os.environ.get("JD_DEDUPE_TTL", "86400")),
+)
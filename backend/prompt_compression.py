@@ -0,0 +1,227 @@
+"""Local prompt compression for job descriptions and resumes.
+
+Text is segmented into sections by heading, each section is classified by how
+useful it is to the model (requirements > role summary > company blurb >
+benefits/EEO boilerplate), and a token budget is spent in that order.  Lines
+are never rewritten, only kept or dropped, so anything the model quotes back
+from the resume still matches the original text.
+"""
+import os
+import re
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+try:
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding("cl100k_base")
+except Exception:  # tiktoken is optional; fall back to a word-piece estimate
+    _ENCODING = None
+
+_WORD_PIECE = re.compile(r"\w+|[^\w\s]")
+
+
+def count_tokens(text: str) -> int:
+    """Count tokens locally (tiktoken when installed, otherwise an estimate)"""
+    if not text:
+        return 0
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text))
+    # Long words split into several BPE pieces; ~4 characters per piece
+    return sum(max(1, len(piece) // 4) for piece in _WORD_PIECE.findall(text))
+
+
+# Section priorities: lower number is spent first, DROP is never sent
+CRITICAL, HIGH, MEDIUM, LOW, DROP = 0, 1, 2, 3, 4
+
+JD_SECTION_RULES: List[Tuple[re.Pattern, int]] = [
+    (re.compile(r"requirement|qualification|must have|what you('ll)? (need|bring)|skills|experience|who you are|you have", re.I), CRITICAL),
+    (re.compile(r"responsibilit|what you('ll)? do|duties|the role|role overview|day to day|your impact|key tasks", re.I), HIGH),
+    (re.compile(r"nice to have|preferred|bonus|plus", re.I), HIGH),
+    (re.compile(r"about (the )?(job|position|opportunity)|summary|overview|description", re.I), MEDIUM),
+    (re.compile(r"about (us|the company|the team)|who we are|our (mission|story|values|culture)|company", re.I), LOW),
+    (re.compile(r"benefit|perks|what we offer|compensation|salary|pay range|why join|life at", re.I), DROP),
+    (re.compile(r"equal (employment )?opportunity|eeo|accommodation|privacy|e-verify|disclaimer|diversity", re.I), DROP),
+    (re.compile(r"how to apply|apply now|application process", re.I), DROP),
+]
+
+RESUME_SECTION_RULES: List[Tuple[re.Pattern, int]] = [
+    (re.compile(r"experience|employment|work history|professional history", re.I), CRITICAL),
+    (re.compile(r"summary|profile|objective|skills|competenc|technolog", re.I), CRITICAL),
+    (re.compile(r"achievement|accomplishment|project|certific|education|training", re.I), HIGH),
+    (re.compile(r"publication|award|volunteer|leadership|affiliation|language", re.I), MEDIUM),
+    (re.compile(r"interest|hobbies|personal|references", re.I), LOW),
+]
+
+# Boilerplate lines dropped wherever they appear in a job description.  Only
+# whole banner/EEO phrases count: a single word such as "cookie" or "privacy"
+# also turns up in real requirements
+JD_BOILERPLATE = re.compile(
+    r"equal (employment )?opportunity employer|without regard to (race|color|sex|religion)|"
+    r"(request|need|require)s? (a |an )?reasonable accommodation|participates? in e-verify|"
+    r"protected veteran status|"
+    r"(sexual orientation|gender identity|national origin)\W+(\w+\W+){0,3}(sexual orientation|gender identity|national origin)|"
+    r"^(click )?apply( now| today)?[.!]?$|click apply|^share this job|"
+    r"(we|this (web)?site) uses? cookies|accept (all )?cookies|cookie (policy|settings|preferences)|"
+    r"(read|see|view|review) our privacy policy|^privacy policy$|all rights reserved|"
+    r"^(save|share|report)( job)?$",
+    re.I,
+)
+
+_HEADING = re.compile(r"^\s*(#+\s*)?[A-Za-z][A-Za-z0-9 &/'’,\-()]{1,60}:?\s*$")
+
+
+@dataclass
+class Section:
+    heading: str
+    priority: int
+    lines: List[str] = field(default_factory=list)
+
+    @property
+    def tokens(self) -> int:
+        return count_tokens("\n".join(([self.heading] if self.heading else []) + self.lines))
+
+
+def looks_like_heading(line: str) -> bool:
+    """Short title-like line: ends with a colon, all caps, title case or a markdown heading"""
+    stripped = line.strip()
+    if not _HEADING.match(stripped) or len(stripped.split()) > 8:
+        return False
+    return stripped.endswith(":") or stripped.isupper() or stripped.startswith("#") or stripped.istitle()
+
+
+def _classify(heading: str, rules, default: int) -> int:
+    for pattern, priority in rules:
+        if pattern.search(heading):
+            return priority
+    return default
+
+
+def segment(text: str, rules, default_priority: int = MEDIUM) -> List[Section]:
+    """Split text into sections at heading-like lines and classify each"""
+    sections = [Section(heading="", priority=default_priority)]
+    for raw in text.splitlines():
+        line = raw.rstrip()
+        if not line.strip():
+            continue
+        if looks_like_heading(line):
+            priority = _classify(line, rules, None)
+            if priority is not None:
+                sections.append(Section(heading=line, priority=priority))
+                continue
+        sections[-1].lines.append(line)
+    return [s for s in sections if s.lines or s.heading]
+
+
+def _fit_lines(lines: List[str], budget: int) -> List[str]:
+    kept, used = [], 0
+    for line in lines:
+        cost = count_tokens(line)
+        if used + cost > budget:
+            break
+        kept.append(line)
+        used += cost
+    return kept
+
+
+def _apply_budget(sections: List[Section], budget: int) -> List[Section]:
+    """Spend the budget on sections in priority order, keeping document order"""
+    remaining = budget
+    kept = {}
+    for priority in (CRITICAL, HIGH, MEDIUM, LOW):
+        for index, section in enumerate(sections):
+            if section.priority != priority or remaining <= 0:
+                continue
+            cost = section.tokens
+            if cost <= remaining:
+                kept[index] = section
+                remaining -= cost
+            else:
+                heading_cost = count_tokens(section.heading)
+                lines = _fit_lines(section.lines, remaining - heading_cost)
+                if lines:
+                    kept[index] = Section(section.heading, section.priority, lines)
+                    remaining -= heading_cost + sum(count_tokens(l) for l in lines)
+    return [kept[i] for i in sorted(kept)]
+
+
+def _render(sections: List[Section]) -> str:
+    parts = []
+    for section in sections:
+        parts.append("\n".join(([section.heading] if section.heading else []) + section.lines))
+    return "\n\n".join(p for p in parts if p)
+
+
+@dataclass
+class CompressionResult:
+    text: str
+    original_tokens: int
+    compressed_tokens: int
+    dropped_sections: List[str]
+
+
+def compress_job_description(text: str, token_budget: int) -> CompressionResult:
+    """Drop boilerplate and low-value sections, then fit the JD into the budget"""
+    original_tokens = count_tokens(text)
+    sections = segment(text, JD_SECTION_RULES)
+    dropped = [s.heading for s in sections if s.priority == DROP]
+    sections = [s for s in sections if s.priority != DROP]
+    for section in sections:
+        section.lines = [l for l in section.lines if not JD_BOILERPLATE.search(l.strip())]
+    sections = [s for s in sections if s.lines]
+    compressed = _render(_apply_budget(sections, token_budget))
+    return CompressionResult(compressed, original_tokens, count_tokens(compressed), dropped)
+
+
+def compress_resume(text: str, token_budget: int) -> CompressionResult:
+    """Resumes are only trimmed when over budget, lowest-value sections first"""
+    original_tokens = count_tokens(text)
+    if original_tokens <= token_budget:
+        return CompressionResult(text, original_tokens, original_tokens, [])
+    sections = segment(text, RESUME_SECTION_RULES, default_priority=CRITICAL)
+    kept = _apply_budget(sections, token_budget)
+    dropped = [s.heading for s in sections if s.heading and s.heading not in {k.heading for k in kept}]
+    compressed = _render(kept)
+    return CompressionResult(compressed, original_tokens, count_tokens(compressed), dropped)
+
+
+class CompressionStats:
+    def __init__(self):
+        self.requests = 0
+        self.original_tokens = 0
+        self.compressed_tokens = 0
+
+    def record(self, *results: CompressionResult):
+        self.requests += 1
+        for result in results:
+            self.original_tokens += result.original_tokens
+            self.compressed_tokens += result.compressed_tokens
+
+    def as_dict(self) -> dict:
+        saved = self.original_tokens - self.compressed_tokens
+        return {
+            "requests": self.requests,
+            "original_tokens": self.original_tokens,
+            "compressed_tokens": self.compressed_tokens,
+            "saved_ratio": round(saved / self.original_tokens, 3) if self.original_tokens else 0.0,
+        }
+
+
+compression_stats = CompressionStats()
+
+
+def compress_prompt_inputs(job_description: str, resume_text: str,
+                           jd_budget: Optional[int] = None, resume_budget: Optional[int] = None) -> Tuple[str, str]:
+    """Compress both model inputs according to the AI_* budget settings"""
+    if os.environ.get("AI_PROMPT_COMPRESSION", "true").lower() != "true":
+        return job_description, resume_text
+    jd_budget = jd_budget or int(os.environ.get("AI_JD_TOKEN_BUDGET", "1500"))
+    resume_budget = resume_budget or int(os.environ.get("AI_RESUME_TOKEN_BUDGET", "4000"))
+
+    jd = compress_job_description(job_description, jd_budget)
+    resume = compress_resume(resume_text, resume_budget)
+    # Never send an empty prompt because the segmenter misread an unusual layout
+    jd_text = jd.text if jd.text.strip() else job_description
+    compression_stats.record(jd, resume)
+    print(f"🗜️ Prompt compression - JD: {jd.original_tokens}→{jd.compressed_tokens} tokens, "
+          f"Resume: {resume.original_tokens}→{resume.compressed_tokens} tokens")
+    return jd_text, resume.text
@@ -0,0 +1,231 @@
+"""Two-stage prompting: digest the inputs once, reuse the digests everywhere.
+
+A first, small model call turns a job description into a compact requirements
+summary (``JobDigest``) and a resume into a compact candidate profile
+(``ResumeDigest``).  Digests are cached by content hash, so when one posting
+is analyzed against many resumes (or one resume against many postings) the
+long text is read by the model once and every later prompt carries only the
+digest.  Job descriptions are keyed by ``near_duplicates.job_key``, so a
+reposted or re-pasted posting reuses the original's digest.
+
+* The analysis prompt uses the JD digest but keeps the resume text itself,
+  because suggestions must quote ``current_text`` verbatim from the resume.
+* The cover letter prompt uses the resume digest but keeps the (compressed)
+  job description, because the letter has to name the company, which the
+  requirements digest leaves out.
+
+Enabled with ``AI_PROMPT_DIGESTS=true``.  A failed or empty digest is never
+fatal: the caller falls back to the full text.
+"""
+import asyncio
+import os
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from analysis_store import content_hash
+from model_client import send_model_message
+from near_duplicates import near_duplicates
+from prompt_compression import count_tokens
+from response_schemas import JobDigest, ResumeDigest, parse_job_digest, parse_resume_digest
+from ttl_cache import TTLCache
+
+# Bump when the digest prompts change so stale digests are not reused
+DIGEST_VERSION = 1
+
+JOB_DIGEST_SYSTEM_PROMPT = """You condense job postings into a compact requirements summary for a resume optimization assistant.
+
+Return only this JSON structure:
+
+```json
+{
+  "role_title": "job title as written in the posting",
+  "seniority": "intern|junior|mid|senior|staff|principal|manager|director|executive",
+  "must_have": ["required skills, tools, credentials and years of experience, as short phrases"],
+  "nice_to_have": ["preferred or bonus qualifications"],
+  "responsibilities": ["the 3-8 main duties, one short phrase each"],
+  "keywords": ["terms an ATS would match on, most important first"]
+}
+```
+
+Use the posting's own wording for skills and keywords. Leave out benefits, company marketing, legal and application boilerplate. Do not invent requirements."""
+
+RESUME_DIGEST_SYSTEM_PROMPT = """You condense resumes into a compact candidate profile for a cover letter writer.
+
+Return only this JSON structure:
+
+```json
+{
+  "headline": "one-line summary of the candidate's profile",
+  "skills": ["skills, tools and technologies the resume mentions"],
+  "roles": [
+    {"title": "job title", "company": "employer", "dates": "as written", "highlights": ["key achievements with their original numbers"]}
+  ],
+  "education": ["degree, institution"],
+  "certifications": ["certification names"]
+}
+```
+
+Keep every fact, figure and name exactly as written in the resume. Never add anything that is not in the resume."""
+
+
+class DigestStats:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.failures = 0
+        self.source_tokens = 0
+        self.digest_tokens = 0
+        self.skipped = 0
+
+    def record_use(self, source_tokens: int, digest_tokens: int):
+        self.source_tokens += source_tokens
+        self.digest_tokens += digest_tokens
+
+    def as_dict(self) -> dict:
+        lookups = self.hits + self.misses
+        saved = self.source_tokens - self.digest_tokens
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "failures": self.failures,
+            "skipped_not_smaller": self.skipped,
+            "source_tokens": self.source_tokens,
+            "digest_tokens": self.digest_tokens,
+            "saved_ratio": round(saved / self.source_tokens, 3) if self.source_tokens else 0.0,
+        }
+
+
+digest_stats = DigestStats()
+
+_digests: TTLCache[str] = TTLCache(
+    max_items=int(os.environ.get("AI_DIGEST_CACHE_MAX_ITEMS", "2000")),
+    ttl_seconds=float(os.environ.get("AI_DIGEST_CACHE_TTL", "86400")),
+)
+# Concurrent requests for the same text share one digest call
+_inflight: Dict[Tuple[str, str], asyncio.Future] = {}
+
+
+def digests_enabled() -> bool:
+    return os.environ.get("AI_PROMPT_DIGESTS", "false").lower() == "true"
+
+
+def render_job_digest(digest: JobDigest) -> str:
+    """Plain-text rendering; cheaper in tokens than the JSON form"""
+    lines = ["(Requirements digest of the original posting)"]
+    if digest.role_title:
+        lines.append(f"Role: {digest.role_title}" + (f" ({digest.seniority})" if digest.seniority else ""))
+    if digest.must_have:
+        lines.append("Must have: " + "; ".join(digest.must_have))
+    if digest.nice_to_have:
+        lines.append("Nice to have: " + "; ".join(digest.nice_to_have))
+    if digest.responsibilities:
+        lines.append("Responsibilities:")
+        lines.extend(f"- {item}" for item in digest.responsibilities)
+    if digest.keywords:
+        lines.append("Keywords: " + ", ".join(digest.keywords))
+    return "\n".join(lines)
+
+
+def render_resume_digest(digest: ResumeDigest) -> str:
+    lines = ["(Profile digest of the candidate's resume)"]
+    if digest.headline:
+        lines.append(digest.headline)
+    if digest.skills:
+        lines.append("Skills: " + ", ".join(digest.skills))
+    for role in digest.roles:
+        heading = " - ".join(part for part in (role.title, role.company, role.dates) if part)
+        lines.append(f"{heading}:")
+        lines.extend(f"- {item}" for item in role.highlights)
+    if digest.education:
+        lines.append("Education: " + "; ".join(digest.education))
+    if digest.certifications:
+        lines.append("Certifications: " + "; ".join(digest.certifications))
+    return "\n".join(lines)
+
+
+def _prefer_digest(source: str, digest: Optional[str]) -> str:
+    """Use the digest only when it actually shrinks the prompt"""
+    if digest is None:
+        return source
+    source_tokens, digest_tokens = count_tokens(source), count_tokens(digest)
+    if digest_tokens >= source_tokens:
+        digest_stats.skipped += 1
+        return source
+    digest_stats.record_use(source_tokens, digest_tokens)
+    return digest
+
+
+def _is_empty(digest) -> bool:
+    return not any(value for value in digest.model_dump().values())
+
+
+async def _build_digest(kind: str, text: str, build: Callable[[str], Awaitable[str]],
+                        text_key: Optional[str] = None, on_reuse: Optional[Callable[[], None]] = None) -> Optional[str]:
+    key = (kind, f"{text_key or content_hash(text)}:v{DIGEST_VERSION}")
+    cached = _digests.get(key)
+    if cached is not None:
+        digest_stats.hits += 1
+        if on_reuse:
+            on_reuse()
+        return cached
+    if key in _inflight:
+        digest_stats.hits += 1
+        if on_reuse:
+            on_reuse()
+        return await asyncio.shield(_inflight[key])
+
+    digest_stats.misses += 1
+    future = asyncio.get_running_loop().create_future()
+    _inflight[key] = future
+    try:
+        rendered = await build(text)
+        _digests.set(key, rendered)
+        future.set_result(rendered)
+        return rendered
+    except Exception as e:
+        digest_stats.failures += 1
+        print(f"⚠️ Could not build {kind} digest, using the full text: {e}")
+        future.set_result(None)
+        return None
+    finally:
+        if not future.done():
+            future.set_result(None)  # cancelled: waiters fall back to the full text
+        _inflight.pop(key, None)
+
+
+async def _digest_job_description(text: str) -> str:
+    response = await send_model_message(JOB_DIGEST_SYSTEM_PROMPT, f"JOB POSTING:\n{text}", "jd_digest", json_mode=True)
+    digest = parse_job_digest(response)
+    if _is_empty(digest):
+        raise ValueError("model returned an empty job digest")
+    return render_job_digest(digest)
+
+
+async def _digest_resume(text: str) -> str:
+    response = await send_model_message(RESUME_DIGEST_SYSTEM_PROMPT, f"RESUME:\n{text}", "resume_digest", json_mode=True)
+    digest = parse_resume_digest(response)
+    if _is_empty(digest):
+        raise ValueError("model returned an empty resume digest")
+    return render_resume_digest(digest)
+
+
+async def job_description_for_prompt(job_description: str) -> str:
+    """The JD digest when digests are enabled and available, else the JD itself"""
+    if not digests_enabled() or not job_description.strip():
+        return job_description
+    job_key = near_duplicates.job_key(job_description)
+    digest = await _build_digest("job_description", job_description, _digest_job_description, job_key.key,
+                                 lambda: near_duplicates.record_reuse("digest", job_key.key, job_key.content_hash, job_key.distance))
+    return _prefer_digest(job_description, digest)
+
+
+async def resume_for_prompt(resume_text: str) -> str:
+    """The resume profile digest when digests are enabled and available, else the resume itself"""
+    if not digests_enabled() or not resume_text.strip():
+        return resume_text
+    digest = await _build_digest("resume", resume_text, _digest_resume)
+    return _prefer_digest(resume_text, digest)
+
+
+def digest_cache_stats() -> dict:
+    return {**digest_stats.as_dict(), "cache": _digests.stats()}
@@ -0,0 +1,296 @@
+"""Typed model responses and a tolerant JSON parser.
+
+The model is asked for JSON, but what comes back is sometimes wrapped in
+markdown fences, followed by prose, cut off mid-string or sprinkled with
+trailing commas.  ``repair_json`` fixes those locally so a near-miss does not
+cost another model call, and the precompiled TypeAdapters validate and coerce
+the result into ``Analysis`` / ``CoverLetters``.
+"""
+import json
+import re
+from typing import Any, List, Optional
+
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError, field_validator
+
+
+class Suggestion(BaseModel):
+    section: str = "experience"
+    current_text: Optional[str] = None
+    suggested_text: str
+    reason: str = ""
+    impact_level: str = "Medium"
+    priority: int = 5
+
+    @field_validator("current_text", mode="before")
+    @classmethod
+    def _blank_to_none(cls, value):
+        if value is None or (isinstance(value, str) and value.strip().lower() in ("", "null", "none", "n/a")):
+            return None
+        return str(value)
+
+    @field_validator("impact_level", mode="before")
+    @classmethod
+    def _normalize_impact(cls, value):
+        text = str(value or "").strip().capitalize()
+        return text if text in ("High", "Medium", "Low") else "Medium"
+
+    @field_validator("priority", mode="before")
+    @classmethod
+    def _coerce_priority(cls, value):
+        match = re.search(r"\d+", str(value)) if value is not None else None
+        return max(1, min(10, int(match.group()))) if match else 5
+
+    @field_validator("section", "suggested_text", "reason", mode="before")
+    @classmethod
+    def _stringify(cls, value):
+        return "" if value is None else str(value)
+
+
+class Analysis(BaseModel):
+    skills_gap: List[str] = Field(default_factory=list)
+    suggestions: List[Suggestion] = Field(default_factory=list)
+    ats_keywords: List[str] = Field(default_factory=list)
+    overall_score: str = ""
+
+    @field_validator("skills_gap", "ats_keywords", mode="before")
+    @classmethod
+    def _string_list(cls, value):
+        if value is None:
+            return []
+        if isinstance(value, str):
+            value = re.split(r"[,\n]", value)
+        return [str(item).strip() for item in value if str(item).strip()]
+
+    @field_validator("overall_score", mode="before")
+    @classmethod
+    def _score_to_string(cls, value):
+        if isinstance(value, (int, float)):
+            return f"{int(value)}/100"
+        return "" if value is None else str(value)
+
+
+class CoverLetters(BaseModel):
+    short_version: str = ""
+    long_version: str = ""
+
+
+def _as_string_list(value) -> List[str]:
+    if value is None:
+        return []
+    if isinstance(value, str):
+        value = re.split(r"[,\n]", value)
+    return [str(item).strip() for item in value if str(item).strip()]
+
+
+class JobDigest(BaseModel):
+    """Compact requirements summary of a job description"""
+    role_title: str = ""
+    seniority: str = ""
+    must_have: List[str] = Field(default_factory=list)
+    nice_to_have: List[str] = Field(default_factory=list)
+    responsibilities: List[str] = Field(default_factory=list)
+    keywords: List[str] = Field(default_factory=list)
+
+    @field_validator("must_have", "nice_to_have", "responsibilities", "keywords", mode="before")
+    @classmethod
+    def _string_list(cls, value):
+        return _as_string_list(value)
+
+    @field_validator("role_title", "seniority", mode="before")
+    @classmethod
+    def _stringify(cls, value):
+        return "" if value is None else str(value)
+
+
+class ResumeRole(BaseModel):
+    title: str = ""
+    company: str = ""
+    dates: str = ""
+    highlights: List[str] = Field(default_factory=list)
+
+    @field_validator("highlights", mode="before")
+    @classmethod
+    def _string_list(cls, value):
+        return _as_string_list(value)
+
+    @field_validator("title", "company", "dates", mode="before")
+    @classmethod
+    def _stringify(cls, value):
+        return "" if value is None else str(value)
+
+
+class ResumeDigest(BaseModel):
+    """Compact candidate profile of a resume"""
+    headline: str = ""
+    skills: List[str] = Field(default_factory=list)
+    roles: List[ResumeRole] = Field(default_factory=list)
+    education: List[str] = Field(default_factory=list)
+    certifications: List[str] = Field(default_factory=list)
+
+    @field_validator("skills", "education", "certifications", mode="before")
+    @classmethod
+    def _string_list(cls, value):
+        return _as_string_list(value)
+
+    @field_validator("headline", mode="before")
+    @classmethod
+    def _stringify(cls, value):
+        return "" if value is None else str(value)
+
+
+ANALYSIS_ADAPTER = TypeAdapter(Analysis)
+COVER_LETTERS_ADAPTER = TypeAdapter(CoverLetters)
+JOB_DIGEST_ADAPTER = TypeAdapter(JobDigest)
+RESUME_DIGEST_ADAPTER = TypeAdapter(ResumeDigest)
+
+
+class MalformedResponseError(ValueError):
+    """Raised when a model response cannot be repaired into the expected shape"""
+
+
+_FENCE = re.compile(r"```(?:json)?\s*(.*?)(?:```|$)", re.S | re.I)
+_BARE_WORDS = {"True": "true", "False": "false", "None": "null"}
+_CONTROL_ESCAPES = {"\n": "\\n", "\r": "\\r", "\t": "\\t", "\b": "\\b", "\f": "\\f"}
+
+
+class IncrementalJSONParser:
+    """Feeds model output chunk by chunk and repairs the JSON seen so far.
+
+    ``snapshot()`` can be called at any time (e.g. while a response streams
+    in) and returns the best-effort object for the text received up to then.
+    """
+
+    def __init__(self):
+        self._out: List[str] = []
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        self._started = False
+        self._finished = False
+        self._word = ""
+
+    def feed(self, chunk: str):
+        for char in chunk:
+            if self._finished:
+                return
+            if not self._started:
+                if char in "{[":
+                    self._started = True
+                else:
+                    continue
+            self._consume(char)
+
+    def _flush_word(self):
+        if self._word:
+            self._out.append(_BARE_WORDS.get(self._word, self._word))
+            self._word = ""
+
+    def _consume(self, char: str):
+        if self._in_string:
+            if self._escape:
+                self._escape = False
+            elif char == "\\":
+                self._escape = True
+            elif char == '"':
+                self._in_string = False
+            elif char < " ":
+                # Raw control characters are invalid inside JSON strings
+                char = _CONTROL_ESCAPES.get(char) or f"\\u{ord(char):04x}"
+            self._out.append(char)
+            return
+
+        if char.isalnum() or char in "_.-+":
+            self._word += char
+            return
+        self._flush_word()
+
+        if char == '"':
+            self._in_string = True
+            self._out.append(char)
+        elif char in "{[":
+            self._stack.append("}" if char == "{" else "]")
+            self._out.append(char)
+        elif char in "}]":
+            self._drop_trailing_comma()
+            if self._stack:
+                self._stack.pop()
+            self._out.append(char)
+            if not self._stack:
+                self._finished = True
+        elif char.isspace():
+            self._out.append(" ")
+        else:
+            self._out.append(char)
+
+    def _drop_trailing_comma(self):
+        index = len(self._out) - 1
+        while index >= 0 and self._out[index] == " ":
+            index -= 1
+        if index >= 0 and self._out[index] == ",":
+            del self._out[index]
+
+    def repaired_text(self) -> str:
+        out = list(self._out)
+        if self._word:
+            out.append(_BARE_WORDS.get(self._word, self._word))
+        if self._in_string:
+            if self._escape:
+                out.pop()
+            out.append('"')
+        text = "".join(out).rstrip()
+        # A dangling key or separator cannot be completed; cut back to the last value
+        text = re.sub(r'(,\s*"[^"]*"\s*:\s*|,\s*|:\s*)$', "", text)
+        if text.endswith('"') and self._stack and self._stack[-1] == "}" and re.search(r'[{,]\s*"[^"]*"$', text):
+            text = re.sub(r',?\s*"[^"]*"$', "", text)
+        return text + "".join(reversed(self._stack))
+
+    def snapshot(self) -> Any:
+        if not self._started:
+            raise MalformedResponseError("No JSON object found in model response")
+        try:
+            return json.loads(self.repaired_text())
+        except json.JSONDecodeError as e:
+            raise MalformedResponseError(f"Could not repair model JSON: {e}") from e
+
+
+def repair_json(text: str) -> Any:
+    """Parse near-JSON model output, repairing common defects locally"""
+    text = str(text).strip()
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        pass
+    fenced = _FENCE.search(text)
+    if fenced and "{" in fenced.group(1):
+        text = fenced.group(1)
+    parser = IncrementalJSONParser()
+    parser.feed(text)
+    return parser.snapshot()
+
+
+def parse_analysis(text: str) -> Analysis:
+    try:
+        return ANALYSIS_ADAPTER.validate_python(repair_json(text))
+    except ValidationError as e:
+        raise MalformedResponseError(f"Analysis did not match schema: {e}") from e
+
+
+def parse_cover_letters(text: str) -> CoverLetters:
+    try:
+        return COVER_LETTERS_ADAPTER.validate_python(repair_json(text))
+    except ValidationError as e:
+        raise MalformedResponseError(f"Cover letters did not match schema: {e}") from e
+
+
+def parse_job_digest(text: str) -> JobDigest:
+    try:
+        return JOB_DIGEST_ADAPTER.validate_python(repair_json(text))
+    except ValidationError as e:
+        raise MalformedResponseError(f"Job digest did not match schema: {e}") from e
+
+
+def parse_resume_digest(text: str) -> ResumeDigest:
+    try:
+        return RESUME_DIGEST_ADAPTER.validate_python(repair_json(text))
+    except ValidationError as e:
+        raise MalformedResponseError(f"Resume digest did not match schema: {e}") from e
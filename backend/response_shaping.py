@@ -0,0 +1,116 @@
+"""Compact analysis responses and fast JSON serialization.
+
+A full ``/api/analyze`` response echoes both inputs back (``original_resume``
+and ``job_description``), which are usually most of its bytes, and goes
+through ``jsonable_encoder`` + ``json.dumps``, which walks the whole tree
+twice in Python.  Two opt-in reductions, per request (``compact`` /
+``fields``) or by default with ``API_COMPACT_RESPONSES=true``:
+
+* compact: echoed inputs are replaced by their content hashes
+  (``resume_hash``, ``job_description_hash``; the client already has the
+  text), and ``null`` / empty values are left out
+* sparse fields: ``fields=analysis_id,ats_score.score,analysis.suggestions.id``
+  keeps only the listed dotted paths; a path through a list applies to every
+  item.  ``analysis_id`` is always kept
+
+Every endpoint serializes with orjson (``FastJSONResponse``), and the
+hot paths hand it the response dict directly, skipping ``jsonable_encoder``.
+"""
+import os
+from typing import Any, Dict, Optional
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from analysis_store import content_hash
+
+_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+# Echoed input -> the field that replaces it in compact responses
+ECHOED_INPUTS = {
+    "original_resume": "resume_hash",
+    "job_description": "job_description_hash",
+}
+ALWAYS_KEPT = ("analysis_id",)
+
+
+def dumps(content: Any) -> bytes:
+    # Anything orjson does not know (pydantic models, sets) takes the FastAPI route
+    return orjson.dumps(content, default=jsonable_encoder, option=_OPTIONS)
+
+
+def dumps_line(content: Any) -> bytes:
+    """One NDJSON line"""
+    return orjson.dumps(content, default=jsonable_encoder, option=_OPTIONS | orjson.OPT_APPEND_NEWLINE)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def compact_default() -> bool:
+    return os.environ.get("API_COMPACT_RESPONSES", "false").lower() == "true"
+
+
+def parse_fields(fields: Optional[str]) -> Optional[Dict[str, dict]]:
+    """``"a.b,a.c,d"`` -> ``{"a": {"b": {}, "c": {}}, "d": {}}``; an empty dict keeps the whole value"""
+    if not fields or not fields.strip():
+        return None
+    tree: Dict[str, dict] = {}
+    for path in fields.split(","):
+        parts = [part for part in path.strip().split(".") if part]
+        node = tree
+        for depth, part in enumerate(parts):
+            if part in node and not node[part]:
+                break  # a shorter path already keeps all of it
+            if depth == len(parts) - 1:
+                node[part] = {}
+            else:
+                node = node.setdefault(part, {})
+    for key in ALWAYS_KEPT:
+        tree[key] = {}
+    return tree
+
+
+def select_fields(value: Any, tree: Dict[str, dict]) -> Any:
+    if not tree:
+        return value
+    if isinstance(value, dict):
+        return {key: select_fields(value[key], sub) for key, sub in tree.items() if key in value}
+    if isinstance(value, list):
+        return [select_fields(item, tree) for item in value]
+    return value
+
+
+def _drop_empty(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {key: _drop_empty(item) for key, item in value.items() if item is not None and item != "" and item != []}
+    if isinstance(value, list):
+        return [_drop_empty(item) for item in value]
+    return value
+
+
+def shape_response(response: dict, compact: Optional[bool] = None, fields: Optional[str] = None) -> dict:
+    """``response`` reduced to what the client asked for; ``compact=None`` uses the server default"""
+    if compact is None:
+        compact = compact_default()
+    if compact:
+        response = dict(response)
+        for echoed, hashed in ECHOED_INPUTS.items():
+            text = response.pop(echoed, None)
+            if isinstance(text, str):
+                response[hashed] = content_hash(text)
+        response = _drop_empty(response)
+    tree = parse_fields(fields)
+    if tree is not None:
+        if compact:
+            # Asking for an echoed input in compact mode gets its hash
+            for echoed, hashed in ECHOED_INPUTS.items():
+                if echoed in tree:
+                    tree[hashed] = tree.pop(echoed)
+        response = select_fields(response, tree)
+    return response
@@ -0,0 +1,159 @@
+"""Apply anchored suggestions to a stored resume in one pass.
+
+Every anchored suggestion is an edit of the *original* resume: replace
+``[start, end)`` with ``suggested_text``.  Suggestions that add new content
+become insertions at the end of their section (or of the document).  Anchors
+never overlap, so any set of suggestions can be applied by sorting the edits
+by offset and splicing once, O(resume length), whatever was applied before.
+
+Because the edits and their positions are known, the change between two
+applied states needs no text diff: each toggled suggestion is exactly one
+hunk, expressed in the coordinates of the previous text so a client can patch
+its copy (in reverse order) or highlight the changed ranges.
+"""
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from prompt_compression import RESUME_SECTION_RULES, looks_like_heading
+from suggestion_anchoring import suggestion_id
+
+# suggestion["section"] -> headings it belongs under
+SECTION_HEADINGS = {
+    "summary": re.compile(r"summary|profile|objective|about", re.I),
+    "experience": re.compile(r"experience|employment|work history|professional history", re.I),
+    "skills": re.compile(r"skills|competenc|technolog", re.I),
+    "achievements": re.compile(r"achievement|accomplishment|award|project", re.I),
+    "education": re.compile(r"education|training|certific", re.I),
+}
+
+
+@dataclass
+class Edit:
+    suggestion_id: str
+    start: int  # offsets in the original text; start == end inserts
+    end: int
+    text: str
+    order: int  # position in the analysis, breaks ties between insertions
+
+    @property
+    def key(self) -> Tuple[int, int, int]:
+        return self.start, self.end, self.order
+
+    @property
+    def delta(self) -> int:
+        return len(self.text) - (self.end - self.start)
+
+
+def _insertion_point(text: str, section: str) -> Tuple[int, str]:
+    """Where new content for ``section`` goes, and the separator to put before it"""
+    pattern = SECTION_HEADINGS.get((section or "").lower())
+    offset, inside, end = 0, False, None
+    for line in text.splitlines(keepends=True):
+        content = line.rstrip("\r\n")
+        # Only known section names end a section; "Python, Go" also looks like a title
+        if looks_like_heading(content) and any(rule.search(content) for rule, _ in RESUME_SECTION_RULES):
+            if inside:
+                break
+            inside = bool(pattern and pattern.search(content))
+        if inside and content.strip():
+            end = offset + len(content)
+        offset += len(line)
+    if end is not None:
+        return end, "\n"
+    return len(text.rstrip()), "\n\n"
+
+
+def plan_edits(text: str, suggestions: List[dict]) -> Tuple[Dict[str, Edit], Dict[str, str]]:
+    """Edits by suggestion id, plus the ids that cannot be applied and why"""
+    edits: Dict[str, Edit] = {}
+    unusable: Dict[str, str] = {}
+    for order, suggestion in enumerate(suggestions):
+        sid = suggestion.get("id") or suggestion_id(suggestion)
+        anchor = suggestion.get("anchor") or {}
+        if anchor.get("start") is not None:
+            edits[sid] = Edit(sid, anchor["start"], anchor["end"], suggestion.get("suggested_text") or "", order)
+        elif anchor.get("status") == "new" and suggestion.get("suggested_text"):
+            position, separator = _insertion_point(text, suggestion.get("section"))
+            edits[sid] = Edit(sid, position, position, separator + suggestion["suggested_text"], order)
+        else:
+            unusable[sid] = "current_text was not found in the resume"
+    return edits, unusable
+
+
+@dataclass
+class AppliedState:
+    analysis_id: str
+    applied: List[str] = field(default_factory=list)  # suggestion ids, in offset order
+    text: str = ""
+    spans: Dict[str, Tuple[int, int]] = field(default_factory=dict)  # id -> range in ``text``
+
+
+def splice(original: str, edits: Iterable[Edit]) -> Tuple[str, Dict[str, Tuple[int, int]]]:
+    """Apply non-overlapping edits in one left-to-right pass"""
+    pieces: List[str] = []
+    spans: Dict[str, Tuple[int, int]] = {}
+    cursor = length = 0
+    for edit in sorted(edits, key=lambda e: e.key):
+        pieces.append(original[cursor:edit.start])
+        length += edit.start - cursor
+        pieces.append(edit.text)
+        spans[edit.suggestion_id] = (length, length + len(edit.text))
+        length += len(edit.text)
+        cursor = edit.end
+    pieces.append(original[cursor:])
+    return "".join(pieces), spans
+
+
+def _shift_before(edit: Edit, applied: List[Edit]) -> int:
+    return sum(other.delta for other in applied if other.key < edit.key)
+
+
+def change_hunks(original: str, before: List[Edit], added: List[Edit], removed: List[Edit]) -> List[dict]:
+    """Hunks turning the ``before`` text into the new one, in ``before``'s coordinates"""
+    hunks = []
+    for edit in added:
+        start = edit.start + _shift_before(edit, before)
+        hunks.append({"suggestion_id": edit.suggestion_id, "action": "apply",
+                      "start": start, "end": start + edit.end - edit.start, "text": edit.text})
+    for edit in removed:
+        start = edit.start + _shift_before(edit, before)
+        hunks.append({"suggestion_id": edit.suggestion_id, "action": "revert",
+                      "start": start, "end": start + len(edit.text), "text": original[edit.start:edit.end]})
+    hunks.sort(key=lambda hunk: (hunk["start"], hunk["end"]))
+    return hunks
+
+
+def apply_suggestions(original: str, suggestions: List[dict], wanted: Iterable[str],
+                      previous: Optional[AppliedState], analysis_id: str) -> Tuple[AppliedState, dict]:
+    """The new applied state and the response describing the change from ``previous``"""
+    edits, unusable = plan_edits(original, suggestions)
+    wanted = list(dict.fromkeys(wanted))
+    skipped = [{"suggestion_id": sid, "reason": unusable.get(sid, "unknown suggestion id")}
+               for sid in wanted if sid not in edits]
+    chosen = [edits[sid] for sid in wanted if sid in edits]
+
+    if previous is not None and previous.analysis_id == analysis_id:
+        before = [edits[sid] for sid in previous.applied if sid in edits]
+    else:
+        before = []
+    before_ids = {edit.suggestion_id for edit in before}
+    chosen_ids = {edit.suggestion_id for edit in chosen}
+
+    text, spans = splice(original, chosen)
+    state = AppliedState(analysis_id, [e.suggestion_id for e in sorted(chosen, key=lambda e: e.key)], text, spans)
+    return state, {
+        "analysis_id": analysis_id,
+        # Hunks are against the previous state of the same analysis, else the original text
+        "changes_base": "previous" if previous is not None and previous.analysis_id == analysis_id else "original",
+        "applied": state.applied,
+        "skipped": skipped,
+        "text": text,
+        "spans": [{"suggestion_id": sid, "start": start, "end": end} for sid, (start, end) in spans.items()],
+        "changes": change_hunks(
+            original,
+            before,
+            [edit for edit in chosen if edit.suggestion_id not in before_ids],
+            [edit for edit in before if edit.suggestion_id not in chosen_ids],
+        ),
+    }
@@ -0,0 +1,89 @@
+"""Upload-once resume sessions.
+
+``POST /api/resumes`` extracts and normalizes a resume once and hands back a
+``resume_id``; generation endpoints then accept that id instead of the file
+or text.  Entries live in a bounded TTL cache (``RESUME_STORE_MAX_ITEMS``,
+``RESUME_STORE_TTL``), and a lookup refreshes the TTL.  A session also
+remembers which suggestions were last applied to it, so toggling one is
+computed against that state, and the latest analysis made for it, so
+``/apply`` works before that analysis has been written to the store.
+"""
+import os
+import re
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Optional, Tuple
+
+from analysis_store import content_hash
+from resume_edits import AppliedState
+from ttl_cache import TTLCache
+
+
+@dataclass
+class StoredResume:
+    resume_id: str
+    text: str
+    content_hash: str
+    source: str
+    file_type: Optional[str] = None
+    filename: Optional[str] = None
+    created_at: datetime = field(default_factory=datetime.utcnow)
+    # Suggestions applied through /api/resumes/{id}/apply
+    applied: Optional[AppliedState] = None
+    # (analysis_id, anchored analysis) of the latest analysis of this session
+    last_analysis: Optional[Tuple[str, dict]] = None
+
+    def public_view(self) -> dict:
+        return {
+            "resume_id": self.resume_id,
+            "content_hash": self.content_hash,
+            "text": self.text,
+            "characters": len(self.text),
+            "source": self.source,
+            "file_type": self.file_type,
+            "filename": self.filename,
+            "created_at": self.created_at,
+            "applied_analysis_id": self.applied.analysis_id if self.applied else None,
+            "applied_suggestions": self.applied.applied if self.applied else [],
+        }
+
+
+def normalize_resume_text(text: str) -> str:
+    """Consistent line endings and spacing so identical resumes hash the same"""
+    text = text.replace("\r\n", "\n").replace("\r", "\n").replace("\u00a0", " ").replace("\x00", "")
+    lines = [line.rstrip() for line in text.split("\n")]
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines)).strip()
+
+
+class ResumeStore:
+    def __init__(self, max_items: int, ttl_seconds: float):
+        self._cache: TTLCache[StoredResume] = TTLCache(max_items, ttl_seconds)
+
+    def add(self, text: str, source: str, file_type: Optional[str] = None, filename: Optional[str] = None) -> StoredResume:
+        normalized = normalize_resume_text(text)
+        resume = StoredResume(
+            resume_id=str(uuid.uuid4()),
+            text=normalized,
+            content_hash=content_hash(normalized),
+            source=source,
+            file_type=file_type,
+            filename=filename,
+        )
+        self._cache.set(resume.resume_id, resume)
+        return resume
+
+    def get(self, resume_id: str) -> Optional[StoredResume]:
+        resume = self._cache.get(resume_id)
+        if resume is not None:
+            self._cache.set(resume_id, resume)  # sliding expiry while a session is active
+        return resume
+
+    def stats(self) -> dict:
+        return self._cache.stats()
+
+
+resume_store = ResumeStore(
+    max_items=int(os.environ.get("RESUME_STORE_MAX_ITEMS", "500")),
+    ttl_seconds=float(os.environ.get("RESUME_STORE_TTL", "7200")),
+)
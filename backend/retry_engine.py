@@ -0,0 +1,273 @@
+"""Shared retry engine for model calls.
+
+Provider failures are raised as typed ``ProviderError`` subclasses so callers
+never have to substring-match ``str(e)`` again.  ``run_with_retry`` applies
+full-jitter exponential backoff, honors server-supplied ``Retry-After`` hints
+and draws every retry from a process-wide ``RetryBudget`` so a provider outage
+cannot turn into a retry storm.
+"""
+import asyncio
+import math
+import os
+import random
+import re
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Optional
+
+
+class ProviderError(Exception):
+    """Base class for classified model-provider failures"""
+    error_type = "unknown"
+    retryable = True
+    message = "AI service error."
+
+    def __init__(self, detail: str = "", retry_after: Optional[float] = None, status_code: Optional[int] = None):
+        super().__init__(detail or self.message)
+        self.detail = detail or self.message
+        self.retry_after = retry_after
+        self.status_code = status_code
+
+
+class ServiceUnavailableError(ProviderError):
+    error_type = "service_unavailable"
+    message = "AI service is currently overloaded. Please try again in a few moments."
+
+
+class ProviderTimeoutError(ProviderError):
+    error_type = "timeout"
+    message = "Request timed out. The service may be experiencing high load."
+
+
+class RateLimitError(ProviderError):
+    error_type = "rate_limit"
+    message = "Rate limit exceeded. Please wait a moment before trying again."
+
+
+class AuthenticationError(ProviderError):
+    error_type = "authentication"
+    retryable = False
+    message = "Authentication failed. Please check API key configuration."
+
+
+class UnknownProviderError(ProviderError):
+    error_type = "unknown"
+
+
+class PreemptedError(ProviderError):
+    """A queued low-priority call dropped by the model scheduler; the provider was never called"""
+    error_type = "preempted"
+    retryable = False
+    message = "Deferred to make room for interactive requests."
+
+
+_STATUS_TO_ERROR = {
+    401: AuthenticationError,
+    403: AuthenticationError,
+    408: ProviderTimeoutError,
+    429: RateLimitError,
+    500: ServiceUnavailableError,
+    502: ServiceUnavailableError,
+    503: ServiceUnavailableError,
+    504: ProviderTimeoutError,
+}
+
+_RETRY_AFTER_PATTERNS = [
+    re.compile(r"retry[- ]after[\"':\s]+(\d+(?:\.\d+)?)", re.IGNORECASE),
+    re.compile(r"retry in (\d+(?:\.\d+)?)\s*s", re.IGNORECASE),
+    re.compile(r"retry_delay\s*\{\s*seconds:\s*(\d+)", re.IGNORECASE),
+]
+
+
+def _find_status_code(exc: BaseException) -> Optional[int]:
+    """Look for an HTTP status on the exception or its response object"""
+    for source in (exc, getattr(exc, "response", None)):
+        if source is None:
+            continue
+        for attr in ("status_code", "status", "code", "http_status"):
+            value = getattr(source, attr, None)
+            if isinstance(value, int) and 100 <= value < 600:
+                return value
+    return None
+
+
+def _find_retry_after(exc: BaseException) -> Optional[float]:
+    """Read a Retry-After hint from response headers or the error message"""
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None) or getattr(exc, "headers", None)
+    if headers:
+        try:
+            value = headers.get("retry-after") or headers.get("Retry-After")
+        except AttributeError:
+            value = None
+        if value is not None:
+            try:
+                return max(0.0, float(value))
+            except (TypeError, ValueError):
+                pass
+    text = str(exc)
+    for pattern in _RETRY_AFTER_PATTERNS:
+        match = pattern.search(text)
+        if match:
+            return float(match.group(1))
+    return None
+
+
+def classify_provider_exception(exc: BaseException) -> ProviderError:
+    """Map any exception raised by a provider SDK to a typed ProviderError"""
+    if isinstance(exc, ProviderError):
+        return exc
+
+    detail = str(exc) or exc.__class__.__name__
+    retry_after = _find_retry_after(exc)
+    status_code = _find_status_code(exc)
+
+    if status_code in _STATUS_TO_ERROR:
+        return _STATUS_TO_ERROR[status_code](detail, retry_after=retry_after, status_code=status_code)
+
+    if isinstance(exc, (asyncio.TimeoutError, TimeoutError)):
+        return ProviderTimeoutError(detail, retry_after=retry_after)
+
+    # SDKs that do not expose a status code still name their exception classes
+    # sensibly (RateLimitError, ServiceUnavailableError, Timeout, ...).
+    class_name = exc.__class__.__name__.lower()
+    lowered = detail.lower()
+    if "ratelimit" in class_name or "resourceexhausted" in class_name or "rate limit" in lowered or "429" in lowered or "quota" in lowered:
+        return RateLimitError(detail, retry_after=retry_after, status_code=429)
+    if "timeout" in class_name or "timeout" in lowered or "timed out" in lowered:
+        return ProviderTimeoutError(detail, retry_after=retry_after)
+    if "unavailable" in class_name or "overloaded" in lowered or "503" in lowered or "unavailable" in lowered:
+        return ServiceUnavailableError(detail, retry_after=retry_after, status_code=503)
+    if "authentication" in class_name or "permissiondenied" in class_name or "unauthorized" in lowered or "401" in lowered or "invalid api key" in lowered:
+        return AuthenticationError(detail, status_code=401)
+    return UnknownProviderError(detail, retry_after=retry_after)
+
+
+class RetryBudget:
+    """Caps retries to a fraction of recent traffic.
+
+    Every first attempt deposits ``ratio`` tokens and every retry withdraws one,
+    over a sliding ``window_seconds``.  ``min_retries_per_second`` keeps a small
+    floor so low-traffic deployments can still retry.
+    """
+
+    def __init__(self, ratio: float = 0.2, window_seconds: float = 60.0, min_retries_per_second: float = 0.1):
+        self.ratio = ratio
+        self.window_seconds = window_seconds
+        self.min_retries_per_second = min_retries_per_second
+        self._requests = deque()
+        self._retries = deque()
+
+    def _prune(self, now: float):
+        cutoff = now - self.window_seconds
+        while self._requests and self._requests[0] < cutoff:
+            self._requests.popleft()
+        while self._retries and self._retries[0] < cutoff:
+            self._retries.popleft()
+
+    def record_request(self):
+        self._requests.append(time.monotonic())
+
+    def try_acquire_retry(self) -> bool:
+        now = time.monotonic()
+        self._prune(now)
+        allowed = self.min_retries_per_second * self.window_seconds + self.ratio * len(self._requests)
+        if len(self._retries) + 1 > allowed:
+            return False
+        self._retries.append(now)
+        return True
+
+    def stats(self) -> dict:
+        self._prune(time.monotonic())
+        requests = len(self._requests)
+        retries = len(self._retries)
+        return {
+            "window_seconds": self.window_seconds,
+            "requests": requests,
+            "retries": retries,
+            "retry_ratio": round(retries / requests, 3) if requests else 0.0,
+            "max_ratio": self.ratio,
+        }
+
+
+@dataclass
+class RetryPolicy:
+    max_retries: int = 3
+    base_delay: float = 1.0
+    max_delay: float = 20.0
+    # Longest we are willing to sleep inside a single user request.  Anything
+    # beyond this is handed back to the client as retry_after_seconds instead.
+    max_total_delay: float = 30.0
+
+    @classmethod
+    def from_env(cls) -> "RetryPolicy":
+        return cls(
+            max_retries=int(os.environ.get("AI_MAX_RETRIES", "3")),
+            base_delay=float(os.environ.get("AI_RETRY_BASE_DELAY", "1.0")),
+            max_delay=float(os.environ.get("AI_RETRY_MAX_DELAY", "20.0")),
+            max_total_delay=float(os.environ.get("AI_RETRY_MAX_TOTAL_DELAY", "30.0")),
+        )
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff for the given zero-based retry"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+
+retry_budget = RetryBudget(
+    ratio=float(os.environ.get("AI_RETRY_BUDGET_RATIO", "0.2")),
+    window_seconds=float(os.environ.get("AI_RETRY_BUDGET_WINDOW", "60")),
+)
+
+
+def client_retry_after(error: ProviderError, policy: RetryPolicy) -> Optional[int]:
+    """Seconds the client should wait before trying again, if retryable"""
+    if not error.retryable:
+        return None
+    if error.retry_after is not None:
+        return int(math.ceil(error.retry_after))
+    return int(math.ceil(policy.max_delay if isinstance(error, RateLimitError) else policy.base_delay * 4))
+
+
+async def run_with_retry(
+    operation: Callable[[], Awaitable[Any]],
+    label: str,
+    policy: Optional[RetryPolicy] = None,
+    budget: Optional[RetryBudget] = None,
+) -> Any:
+    """Run ``operation`` until it succeeds or retrying stops making sense.
+
+    Raises the last ``ProviderError`` when the error is not retryable, the
+    attempts are exhausted, the retry budget is spent, or the next wait would
+    push us past ``policy.max_total_delay``.
+    """
+    policy = policy or RetryPolicy.from_env()
+    budget = budget or retry_budget
+    budget.record_request()
+    slept = 0.0
+
+    for attempt in range(policy.max_retries + 1):
+        try:
+            print(f"🤖 {label} Attempt {attempt + 1}/{policy.max_retries + 1}")
+            return await operation()
+        except Exception as exc:
+            error = classify_provider_exception(exc)
+            if not error.retryable or attempt >= policy.max_retries:
+                print(f"❌ {label} final attempt failed: {error.error_type} - {error.detail}")
+                raise error from exc
+
+            delay = policy.backoff(attempt)
+            if error.retry_after is not None:
+                delay = max(delay, error.retry_after)
+            if slept + delay > policy.max_total_delay:
+                print(f"⏭️ {label}: next wait of {delay:.1f}s exceeds in-request limit, returning to client")
+                raise error from exc
+            if not budget.try_acquire_retry():
+                print(f"🪫 {label}: retry budget exhausted, not retrying")
+                raise error from exc
+
+            print(f"⏳ {label} {error.error_type}, retrying in {delay:.1f} seconds...")
+            await asyncio.sleep(delay)
+            slept += delay
+
+    raise UnknownProviderError("Maximum retries exceeded")
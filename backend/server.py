@@ -1,7 +1,8 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File, Form
+from fastapi import FastAPI, HTTPException, UploadFile, File, Form, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 import os
 import uuid
 import json
@@ -13,7 +14,51 @@ import pdfplumber
 from docx import Document
 from dotenv import load_dotenv
 import time
+import math
 import asyncio
+from analysis_store import (
+    StoreUnavailableError,
+    analysis_store,
+    content_hash,
+    flush_writes,
+    in_background,
+    load_analysis,
+    load_cover_letter,
+    persist_analysis,
+    persist_cover_letter,
+)
+from ats_scorer import score_resume
+from chunked_analysis import run_chunked_analysis, should_chunk
+from context_cache import context_cache_stats
+from document_export import MEDIA_TYPES, export_cache_stats, iter_chunks, render_document
+from facet_analysis import iter_facet_analysis, run_facet_analysis
+from hedging import hedging_stats
+from job_index import job_index, warm_from_store
+from job_queue import PRIORITY_BATCH, PRIORITY_NORMAL, job_queue
+from model_client import send_model_message
+from model_router import model_router
+from model_scheduler import BATCH, INTERACTIVE, call_class, model_scheduler
+from near_duplicates import canonical_url, near_duplicates
+from prompt_compression import JD_BOILERPLATE, compress_prompt_inputs, compression_stats, count_tokens
+from prompt_digests import digest_cache_stats, job_description_for_prompt, resume_for_prompt
+from resume_edits import apply_suggestions
+from resume_store import resume_store
+from response_shaping import FastJSONResponse, dumps_line, shape_response
+from response_schemas import MalformedResponseError, parse_analysis, parse_cover_letters
+from retry_engine import (
+    PreemptedError,
+    ProviderError,
+    RetryPolicy,
+    UnknownProviderError,
+    classify_provider_exception,
+    client_retry_after,
+    retry_budget,
+    run_with_retry,
+)
+from skills_taxonomy import taxonomy
+from speculation import SPECULATIVE_KIND, cover_letter_speculator
+from suggestion_anchoring import ResumeIndex, UNVERIFIED, anchor_analysis, anchor_suggestion, anchoring_stats, drop_unanchored
+from ttl_cache import TTLCache
 
 # Load environment variables
 load_dotenv()
@@ -27,7 +72,8 @@ if api_key_check:
 app = FastAPI(
     title="Resume Optimizer API",
     description="AI-powered resume optimization backend",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=FastJSONResponse
 )
 
 # CORS middleware
@@ -39,6 +85,22 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.exception_handler(StoreUnavailableError)
+async def store_unavailable_handler(request: Request, error: StoreUnavailableError):
+    """The analysis store is down: retryable 503 in the same shape as provider errors"""
+    retry_after = max(int(math.ceil(error.retry_after)), 1)
+    return JSONResponse(
+        status_code=503,
+        headers={"Retry-After": str(retry_after)},
+        content={"detail": {
+            "error_type": "store_unavailable",
+            "message": str(error),
+            "retryable": True,
+            "retry_after_seconds": retry_after,
+            "details": None
+        }}
+    )
+
 # Pydantic models
 class ResumeAnalysisRequest(BaseModel):
     job_description: str
@@ -134,13 +196,15 @@ def scrape_job_description(url: str) -> str:
         if not job_content or len(job_content) < 200:
             job_content = soup.get_text(strip=True, separator='\n')
         
-        # Clean up the text
+        # Clean up the text; cookie banners and page chrome go before the
+        # length limit so they do not push the requirements past it
         lines = [line.strip() for line in job_content.split('\n') if line.strip()]
-        cleaned_text = '\n'.join(lines)
+        cleaned_text = '\n'.join(line for line in lines if not JD_BOILERPLATE.search(line))
         
-        # Limit to reasonable length (first 5000 characters)
-        if len(cleaned_text) > 5000:
-            cleaned_text = cleaned_text[:5000] + "..."
+        # Limit to reasonable length (first SCRAPE_MAX_CHARS characters)
+        max_chars = int(os.environ.get("SCRAPE_MAX_CHARS", "5000"))
+        if len(cleaned_text) > max_chars:
+            cleaned_text = cleaned_text[:max_chars] + "..."
             
         return cleaned_text
         
@@ -154,97 +218,9 @@ def scrape_job_description(url: str) -> str:
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Failed to scrape job description: {str(e)}. Please copy and paste the job description text directly instead of using the URL.")
 
-# Enhanced error response models
-class APIError(BaseModel):
-    error_type: str  # "service_unavailable", "timeout", "rate_limit", "authentication", "unknown"
-    message: str
-    retryable: bool
-    retry_after_seconds: Optional[int] = None
-    details: Optional[str] = None
-
-class RetryableResponse(BaseModel):
-    success: bool
-    data: Optional[dict] = None
-    error: Optional[APIError] = None
-
-# AI Integration using emergentintegrations with enhanced error handling
-async def get_ai_response_with_retry(job_description: str, resume_text: str, max_retries: int = 3, retry_delay: int = 5):
-    """
-    Get AI response with built-in retry logic for handling service overloads
-    """
-    for attempt in range(max_retries + 1):
-        try:
-            print(f"🤖 AI Analysis Attempt {attempt + 1}/{max_retries + 1}")
-            response = await get_ai_response(job_description, resume_text)
-            return RetryableResponse(success=True, data={"analysis": response})
-            
-        except Exception as e:
-            error_str = str(e).lower()
-            
-            # Classify the error type
-            if "overloaded" in error_str or "503" in error_str or "unavailable" in error_str:
-                error_type = "service_unavailable"
-                retryable = True
-                retry_after = retry_delay * (attempt + 1)  # Exponential backoff
-                message = "AI service is currently overloaded. Please try again in a few moments."
-            elif "timeout" in error_str or "timed out" in error_str:
-                error_type = "timeout"
-                retryable = True
-                retry_after = retry_delay
-                message = "Request timed out. The service may be experiencing high load."
-            elif "rate limit" in error_str or "429" in error_str:
-                error_type = "rate_limit"
-                retryable = True
-                retry_after = 60  # Wait longer for rate limits
-                message = "Rate limit exceeded. Please wait a moment before trying again."
-            elif "unauthorized" in error_str or "401" in error_str or "invalid api key" in error_str:
-                error_type = "authentication"
-                retryable = False
-                retry_after = None
-                message = "Authentication failed. Please check API key configuration."
-            else:
-                error_type = "unknown"
-                retryable = attempt < max_retries  # Only retry for unknown errors if we have attempts left
-                retry_after = retry_delay
-                message = f"AI service error: {str(e)}"
-            
-            error_response = APIError(
-                error_type=error_type,
-                message=message,
-                retryable=retryable,
-                retry_after_seconds=retry_after,
-                details=str(e)
-            )
-            
-            # If this is our last attempt or error is not retryable, return the error
-            if attempt >= max_retries or not retryable:
-                print(f"❌ Final attempt failed: {error_response.message}")
-                return RetryableResponse(success=False, error=error_response)
-            
-            # If retryable, wait and try again
-            if retryable and attempt < max_retries:
-                print(f"⏳ Retrying in {retry_after} seconds... (Attempt {attempt + 1}/{max_retries + 1})")
-                await asyncio.sleep(retry_after)
-                continue
-                
-    # Should never reach here, but just in case
-    return RetryableResponse(
-        success=False, 
-        error=APIError(
-            error_type="unknown",
-            message="Maximum retries exceeded",
-            retryable=False
-        )
-    )
-
-async def get_ai_response(job_description: str, resume_text: str):
-    try:
-        # Import the emergentintegrations library
-        from emergentintegrations.llm.chat import LlmChat, UserMessage
-        
-        print(f"🤖 Starting AI analysis - Job desc: {len(job_description)} chars, Resume: {len(resume_text)} chars")
-        
-        system_prompt = """You are Elena Rodriguez, a Senior Resume Optimization Specialist with 15+ years of experience at Fortune 500 companies and top recruiting firms. You've personally reviewed over 10,000 resumes and have deep expertise in ATS systems, hiring manager psychology, and industry-specific optimization strategies.
+# Static system prompts. They are identical for every request, which lets the
+# model-call layer register them with provider-side context caching.
+ANALYSIS_SYSTEM_PROMPT = """You are Elena Rodriguez, a Senior Resume Optimization Specialist with 15+ years of experience at Fortune 500 companies and top recruiting firms. You've personally reviewed over 10,000 resumes and have deep expertise in ATS systems, hiring manager psychology, and industry-specific optimization strategies.
 
 ## YOUR MISSION
 Conduct a comprehensive resume analysis against the target job description to identify specific, actionable optimization opportunities that will significantly increase the candidate's interview potential.
@@ -328,129 +304,7 @@ Provide analysis in this exact JSON structure:
 
 Analyze with the precision of a top recruiting firm and the insight of an industry expert."""
 
-        # Create AI chat instance
-        api_key = os.environ.get('GEMINI_API_KEY')
-        if not api_key:
-            print("❌ Gemini API key not found")
-            raise HTTPException(status_code=500, detail="Gemini API key not configured")
-            
-        print("🔑 API key found, creating chat instance...")
-        chat = LlmChat(
-            api_key=api_key,
-            session_id=f"resume_analysis_{uuid.uuid4()}",
-            system_message=system_prompt
-        ).with_model("gemini", "gemini-2.0-flash")
-
-        # Create user message
-        user_message = UserMessage(
-            text=f"""
-            JOB DESCRIPTION:
-            {job_description}
-            
-            CURRENT RESUME:
-            {resume_text}
-            
-            Please analyze and provide optimization suggestions in the specified JSON format.
-            """
-        )
-
-        print("📤 Sending message to AI...")
-        # Get AI response
-        response = await chat.send_message(user_message)
-        print("📥 Received AI response")
-        
-        # Clean up the response - remove markdown code blocks if present
-        cleaned_response = str(response)
-        if "```json" in cleaned_response:
-            # Extract JSON from markdown code blocks
-            start_marker = "```json"
-            end_marker = "```"
-            start_index = cleaned_response.find(start_marker) + len(start_marker)
-            end_index = cleaned_response.find(end_marker, start_index)
-            if end_index > start_index:
-                cleaned_response = cleaned_response[start_index:end_index].strip()
-        
-        print("✅ AI analysis completed successfully")
-        return cleaned_response
-        
-    except Exception as e:
-        print(f"❌ AI analysis error: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        raise HTTPException(status_code=500, detail=f"AI analysis failed: {str(e)}")
-
-async def get_cover_letter_response_with_retry(job_description: str, resume_text: str, max_retries: int = 3, retry_delay: int = 5):
-    """
-    Get cover letter response with built-in retry logic for handling service overloads
-    """
-    for attempt in range(max_retries + 1):
-        try:
-            print(f"📝 Cover Letter Generation Attempt {attempt + 1}/{max_retries + 1}")
-            response = await get_cover_letter_response(job_description, resume_text)
-            return RetryableResponse(success=True, data=response)
-            
-        except Exception as e:
-            error_str = str(e).lower()
-            
-            # Classify the error type (same logic as AI analysis)
-            if "overloaded" in error_str or "503" in error_str or "unavailable" in error_str:
-                error_type = "service_unavailable"
-                retryable = True
-                retry_after = retry_delay * (attempt + 1)
-                message = "AI service is currently overloaded. Please try again in a few moments."
-            elif "timeout" in error_str or "timed out" in error_str:
-                error_type = "timeout"
-                retryable = True
-                retry_after = retry_delay
-                message = "Request timed out. The service may be experiencing high load."
-            elif "rate limit" in error_str or "429" in error_str:
-                error_type = "rate_limit"
-                retryable = True
-                retry_after = 60
-                message = "Rate limit exceeded. Please wait a moment before trying again."
-            elif "unauthorized" in error_str or "401" in error_str or "invalid api key" in error_str:
-                error_type = "authentication"
-                retryable = False
-                retry_after = None
-                message = "Authentication failed. Please check API key configuration."
-            else:
-                error_type = "unknown"
-                retryable = attempt < max_retries
-                retry_after = retry_delay
-                message = f"Cover letter generation error: {str(e)}"
-            
-            error_response = APIError(
-                error_type=error_type,
-                message=message,
-                retryable=retryable,
-                retry_after_seconds=retry_after,
-                details=str(e)
-            )
-            
-            if attempt >= max_retries or not retryable:
-                print(f"❌ Cover letter generation final attempt failed: {error_response.message}")
-                return RetryableResponse(success=False, error=error_response)
-            
-            if retryable and attempt < max_retries:
-                print(f"⏳ Retrying cover letter generation in {retry_after} seconds...")
-                await asyncio.sleep(retry_after)
-                continue
-                
-    return RetryableResponse(
-        success=False, 
-        error=APIError(
-            error_type="unknown",
-            message="Maximum retries exceeded",
-            retryable=False
-        )
-    )
-
-async def get_cover_letter_response(job_description: str, resume_text: str):
-    try:
-        # Import the emergentintegrations library
-        from emergentintegrations.llm.chat import LlmChat, UserMessage
-        
-        system_prompt = """You are Marcus Chen, Executive Career Strategist and former Head of Talent Acquisition at Microsoft, Google, and Tesla. You've crafted winning cover letters for C-suite executives, product managers, engineers, and creatives across all industries. Your letters have achieved a 73% interview rate - significantly above industry average.
+COVER_LETTER_SYSTEM_PROMPT = """You are Marcus Chen, Executive Career Strategist and former Head of Talent Acquisition at Microsoft, Google, and Tesla. You've crafted winning cover letters for C-suite executives, product managers, engineers, and creatives across all industries. Your letters have achieved a 73% interview rate - significantly above industry average.
 
 ## YOUR EXPERTISE
 - Psychology of hiring decisions and what captivates hiring managers
@@ -542,20 +396,148 @@ Return exactly this JSON structure:
 
 Write with the precision of a Fortune 500 communications team and the insight of a top executive recruiter."""
 
-        # Create AI chat instance
-        api_key = os.environ.get('GEMINI_API_KEY')
-        if not api_key:
-            raise HTTPException(status_code=500, detail="Gemini API key not configured")
+# Enhanced error response models
+class APIError(BaseModel):
+    error_type: str  # "service_unavailable", "timeout", "rate_limit", "authentication", "unknown"
+    message: str
+    retryable: bool
+    retry_after_seconds: Optional[int] = None
+    details: Optional[str] = None
+
+class RetryableResponse(BaseModel):
+    success: bool
+    data: Optional[dict] = None
+    error: Optional[APIError] = None
+
+def provider_error_to_api_error(error: ProviderError, unknown_prefix: str, policy: RetryPolicy) -> APIError:
+    """Convert a typed provider failure into the error payload the frontend expects"""
+    if error.error_type == "unknown":
+        message = f"{unknown_prefix}: {error.detail}"
+    else:
+        message = error.message
+    return APIError(
+        error_type=error.error_type,
+        message=message,
+        retryable=error.retryable,
+        retry_after_seconds=client_retry_after(error, policy),
+        details=error.detail
+    )
+
+def analysis_mode(resume_text: str) -> str:
+    """How to run an analysis, from AI_ANALYSIS_MODE:
+
+    'single' sends one analysis prompt, 'facets' splits it into concurrent
+    per-facet calls, 'chunked' map-reduces over resume sections, and 'auto'
+    chunks only resumes above AI_CHUNK_THRESHOLD_TOKENS.
+    """
+    mode = os.environ.get("AI_ANALYSIS_MODE", "single").lower()
+    if mode == "auto":
+        return "chunked" if should_chunk(resume_text) else "single"
+    return mode
+
+async def prepare_analysis_inputs(job_description: str, resume_text: str, trim_resume: bool = True):
+    """Compress once up front so retries reuse the smaller prompt"""
+    # Chunked analysis reads the whole resume, so it is never trimmed there
+    resume_budget = None if trim_resume else count_tokens(resume_text) + 1
+    job_description, resume_text = compress_prompt_inputs(job_description, resume_text, resume_budget=resume_budget)
+    # Suggestions quote the resume verbatim, so only the JD is replaced by its digest
+    job_description = await job_description_for_prompt(job_description)
+    return job_description, resume_text
+
+# AI Integration using emergentintegrations with enhanced error handling
+async def get_ai_response_with_retry(job_description: str, resume_text: str, max_retries: Optional[int] = None, retry_delay: Optional[float] = None):
+    """
+    Get AI response through the shared retry engine (jittered backoff, retry budget, Retry-After)
+    """
+    policy = RetryPolicy.from_env()
+    if max_retries is not None:
+        policy.max_retries = max_retries
+    if retry_delay is not None:
+        policy.base_delay = retry_delay
+    mode = analysis_mode(resume_text)
+    job_description, resume_text = await prepare_analysis_inputs(job_description, resume_text, trim_resume=mode != "chunked")
+    try:
+        if mode == "facets":
+            response = await run_facet_analysis(job_description, resume_text, policy)
+        elif mode == "chunked":
+            response = await run_chunked_analysis(
+                job_description,
+                resume_text,
+                lambda jd, chunk: run_with_retry(lambda: get_ai_response(jd, chunk), label="AI Analysis chunk", policy=policy)
+            )
+        else:
+            response = await run_with_retry(
+                lambda: get_ai_response(job_description, resume_text),
+                label="AI Analysis",
+                policy=policy
+            )
+        return RetryableResponse(success=True, data={"analysis": response})
+    except ProviderError as e:
+        return RetryableResponse(success=False, error=provider_error_to_api_error(e, "AI service error", policy))
+
+async def get_ai_response(job_description: str, resume_text: str):
+    try:
+        print(f"🤖 Starting AI analysis - Job desc: {len(job_description)} chars, Resume: {len(resume_text)} chars")
+
+        # Create user message
+        user_message = f"""
+            JOB DESCRIPTION:
+            {job_description}
             
-        chat = LlmChat(
-            api_key=api_key,
-            session_id=f"cover_letter_{uuid.uuid4()}",
-            system_message=system_prompt
-        ).with_model("gemini", "gemini-2.0-flash")
+            CURRENT RESUME:
+            {resume_text}
+            
+            Please analyze and provide optimization suggestions in the specified JSON format.
+            """
+
+        print("📤 Sending message to AI...")
+        # Get AI response
+        response = await send_model_message(ANALYSIS_SYSTEM_PROMPT, user_message, "resume_analysis", json_mode=True)
+        print("📥 Received AI response")
+
+        # Repair near-JSON locally and validate against the Analysis schema
+        try:
+            analysis = parse_analysis(response)
+        except MalformedResponseError as e:
+            # Unrepairable output is worth one more model call via the retry engine
+            raise UnknownProviderError(f"Model returned malformed analysis JSON: {e}") from e
+
+        print("✅ AI analysis completed successfully")
+        return analysis.model_dump()
+        
+    except Exception as e:
+        print(f"❌ AI analysis error: {str(e)}")
+        # Keep the provider's status code / Retry-After visible to the retry engine
+        raise classify_provider_exception(e) from e
+
+async def get_cover_letter_response_with_retry(job_description: str, resume_text: str, max_retries: Optional[int] = None, retry_delay: Optional[float] = None):
+    """
+    Get cover letter response through the shared retry engine
+    """
+    policy = RetryPolicy.from_env()
+    if max_retries is not None:
+        policy.max_retries = max_retries
+    if retry_delay is not None:
+        policy.base_delay = retry_delay
+    # Compress once up front so retries reuse the smaller prompt
+    job_description, resume_text = compress_prompt_inputs(job_description, resume_text)
+    # The JD itself, not its digest: the letter must name the company, which the
+    # requirements digest leaves out (and a near-duplicate's digest may get wrong)
+    resume_text = await resume_for_prompt(resume_text)
+    try:
+        response = await run_with_retry(
+            lambda: get_cover_letter_response(job_description, resume_text),
+            label="Cover Letter Generation",
+            policy=policy
+        )
+        return RetryableResponse(success=True, data=response)
+    except ProviderError as e:
+        return RetryableResponse(success=False, error=provider_error_to_api_error(e, "Cover letter generation error", policy))
 
+async def get_cover_letter_response(job_description: str, resume_text: str):
+    try:
         # Create user message
-        user_message = UserMessage(
-            text=f"""
+        user_message = f"""
             JOB DESCRIPTION:
             {job_description}
             
@@ -566,35 +548,21 @@ Write with the precision of a Fortune 500 communications team and the insight of
             
             Return the response in JSON format with both versions.
             """
-        )
 
         # Get AI response
-        response = await chat.send_message(user_message)
-        
-        # Clean up the response
-        cleaned_response = str(response).strip()
-        
-        # Try to parse as JSON first
+        response = await send_model_message(COVER_LETTER_SYSTEM_PROMPT, user_message, "cover_letter", json_mode=True)
+
         try:
-            if "```json" in cleaned_response:
-                # Extract JSON from markdown code blocks
-                start_marker = "```json"
-                end_marker = "```"
-                start_index = cleaned_response.find(start_marker) + len(start_marker)
-                end_index = cleaned_response.find(end_marker, start_index)
-                if end_index > start_index:
-                    cleaned_response = cleaned_response[start_index:end_index].strip()
-            
-            parsed_response = json.loads(cleaned_response)
-            
+            letters = parse_cover_letters(response)
             return {
                 "cover_letter_id": str(uuid.uuid4()),
-                "short_version": parsed_response.get("short_version", ""),
-                "long_version": parsed_response.get("long_version", ""),
+                "short_version": letters.short_version,
+                "long_version": letters.long_version,
                 "created_at": datetime.utcnow()
             }
-        except json.JSONDecodeError:
+        except MalformedResponseError:
             # Fallback: treat as single cover letter
+            cleaned_response = str(response).strip()
             return {
                 "cover_letter_id": str(uuid.uuid4()),
                 "short_version": cleaned_response[:1000] + "..." if len(cleaned_response) > 1000 else cleaned_response,
@@ -603,7 +571,7 @@ Write with the precision of a Fortune 500 communications team and the insight of
             }
         
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Cover letter generation failed: {str(e)}")
+        raise classify_provider_exception(e) from e
 
 # API Routes
 
@@ -615,7 +583,14 @@ async def root():
         "endpoints": {
             "health": "/api/health",
             "analyze": "/api/analyze",
-            "generate_cover_letter": "/api/generate-cover-letter"
+            "analyze_batch": "/api/analyze/batch",
+            "analyze_stream": "/api/analyze/stream",
+            "ats_score": "/api/ats-score",
+            "generate_cover_letter": "/api/generate-cover-letter",
+            "jobs": "/api/jobs",
+            "jobs_match": "/api/jobs/match",
+            "postings": "/api/postings",
+            "export": "/api/export"
         }
     }
 
@@ -647,92 +622,450 @@ async def test_ai():
 async def health_check():
     return {"status": "healthy", "version": "1.0.0"}
 
+@app.get("/api/metrics")
+async def metrics():
+    """Runtime counters for the model-call layer"""
+    return {
+        "retry_budget": retry_budget.stats(),
+        "hedging": hedging_stats(),
+        "backends": model_router.status(),
+        "model_scheduler": model_scheduler.stats(),
+        "prompt_compression": compression_stats.as_dict(),
+        "context_cache": context_cache_stats.as_dict(),
+        "prompt_digests": digest_cache_stats(),
+        "job_queue": await job_queue.stats(),
+        "resume_store": resume_store.stats(),
+        "skills_taxonomy": taxonomy.stats(),
+        "job_index": job_index.stats(),
+        "near_duplicates": near_duplicates.stats(),
+        "analysis_cache": _analysis_results.stats(),
+        "scrape_cache": _scrapes.stats(),
+        "suggestion_anchoring": anchoring_stats.as_dict(),
+        "export": export_cache_stats(),
+        "cover_letter_speculation": cover_letter_speculator.stats()
+    }
+
+def get_stored_resume(resume_id: str):
+    stored = resume_store.get(resume_id)
+    if stored is None:
+        raise HTTPException(status_code=404, detail="Resume not found or upload session expired; upload it again via /api/resumes")
+    return stored
+
+async def read_resume_input(resume_text: Optional[str], resume_file: Optional[UploadFile], resume_id: Optional[str] = None) -> str:
+    """Extract resume text from an uploaded PDF/DOCX, a stored upload session or the pasted text"""
+    if resume_id:
+        return get_stored_resume(resume_id).text
+
+    if resume_file:
+        print(f"📁 Processing uploaded file: {resume_file.filename}")
+        
+        # Validate file type
+        if not resume_file.filename:
+            raise HTTPException(status_code=400, detail="No filename provided")
+        
+        file_ext = resume_file.filename.lower().split('.')[-1]
+        if file_ext not in ['pdf', 'docx']:
+            raise HTTPException(status_code=400, detail="Only PDF and DOCX files are supported")
+        
+        # Read file content
+        file_content = await resume_file.read()
+        
+        # Extract text based on file type
+        if file_ext == 'pdf':
+            processed_resume_text = extract_text_from_pdf(file_content)
+        else:
+            processed_resume_text = extract_text_from_docx(file_content)
+        
+        if not processed_resume_text.strip():
+            raise HTTPException(status_code=400, detail="No text could be extracted from the uploaded file")
+        return processed_resume_text
+            
+    if resume_text:
+        return resume_text.strip()
+    raise HTTPException(status_code=400, detail="One of resume_text, resume_file or resume_id must be provided")
+
+# Scraped postings by canonical URL, so tracking-parameter variants share one fetch
+_scrapes: TTLCache[tuple] = TTLCache(
+    max_items=int(os.environ.get("SCRAPE_CACHE_MAX_ITEMS", "500")),
+    ttl_seconds=float(os.environ.get("SCRAPE_CACHE_TTL", "3600"))
+)
+
+# Finished analyses by (job description hash, resume hash). Only an identical
+# job description reuses an analysis; near-duplicates share just the digest,
+# since a changed requirement line would otherwise go unanalyzed.
+# Requests with refresh=true always get a new analysis
+_analysis_results: TTLCache[dict] = TTLCache(
+    max_items=int(os.environ.get("AI_ANALYSIS_CACHE_MAX_ITEMS", "1000")),
+    ttl_seconds=float(os.environ.get("AI_ANALYSIS_CACHE_TTL", "3600"))
+)
+
+async def resolve_job_description(job_description: str) -> str:
+    """Scrape the posting when the job description is a bare URL"""
+    if is_url_only(job_description):
+        url = job_description.strip()
+        key = canonical_url(url)
+        cached = _scrapes.get(key)
+        if cached is not None:
+            first_url, text = cached
+            near_duplicates.record_reuse("scrape", first_url, url)
+            return text
+        print(f"🌐 Detected URL, scraping job description from: {job_description}")
+        # requests is blocking; keep it off the event loop
+        text = await asyncio.to_thread(scrape_job_description, url)
+        _scrapes.set(key, (url, text))
+        return text
+    return job_description
+
+def build_job_payload(job_description: str, resume_text: str, resume_file: Optional[UploadFile], resume_id: Optional[str] = None, refresh: bool = False) -> dict:
+    if resume_id:
+        stored = get_stored_resume(resume_id)
+        resume_source, file_type = stored.source, stored.file_type
+    else:
+        resume_source = "file" if resume_file else "text"
+        file_type = resume_file.filename.split('.')[-1] if resume_file else None
+    payload = {
+        "job_description": job_description,
+        "resume_text": resume_text,
+        "resume_source": resume_source,
+        "file_type": file_type
+    }
+    if resume_id:
+        payload["resume_id"] = resume_id
+    if refresh:
+        payload["refresh"] = True
+    return payload
+
+def retryable_error_detail(error: APIError) -> dict:
+    return {
+        "error_type": error.error_type,
+        "message": error.message,
+        "retryable": error.retryable,
+        "retry_after_seconds": error.retry_after_seconds,
+        "details": error.details
+    }
+
+async def resolve_analysis_inputs(payload: dict):
+    """Scrape if needed and validate that both inputs have content"""
+    processed_job_desc = payload.get("resolved_job_description") or await resolve_job_description(payload["job_description"])
+    processed_resume_text = payload["resume_text"]
+
+    # Validate we have both job description and resume
+    if not processed_job_desc.strip():
+        raise HTTPException(status_code=400, detail="Job description is required")
+    
+    if not processed_resume_text.strip():
+        raise HTTPException(status_code=400, detail="Resume content is required")
+    
+    print(f"✅ Processing analysis - Job desc: {len(processed_job_desc)} chars, Resume: {len(processed_resume_text)} chars")
+    return processed_job_desc, processed_resume_text
+
+async def run_analysis_job(payload: dict) -> dict:
+    """Job handler: scrape if needed, analyze, and build the /api/analyze response"""
+    processed_job_desc, processed_resume_text = await resolve_analysis_inputs(payload)
+    # Local keyword match first: it needs no model call
+    ats_score = score_resume(processed_job_desc, processed_resume_text).as_dict()
+    
+    cache_key = (content_hash(processed_job_desc), content_hash(processed_resume_text))
+    analysis = None if payload.get("refresh") else _analysis_results.get(cache_key)
+    if analysis is not None:
+        return await build_analysis_response(payload, processed_job_desc, processed_resume_text, analysis, ats_score, cached=True)
+
+    # Get AI analysis with retry capability
+    ai_result = await get_ai_response_with_retry(
+        processed_job_desc, 
+        processed_resume_text
+    )
+    
+    # Check if AI analysis was successful
+    if not ai_result.success:
+        # Return detailed error information for frontend to handle
+        raise HTTPException(status_code=503, detail=retryable_error_detail(ai_result.error))
+    
+    _analysis_results.set(cache_key, ai_result.data["analysis"])
+    return await build_analysis_response(payload, processed_job_desc, processed_resume_text, ai_result.data["analysis"], ats_score)
+
+async def build_analysis_response(payload: dict, processed_job_desc: str, processed_resume_text: str, analysis: dict, ats_score: dict, cached: bool = False) -> dict:
+    """The /api/analyze response for a finished analysis, persisted in the background"""
+    response = {
+        "analysis_id": str(uuid.uuid4()),
+        # True when the analysis was reused from an identical earlier request
+        "cached": cached,
+        "ats_score": ats_score,
+        # Fold skill aliases and drop gaps the resume covers under another name,
+        # then pin every suggestion to exact offsets in the resume
+        "analysis": anchor_analysis(taxonomy.canonicalize_analysis(analysis, processed_resume_text), processed_resume_text),
+        "original_resume": processed_resume_text,
+        "job_description": processed_job_desc,
+        "created_at": datetime.utcnow(),
+        "source_info": {
+            "job_source": "url" if is_url_only(payload["job_description"]) else "text",
+            "resume_source": payload["resume_source"],
+            "file_type": payload["file_type"]
+        }
+    }
+    # Persisted in the background: a slow or unreachable store must not delay the response
+    in_background(persist_analysis(response))
+    stored = resume_store.get(payload["resume_id"]) if payload.get("resume_id") else None
+    if stored is not None and stored.content_hash == content_hash(processed_resume_text):
+        # Lets /apply run straight away, before the background write lands
+        stored.last_analysis = (response["analysis_id"], response["analysis"])
+    if os.environ.get("JOB_INDEX_AUTO_ADD", "true").lower() == "true":
+        # Every analyzed posting becomes matchable via /api/jobs/match
+        job_index.add(
+            content_hash(processed_job_desc),
+            processed_job_desc,
+            source_url=payload["job_description"].strip() if is_url_only(payload["job_description"]) else None
+        )
+    return response
+
+def cover_letter_key(processed_job_desc: str, processed_resume_text: str) -> tuple:
+    # Exact texts only: a near-duplicate may name another company in its "About us"
+    return content_hash(processed_job_desc), content_hash(processed_resume_text)
+
+async def speculate_cover_letter(payload: dict, processed_job_desc: str, processed_resume_text: str):
+    """Queue the cover letter the user will most likely ask for next (COVER_LETTER_SPECULATION)"""
+    try:
+        await cover_letter_speculator.schedule(
+            cover_letter_key(processed_job_desc, processed_resume_text),
+            {**payload, "resolved_job_description": processed_job_desc, "resume_text": processed_resume_text}
+        )
+    except Exception as e:
+        # Speculation must never fail the analysis it follows
+        print(f"⚠️ Could not schedule speculative cover letter: {e}")
+
+async def run_speculative_cover_letter_job(payload: dict) -> Optional[dict]:
+    """Job handler: generate a cover letter nobody has asked for yet, if the limiter has room"""
+    processed_job_desc = payload["resolved_job_description"]
+    processed_resume_text = payload["resume_text"]
+    key = cover_letter_key(processed_job_desc, processed_resume_text)
+    if not cover_letter_speculator.should_run(key):
+        return None
+    started = time.monotonic()
+    # No retries: a failed guess is not worth more quota
+    result = await get_cover_letter_response_with_retry(processed_job_desc, processed_resume_text, max_retries=0)
+    if not result.success and result.error.error_type == PreemptedError.error_type:
+        # Dropped from the scheduler queue before any model call was made
+        cover_letter_speculator.preempted(key)
+        return None
+    cover_letter_speculator.finish(
+        key,
+        result.data if result.success else None,
+        started,
+        count_tokens(COVER_LETTER_SYSTEM_PROMPT) + count_tokens(processed_job_desc) + count_tokens(processed_resume_text)
+    )
+    return None
+
+async def run_cover_letter_job(payload: dict) -> dict:
+    """Job handler: scrape if needed and generate both cover letter versions"""
+    processed_job_desc = await resolve_job_description(payload["job_description"])
+    processed_resume_text = payload["resume_text"]
+
+    # Validate we have content
+    if not processed_job_desc.strip() or not processed_resume_text.strip():
+        raise HTTPException(status_code=400, detail="Both job description and resume content are required")
+
+    speculative = await cover_letter_speculator.claim(cover_letter_key(processed_job_desc, processed_resume_text))
+    if speculative is not None:
+        print("⚡ Serving speculatively generated cover letter")
+        in_background(persist_cover_letter(speculative, processed_job_desc, processed_resume_text))
+        return speculative
+    
+    # Generate cover letter with retry capability
+    result = await get_cover_letter_response_with_retry(
+        processed_job_desc,
+        processed_resume_text
+    )
+    
+    # Check if cover letter generation was successful
+    if not result.success:
+        # Return detailed error information for frontend to handle
+        raise HTTPException(status_code=503, detail=retryable_error_detail(result.error))
+    
+    in_background(persist_cover_letter(result.data, processed_job_desc, processed_resume_text))
+    return result.data
+
+job_queue.register("analysis", run_analysis_job)
+job_queue.register("cover_letter", run_cover_letter_job)
+job_queue.register(SPECULATIVE_KIND, run_speculative_cover_letter_job)
+
+@app.on_event("startup")
+async def start_job_queue():
+    await job_queue.start()
+
+@app.on_event("shutdown")
+async def stop_job_queue():
+    await job_queue.stop()
+    await flush_writes()
+    await analysis_store.close()
+
+@app.on_event("startup")
+async def connect_analysis_store():
+    try:
+        await analysis_store.connect()
+    except Exception as e:
+        # Analyses still work without persistence; saves are retried per request
+        print(f"⚠️ Analysis store unavailable at startup: {e}")
+
+@app.post("/api/resumes", status_code=201)
+async def upload_resume(
+    resume_text: Optional[str] = Form(None),
+    resume_file: Optional[UploadFile] = File(None)
+):
+    """Extract and normalize a resume once; later requests reference it by resume_id"""
+    processed_resume_text = await read_resume_input(resume_text, resume_file)
+    stored = resume_store.add(
+        processed_resume_text,
+        source="file" if resume_file else "text",
+        file_type=resume_file.filename.split('.')[-1] if resume_file else None,
+        filename=resume_file.filename if resume_file else None
+    )
+    return stored.public_view()
+
+@app.get("/api/resumes/{resume_id}")
+async def get_resume(resume_id: str):
+    """Stored resume text; each lookup extends the upload session"""
+    return get_stored_resume(resume_id).public_view()
+
+@app.post("/api/resumes/{resume_id}/apply")
+async def apply_resume_suggestions(
+    resume_id: str,
+    analysis_id: str = Form(...),
+    suggestion_ids: List[str] = Form([]),
+    toggle: bool = Form(False)
+):
+    """Apply a set of suggestions from one analysis to the stored resume in a single pass.
+
+    ``suggestion_ids`` is the full set to apply, or with ``toggle`` the ids to
+    flip relative to what was applied last.  ``changes`` holds one hunk per
+    suggestion that changed state, against the previously returned text.
+    """
+    stored = get_stored_resume(resume_id)
+    if stored.last_analysis is not None and stored.last_analysis[0] == analysis_id:
+        analysis = stored.last_analysis[1]
+    else:
+        record = await analysis_store.get_analysis(analysis_id)
+        if record is None:
+            raise HTTPException(status_code=404, detail="Analysis not found")
+        if record["resume_hash"] != stored.content_hash:
+            raise HTTPException(status_code=409, detail="The analysis was made for a different resume")
+        analysis = record["analysis"]
+    if any("anchor" not in suggestion for suggestion in analysis.get("suggestions") or []):
+        analysis = anchor_analysis(analysis, stored.text)  # stored before suggestions were anchored
+
+    # Accept repeated form fields or a single JSON array, like the batch endpoint
+    if len(suggestion_ids) == 1 and suggestion_ids[0].lstrip().startswith("["):
+        try:
+            suggestion_ids = [str(sid) for sid in json.loads(suggestion_ids[0])]
+        except json.JSONDecodeError:
+            raise HTTPException(status_code=400, detail="suggestion_ids must be a JSON array of strings")
+    previous = stored.applied
+    if toggle:
+        current = previous.applied if previous is not None and previous.analysis_id == analysis_id else []
+        flipped = set(suggestion_ids)
+        suggestion_ids = [sid for sid in current if sid not in flipped] + [sid for sid in suggestion_ids if sid not in current]
+
+    stored.applied, response = apply_suggestions(stored.text, analysis.get("suggestions") or [], suggestion_ids, previous, analysis_id)
+    return {"resume_id": resume_id, **response}
+
+@app.post("/api/ats-score")
+async def get_ats_score(
+    job_description: str = Form(...),
+    resume_text: Optional[str] = Form(None),
+    resume_file: Optional[UploadFile] = File(None),
+    resume_id: Optional[str] = Form(None)
+):
+    """Instant local keyword match score; no model call"""
+    processed_resume_text = await read_resume_input(resume_text, resume_file, resume_id)
+    processed_job_desc = await resolve_job_description(job_description)
+    if not processed_job_desc.strip():
+        raise HTTPException(status_code=400, detail="Job description is required")
+    return score_resume(processed_job_desc, processed_resume_text).as_dict()
+
+@app.on_event("startup")
+async def warm_job_index():
+    async def warm():
+        try:
+            added = await warm_from_store(analysis_store, int(os.environ.get("JOB_INDEX_WARM_LIMIT", "20000")))
+            print(f"🔎 Job index warmed with {added} stored postings")
+        except Exception as e:
+            print(f"⚠️ Could not warm job index from the analysis store: {e}")
+    asyncio.create_task(warm())
+
+@app.post("/api/postings", status_code=201)
+async def add_posting(
+    job_description: str = Form(...),
+    title: Optional[str] = Form(None)
+):
+    """Store a posting (text or URL) and add it to the job matching index"""
+    processed_job_desc = await resolve_job_description(job_description)
+    if not processed_job_desc.strip():
+        raise HTTPException(status_code=400, detail="Job description is required")
+    posting_id = await analysis_store.save_document("job_description", processed_job_desc)
+    # Re-adding a deleted posting makes it indexable again
+    await analysis_store.set_indexed(posting_id, True)
+    posting = job_index.add(
+        posting_id,
+        processed_job_desc,
+        title=title,
+        source_url=job_description.strip() if is_url_only(job_description) else None
+    )
+    return {**posting.public_view(include_text=False), "total_postings": len(job_index)}
+
+@app.get("/api/postings/{posting_id}")
+async def get_posting(posting_id: str):
+    posting = job_index.get(posting_id)
+    if posting is None:
+        raise HTTPException(status_code=404, detail="Posting not found")
+    return posting.public_view()
+
+@app.delete("/api/postings/{posting_id}")
+async def delete_posting(posting_id: str):
+    """Remove a posting from the matching index, also after restarts"""
+    removed = job_index.remove(posting_id)
+    # Flagged rather than deleted: stored analyses still reference the text
+    stored = await analysis_store.set_indexed(posting_id, False)
+    if not removed and not stored:
+        raise HTTPException(status_code=404, detail="Posting not found")
+    return {"posting_id": posting_id, "deleted": True, "total_postings": len(job_index)}
+
+@app.post("/api/jobs/match")
+async def match_jobs(
+    resume_text: Optional[str] = Form(None),
+    resume_file: Optional[UploadFile] = File(None),
+    resume_id: Optional[str] = Form(None),
+    top_k: int = Form(10)
+):
+    """Rank indexed postings for a resume locally (BM25 + hashed-vector cosine); no model call"""
+    processed_resume_text = await read_resume_input(resume_text, resume_file, resume_id)
+    top_k = max(1, min(top_k, int(os.environ.get("JOB_MATCH_MAX_TOP_K", "100"))))
+    started = time.perf_counter()
+    results = job_index.search(processed_resume_text, top_k)
+    return {
+        "results": results,
+        "total_postings": len(job_index),
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 2)
+    }
+
 @app.post("/api/analyze")
 async def analyze_resume(
     job_description: str = Form(...),
     resume_text: Optional[str] = Form(None),
-    resume_file: Optional[UploadFile] = File(None)
+    resume_file: Optional[UploadFile] = File(None),
+    resume_id: Optional[str] = Form(None),
+    compact: Optional[bool] = Form(None),
+    fields: Optional[str] = Form(None),
+    refresh: bool = Form(False)
 ):
     """Analyze resume against job description using AI - supports file upload and URL scraping"""
     try:
-        # Process job description (detect URL vs text)
-        processed_job_desc = job_description
-        if is_url_only(job_description):
-            print(f"🌐 Detected URL, scraping job description from: {job_description}")
-            processed_job_desc = scrape_job_description(job_description)
-        
-        # Process resume (file vs text)
-        processed_resume_text = ""
-        
-        if resume_file:
-            print(f"📁 Processing uploaded file: {resume_file.filename}")
-            
-            # Validate file type
-            if not resume_file.filename:
-                raise HTTPException(status_code=400, detail="No filename provided")
-            
-            file_ext = resume_file.filename.lower().split('.')[-1]
-            if file_ext not in ['pdf', 'docx']:
-                raise HTTPException(status_code=400, detail="Only PDF and DOCX files are supported")
-            
-            # Read file content
-            file_content = await resume_file.read()
-            
-            # Extract text based on file type
-            if file_ext == 'pdf':
-                processed_resume_text = extract_text_from_pdf(file_content)
-            elif file_ext == 'docx':
-                processed_resume_text = extract_text_from_docx(file_content)
-            
-            if not processed_resume_text.strip():
-                raise HTTPException(status_code=400, detail="No text could be extracted from the uploaded file")
-                
-        elif resume_text:
-            processed_resume_text = resume_text.strip()
-        else:
-            raise HTTPException(status_code=400, detail="Either resume_text or resume_file must be provided")
-        
-        # Validate we have both job description and resume
-        if not processed_job_desc.strip():
-            raise HTTPException(status_code=400, detail="Job description is required")
-        
-        if not processed_resume_text.strip():
-            raise HTTPException(status_code=400, detail="Resume content is required")
-        
-        print(f"✅ Processing analysis - Job desc: {len(processed_job_desc)} chars, Resume: {len(processed_resume_text)} chars")
-        
-        # Get AI analysis with retry capability
-        ai_result = await get_ai_response_with_retry(
-            processed_job_desc, 
-            processed_resume_text
-        )
-        
-        # Check if AI analysis was successful
-        if not ai_result.success:
-            # Return detailed error information for frontend to handle
-            raise HTTPException(
-                status_code=503,  # Service Unavailable
-                detail={
-                    "error_type": ai_result.error.error_type,
-                    "message": ai_result.error.message,
-                    "retryable": ai_result.error.retryable,
-                    "retry_after_seconds": ai_result.error.retry_after_seconds,
-                    "details": ai_result.error.details
-                }
-            )
-        
-        return {
-            "analysis_id": str(uuid.uuid4()),
-            "analysis": ai_result.data["analysis"],
-            "original_resume": processed_resume_text,
-            "job_description": processed_job_desc,
-            "created_at": datetime.utcnow(),
-            "source_info": {
-                "job_source": "url" if is_url_only(job_description) else "text",
-                "resume_source": "file" if resume_file else "text",
-                "file_type": resume_file.filename.split('.')[-1] if resume_file else None
-            }
-        }
+        processed_resume_text = await read_resume_input(resume_text, resume_file, resume_id)
+        payload = build_job_payload(job_description, processed_resume_text, resume_file, resume_id, refresh)
+        # Inline rather than through the job queue, so a full queue never blocks a waiting user
+        call_class.set(INTERACTIVE)
+        result = await run_analysis_job(payload)
+        await speculate_cover_letter(payload, result["job_description"], result["original_resume"])
+        # Returned as a response so FastAPI does not run jsonable_encoder over it first
+        return FastJSONResponse(shape_response(result, compact, fields))
         
     except HTTPException:
         raise
@@ -743,72 +1076,220 @@ async def analyze_resume(
 async def generate_cover_letter(
     job_description: str = Form(...),
     resume_text: Optional[str] = Form(None),
-    resume_file: Optional[UploadFile] = File(None)
+    resume_file: Optional[UploadFile] = File(None),
+    resume_id: Optional[str] = Form(None)
 ):
     """Generate a cover letter based on resume and job description - supports file upload and URL scraping"""
     try:
-        # Process job description (detect URL vs text)
-        processed_job_desc = job_description
-        if is_url_only(job_description):
-            processed_job_desc = scrape_job_description(job_description)
-        
-        # Process resume (file vs text)
-        processed_resume_text = ""
-        
-        if resume_file:
-            # Validate file type
-            if not resume_file.filename:
-                raise HTTPException(status_code=400, detail="No filename provided")
-            
-            file_ext = resume_file.filename.lower().split('.')[-1]
-            if file_ext not in ['pdf', 'docx']:
-                raise HTTPException(status_code=400, detail="Only PDF and DOCX files are supported")
-            
-            # Read file content
-            file_content = await resume_file.read()
-            
-            # Extract text based on file type
-            if file_ext == 'pdf':
-                processed_resume_text = extract_text_from_pdf(file_content)
-            elif file_ext == 'docx':
-                processed_resume_text = extract_text_from_docx(file_content)
-                
-        elif resume_text:
-            processed_resume_text = resume_text.strip()
-        else:
-            raise HTTPException(status_code=400, detail="Either resume_text or resume_file must be provided")
-        
-        # Validate we have content
-        if not processed_job_desc.strip() or not processed_resume_text.strip():
-            raise HTTPException(status_code=400, detail="Both job description and resume content are required")
-        
-        # Generate cover letter with retry capability
-        result = await get_cover_letter_response_with_retry(
-            processed_job_desc,
-            processed_resume_text
-        )
-        
-        # Check if cover letter generation was successful
-        if not result.success:
-            # Return detailed error information for frontend to handle
-            raise HTTPException(
-                status_code=503,  # Service Unavailable
-                detail={
-                    "error_type": result.error.error_type,
-                    "message": result.error.message,
-                    "retryable": result.error.retryable,
-                    "retry_after_seconds": result.error.retry_after_seconds,
-                    "details": result.error.details
-                }
-            )
-        
-        return result.data
+        processed_resume_text = await read_resume_input(resume_text, resume_file, resume_id)
+        payload = build_job_payload(job_description, processed_resume_text, resume_file, resume_id)
+        call_class.set(INTERACTIVE)
+        return await run_cover_letter_job(payload)
         
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/analyze/stream")
+async def analyze_resume_stream(
+    job_description: str = Form(...),
+    resume_text: Optional[str] = Form(None),
+    resume_file: Optional[UploadFile] = File(None),
+    resume_id: Optional[str] = Form(None),
+    compact: Optional[bool] = Form(None),
+    fields: Optional[str] = Form(None)
+):
+    """Facet-parallel analysis streamed as NDJSON: short facets as they land, suggestions one by one, then the full result"""
+    processed_resume_text = await read_resume_input(resume_text, resume_file, resume_id)
+    payload = build_job_payload(job_description, processed_resume_text, resume_file, resume_id)
+    processed_job_desc, processed_resume_text = await resolve_analysis_inputs(payload)
+    ats_score = score_resume(processed_job_desc, processed_resume_text).as_dict()
+    prompt_job_desc, prompt_resume_text = await prepare_analysis_inputs(processed_job_desc, processed_resume_text)
+    policy = RetryPolicy.from_env()
+
+    async def stream_events():
+        yield dumps_line({"event": "ats_score", "value": ats_score})
+        # Streamed suggestions are anchored as they arrive; the result is re-anchored as a whole
+        resume_index = ResumeIndex(processed_resume_text)
+        try:
+            async for facet, value in iter_facet_analysis(prompt_job_desc, prompt_resume_text, policy):
+                if facet == "analysis":
+                    response = await build_analysis_response(payload, processed_job_desc, processed_resume_text, value, ats_score)
+                    await speculate_cover_letter(payload, processed_job_desc, processed_resume_text)
+                    yield dumps_line({"event": "result", "result": shape_response(response, compact, fields)})
+                elif facet == "suggestion":
+                    value = anchor_suggestion(resume_index, value, record=False)
+                    if value["anchor"]["status"] == UNVERIFIED and drop_unanchored():
+                        continue
+                    yield dumps_line({"event": "suggestion", "value": value})
+                else:
+                    yield dumps_line({"event": "facet", "facet": facet, "value": value})
+        except ProviderError as e:
+            error = provider_error_to_api_error(e, "AI service error", policy)
+            yield dumps_line({"event": "error", "status_code": 503, "error": retryable_error_detail(error)})
+
+    return StreamingResponse(stream_events(), media_type="application/x-ndjson")
+
+def parse_job_description_list(job_descriptions: List[str]) -> List[str]:
+    """Accept repeated form fields or a single JSON array of JD texts/URLs"""
+    if len(job_descriptions) == 1 and job_descriptions[0].lstrip().startswith("["):
+        try:
+            job_descriptions = json.loads(job_descriptions[0])
+        except json.JSONDecodeError:
+            raise HTTPException(status_code=400, detail="job_descriptions must be a JSON array of strings")
+    # Blank entries are kept so result indexes line up with the request
+    cleaned = [str(jd) for jd in job_descriptions]
+    if not any(jd.strip() for jd in cleaned):
+        raise HTTPException(status_code=400, detail="At least one job description is required")
+    max_batch = int(os.environ.get("AI_BATCH_MAX_JOBS", "50"))
+    if len(cleaned) > max_batch:
+        raise HTTPException(status_code=400, detail=f"A batch may contain at most {max_batch} job descriptions")
+    return cleaned
+
+@app.post("/api/analyze/batch")
+async def analyze_resume_batch(
+    job_descriptions: List[str] = Form(...),
+    resume_text: Optional[str] = Form(None),
+    resume_file: Optional[UploadFile] = File(None),
+    resume_id: Optional[str] = Form(None),
+    compact: Optional[bool] = Form(None),
+    fields: Optional[str] = Form(None),
+    refresh: bool = Form(False)
+):
+    """Analyze one resume against many job descriptions, streaming NDJSON results as they complete"""
+    job_descriptions = parse_job_description_list(job_descriptions)
+    # Extract the resume once for the whole batch
+    processed_resume_text = await read_resume_input(resume_text, resume_file, resume_id)
+    parallelism = asyncio.Semaphore(int(os.environ.get("AI_BATCH_PARALLELISM", "4")))
+    scrape_slots = asyncio.Semaphore(int(os.environ.get("AI_BATCH_SCRAPE_PARALLELISM", "8")))
+
+    async def analyze_one(index: int, job_description: str) -> dict:
+        call_class.set(BATCH)
+        try:
+            async with scrape_slots:
+                resolved = await resolve_job_description(job_description)
+            payload = build_job_payload(job_description, processed_resume_text, resume_file, resume_id, refresh)
+            payload["resolved_job_description"] = resolved
+            async with parallelism:
+                result = await run_analysis_job(payload)
+            return {"index": index, "status": "succeeded", "result": shape_response(result, compact, fields)}
+        except HTTPException as e:
+            return {"index": index, "status": "failed", "status_code": e.status_code, "error": e.detail}
+        except Exception as e:
+            return {"index": index, "status": "failed", "status_code": 500, "error": str(e)}
+
+    async def stream_results():
+        tasks = [asyncio.ensure_future(analyze_one(i, jd)) for i, jd in enumerate(job_descriptions)]
+        succeeded = 0
+        try:
+            for finished in asyncio.as_completed(tasks):
+                item = await finished
+                succeeded += item["status"] == "succeeded"
+                yield dumps_line(item)
+            yield dumps_line({"done": True, "total": len(tasks), "succeeded": succeeded})
+        finally:
+            # Client went away: stop spending model calls on the rest of the batch
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
+@app.get("/api/analyses/{analysis_id}")
+async def get_analysis(analysis_id: str, compact: Optional[bool] = Query(None), fields: Optional[str] = Query(None)):
+    """Reload a stored analysis without regenerating it"""
+    stored = await load_analysis(analysis_id)
+    if stored is None:
+        raise HTTPException(status_code=404, detail="Analysis not found")
+    # Cheap to recompute, so it is not stored
+    stored["ats_score"] = score_resume(stored["job_description"], stored["original_resume"]).as_dict()
+    return FastJSONResponse(shape_response(stored, compact, fields))
+
+@app.post("/api/export")
+async def export_document(
+    request: Request,
+    format: str = Form(...),
+    kind: str = Form("resume"),
+    text: Optional[str] = Form(None),
+    resume_id: Optional[str] = Form(None),
+    cover_letter_id: Optional[str] = Form(None),
+    version: str = Form("long"),
+    filename: Optional[str] = Form(None)
+):
+    """Render a resume or cover letter to DOCX/PDF/TXT, streamed back in chunks.
+
+    The document is ``text``, or the stored resume (with any suggestions
+    applied through /apply), or one version of a stored cover letter.
+    """
+    file_format = format.lower()
+    if file_format not in MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail="format must be one of docx, pdf, txt")
+    if kind not in ("resume", "cover_letter"):
+        raise HTTPException(status_code=400, detail="kind must be resume or cover_letter")
+
+    if text is None and kind == "resume" and resume_id:
+        stored = get_stored_resume(resume_id)
+        text = stored.applied.text if stored.applied else stored.text
+    elif text is None and kind == "cover_letter" and cover_letter_id:
+        letters = await load_cover_letter(cover_letter_id)
+        if letters is None:
+            raise HTTPException(status_code=404, detail="Cover letter not found")
+        text = letters["short_version"] if version == "short" else letters["long_version"]
+    if not text or not text.strip():
+        raise HTTPException(status_code=400, detail="Nothing to export: send text, resume_id or cover_letter_id")
+
+    data, key = await asyncio.to_thread(render_document, kind, file_format, text)
+    headers = {"ETag": f'"{key}"'}
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=304, headers=headers)
+    name = re.sub(r"[^\w.-]+", "_", filename or ("optimized_resume" if kind == "resume" else f"cover_letter_{version}"))
+    headers["Content-Disposition"] = f'attachment; filename="{name}.{file_format}"'
+    headers["Content-Length"] = str(len(data))
+    return StreamingResponse(iter_chunks(data), media_type=MEDIA_TYPES[file_format], headers=headers)
+
+@app.get("/api/cover-letters/{cover_letter_id}")
+async def get_cover_letter(cover_letter_id: str):
+    """Reload stored cover letters without regenerating them"""
+    stored = await load_cover_letter(cover_letter_id)
+    if stored is None:
+        raise HTTPException(status_code=404, detail="Cover letter not found")
+    return stored
+
+# Internal kinds (speculative prefetches) are not accepted from clients
+SUBMITTABLE_JOB_KINDS = {"analysis", "cover_letter"}
+
+@app.post("/api/jobs", status_code=202)
+async def submit_job(
+    kind: str = Form(...),
+    job_description: str = Form(...),
+    resume_text: Optional[str] = Form(None),
+    resume_file: Optional[UploadFile] = File(None),
+    resume_id: Optional[str] = Form(None),
+    priority: int = Form(PRIORITY_NORMAL),
+    refresh: bool = Form(False)
+):
+    """Queue an 'analysis' or 'cover_letter' job and return immediately; poll GET /api/jobs/{job_id}"""
+    if kind not in SUBMITTABLE_JOB_KINDS:
+        raise HTTPException(status_code=400, detail=f"kind must be one of: {', '.join(sorted(SUBMITTABLE_JOB_KINDS))}")
+    # Queued jobs never outrank interactive requests
+    priority = min(max(priority, PRIORITY_NORMAL), PRIORITY_BATCH)
+    processed_resume_text = await read_resume_input(resume_text, resume_file, resume_id)
+    payload = build_job_payload(job_description, processed_resume_text, resume_file, resume_id, refresh)
+    job = await job_queue.submit(kind, payload, priority=priority)
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "poll_url": f"/api/jobs/{job.id}"
+    }
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Job status, plus the result (or error) once it has finished"""
+    job = await job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or result retention expired")
+    return job.public_view()
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8001)
\ No newline at end of file
@@ -0,0 +1,179 @@
+"""Skills taxonomy for canonicalizing skill names and keywords.
+
+Loaded once at startup from a versioned data file
+(``data/skills_taxonomy.json``, or ``SKILLS_TAXONOMY_PATH``).  Every canonical
+name and alias is tokenized with the shared matcher tokenizer and inserted
+into a token trie, so finding the skills in a text is a single left-to-right
+longest-match pass, O(tokens).
+
+The same index serves both directions:
+
+* inputs: ``canonical_tokens`` rewrites alias spans ("JS", "ReactJS",
+  "k8s") into one canonical token before the local ATS scorer matches them
+* outputs: ``canonicalize_analysis`` maps the model's ``skills_gap`` and
+  ``ats_keywords`` to canonical names, drops duplicates, and drops gaps the
+  resume already covers under a synonym
+"""
+import json
+import os
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set, Tuple
+
+from text_tokens import tokenize
+
+DEFAULT_TAXONOMY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "skills_taxonomy.json")
+
+# Words that may trail a skill name without changing which skill it is
+_FILLER = frozenset({"programming", "language", "languages", "framework", "frameworks", "development",
+                     "developer", "skills", "skill", "experience", "library", "platform", "tools", "basic",
+                     "advanced", "proficiency", "knowledge", "modern"})
+
+
+@dataclass
+class SkillMatch:
+    skill: int
+    start: int
+    end: int  # exclusive token index
+
+
+class _Node:
+    __slots__ = ("children", "skill")
+
+    def __init__(self):
+        self.children: Dict[str, "_Node"] = {}
+        self.skill: Optional[int] = None
+
+
+class SkillsTaxonomy:
+    def __init__(self, version: str, skills: List[dict]):
+        self.version = version
+        self.names: List[str] = []
+        self.categories: List[str] = []
+        self._root = _Node()
+        self.alias_count = 0
+        self.aliases_rewritten = 0
+        self.gaps_dropped = 0
+        for entry in skills:
+            index = len(self.names)
+            self.names.append(entry["canonical"])
+            self.categories.append(entry.get("category", ""))
+            terms = list(entry.get("aliases", []))
+            if entry.get("match_canonical", True):
+                terms.append(entry["canonical"])
+            for term in terms:
+                self._insert(term, index)
+
+    @classmethod
+    def load(cls, path: str) -> "SkillsTaxonomy":
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(str(data.get("version", "unversioned")), data.get("skills", []))
+
+    def _insert(self, term: str, skill: int):
+        node = self._root
+        for token, _ in tokenize(term):
+            node = node.children.setdefault(token, _Node())
+        if node is not self._root and node.skill is None:
+            node.skill = skill
+            self.alias_count += 1
+
+    def scan(self, tokens: List[str]) -> List[SkillMatch]:
+        """Longest non-overlapping skill matches, left to right"""
+        matches = []
+        position = 0
+        while position < len(tokens):
+            node, best = self._root, None
+            for offset in range(position, len(tokens)):
+                node = node.children.get(tokens[offset])
+                if node is None:
+                    break
+                if node.skill is not None:
+                    best = SkillMatch(node.skill, position, offset + 1)
+            if best is None:
+                position += 1
+            else:
+                matches.append(best)
+                position = best.end
+        return matches
+
+    @staticmethod
+    def skill_token(name: str) -> str:
+        return f"skill:{name.lower()}"
+
+    def canonical_tokens(self, pairs: List[Tuple[str, str]]) -> List[Tuple[str, str]]:
+        """Replace each skill span in a tokenized text by one canonical token"""
+        out: List[Tuple[str, str]] = []
+        position = 0
+        for match in self.scan([token for token, _ in pairs]):
+            out.extend(pairs[position:match.start])
+            name = self.names[match.skill]
+            out.append((self.skill_token(name), name))
+            position = match.end
+        out.extend(pairs[position:])
+        return out
+
+    def skills_in(self, text: str) -> Set[str]:
+        """Canonical names of every skill mentioned in ``text``"""
+        return {self.names[m.skill] for m in self.scan([token for token, _ in tokenize(text)])}
+
+    def canonicalize(self, term: str) -> str:
+        """Canonical name when ``term`` is one skill (plus version numbers or filler), else the term itself"""
+        pairs = tokenize(term)
+        matches = self.scan([token for token, _ in pairs])
+        if len(matches) != 1:
+            return term.strip()
+        match = matches[0]
+        rest = pairs[:match.start] + pairs[match.end:]
+        if all(any(c.isdigit() for c in token) or surface.lower() in _FILLER for token, surface in rest):
+            return self.names[match.skill]
+        return term.strip()
+
+    def canonicalize_terms(self, terms: List[str]) -> List[str]:
+        """Canonicalize and drop duplicates, keeping the first occurrence's position"""
+        seen: Set[str] = set()
+        result = []
+        for term in terms:
+            canonical = self.canonicalize(term)
+            if canonical != term.strip():
+                self.aliases_rewritten += 1
+            key = canonical.lower()
+            if canonical and key not in seen:
+                seen.add(key)
+                result.append(canonical)
+        return result
+
+    def canonicalize_analysis(self, analysis: dict, resume_text: str) -> dict:
+        """Canonical, deduplicated ``ats_keywords`` and ``skills_gap``; gaps the resume covers are dropped"""
+        resume_skills = self.skills_in(resume_text)
+        gaps = self.canonicalize_terms(analysis.get("skills_gap") or [])
+        kept_gaps = [gap for gap in gaps if gap not in resume_skills]
+        self.gaps_dropped += len(gaps) - len(kept_gaps)
+        return {
+            **analysis,
+            "skills_gap": kept_gaps,
+            "ats_keywords": self.canonicalize_terms(analysis.get("ats_keywords") or []),
+        }
+
+    def stats(self) -> dict:
+        return {
+            "version": self.version,
+            "skills": len(self.names),
+            "aliases": self.alias_count,
+            "aliases_rewritten": self.aliases_rewritten,
+            "gaps_dropped": self.gaps_dropped,
+        }
+
+
+def load_taxonomy() -> SkillsTaxonomy:
+    path = os.environ.get("SKILLS_TAXONOMY_PATH", DEFAULT_TAXONOMY_PATH)
+    try:
+        loaded = SkillsTaxonomy.load(path)
+    except (OSError, ValueError, KeyError) as e:
+        # Matching still works without it, just without alias folding
+        print(f"⚠️ Could not load skills taxonomy from {path}: {e}")
+        return SkillsTaxonomy("none", [])
+    print(f"🧠 Loaded skills taxonomy {loaded.version}: {len(loaded.names)} skills, {loaded.alias_count} aliases")
+    return loaded
+
+
+taxonomy = load_taxonomy()
@@ -0,0 +1,159 @@
+"""Speculative cover letter generation after an analysis.
+
+Most users who run an analysis click "Generate Cover Letter" next, with the
+same inputs, and wait another 10-20 seconds.  With
+``COVER_LETTER_SPECULATION=true`` a successful analysis queues a cover letter
+job at ``PRIORITY_SPECULATIVE`` with the already-scraped job description, as
+long as the model scheduler has ``COVER_LETTER_SPECULATION_MIN_FREE_SLOTS``
+slots nobody is using or waiting for (checked again when a worker picks the
+job up, so speculation never competes with real requests for model calls).
+
+Finished letters wait in a generation cache keyed by (job description hash,
+resume hash) for ``COVER_LETTER_SPECULATION_TTL`` seconds.  The follow-up
+request takes the letter out of the cache (so "regenerate" still gets a new
+one), joins the speculative call if it is already running, or cancels it if
+it has not started yet.  Spend (calls, estimated prompt tokens, seconds) and
+hit rate are reported under ``cover_letter_speculation`` in ``/api/metrics``.
+"""
+import os
+import time
+from typing import Dict, Optional, Set, Tuple
+
+from job_queue import PRIORITY_SPECULATIVE, QUEUED, RUNNING, SUCCEEDED, job_queue
+from model_client import model_headroom
+from ttl_cache import TTLCache
+
+SPECULATIVE_KIND = "cover_letter_speculative"
+# A speculative job that cannot start this quickly is no longer ahead of the user
+QUEUE_EXPIRY_SECONDS = 120
+
+Key = Tuple[str, str]
+
+
+class CoverLetterSpeculator:
+    def __init__(self, enabled: bool, min_free_slots: int, max_items: int, ttl_seconds: float):
+        self.enabled = enabled
+        self.min_free_slots = min_free_slots
+        self._letters: TTLCache[dict] = TTLCache(max_items=max_items, ttl_seconds=ttl_seconds)
+        self._pending: Dict[Key, str] = {}  # key -> speculative job id
+        self._cancelled: Set[Key] = set()
+        self.scheduled = 0
+        self.skipped: Dict[str, int] = {}
+        self.generated = 0
+        self.failed = 0
+        self.served = 0
+        self.joined = 0
+        self.cancelled = 0
+        self.spend = {"calls": 0, "prompt_tokens": 0, "seconds": 0.0}
+
+    def _skip(self, reason: str):
+        self.skipped[reason] = self.skipped.get(reason, 0) + 1
+
+    def has_headroom(self) -> bool:
+        return model_headroom() >= self.min_free_slots
+
+    async def _pending_job(self, key: Key):
+        """The queued or running speculative job for ``key``, forgetting ones that expired"""
+        job_id = self._pending.get(key)
+        job = await job_queue.get(job_id) if job_id else None
+        if job is not None and job.status in (QUEUED, RUNNING):
+            return job
+        self._pending.pop(key, None)
+        self._cancelled.discard(key)
+        return None
+
+    async def schedule(self, key: Key, payload: dict):
+        """Queue a speculative cover letter for ``key`` unless there is no room or no need"""
+        if not self.enabled:
+            return
+        if key in self._letters or await self._pending_job(key) is not None:
+            self._skip("already_speculated")
+            return
+        if not self.has_headroom():
+            self._skip("no_headroom")
+            return
+        job = await job_queue.submit(SPECULATIVE_KIND, payload, priority=PRIORITY_SPECULATIVE,
+                                     expiry_seconds=QUEUE_EXPIRY_SECONDS)
+        self._pending[key] = job.id
+        self.scheduled += 1
+
+    def should_run(self, key: Key) -> bool:
+        """Checked by the job handler right before it spends a model call"""
+        if key in self._cancelled:
+            self._cancelled.discard(key)
+            self._pending.pop(key, None)
+            return False
+        if not self.has_headroom():
+            self._skip("no_headroom_at_start")
+            self._pending.pop(key, None)
+            return False
+        return True
+
+    def preempted(self, key: Key):
+        self._pending.pop(key, None)
+        self._skip("preempted")
+
+    def finish(self, key: Key, letters: Optional[dict], started: float, prompt_tokens: int):
+        """Record one speculative model call and keep its result"""
+        self._pending.pop(key, None)
+        self.spend["calls"] += 1
+        self.spend["prompt_tokens"] += prompt_tokens
+        self.spend["seconds"] += time.monotonic() - started
+        if letters is None:
+            self.failed += 1
+            return
+        self.generated += 1
+        self._letters.set(key, letters)
+
+    async def claim(self, key: Key) -> Optional[dict]:
+        """The speculative letters for ``key``, waiting for them if they are being generated"""
+        if not self.enabled:
+            return None
+        letters = self._letters.pop(key)
+        if letters is not None:
+            self.served += 1
+            return letters
+        job = await self._pending_job(key)
+        if job is None:
+            return None
+        if key in self._cancelled:
+            return None
+        if job.status == QUEUED:
+            # Not started: the real request is about to make the same call
+            self._cancelled.add(key)
+            self.cancelled += 1
+            return None
+        if job.status == RUNNING:
+            job = await job_queue.wait(job.id)
+            if job.status == SUCCEEDED:
+                letters = self._letters.pop(key)
+                if letters is not None:
+                    self.joined += 1
+                    return letters
+        return None
+
+    def stats(self) -> dict:
+        hits = self.served + self.joined
+        return {
+            "enabled": self.enabled,
+            "scheduled": self.scheduled,
+            "skipped": self.skipped,
+            "generated": self.generated,
+            "failed": self.failed,
+            "cancelled": self.cancelled,
+            "served": self.served,
+            "joined": self.joined,
+            # Share of generated letters a user actually received
+            "hit_rate": round(hits / self.generated, 3) if self.generated else 0.0,
+            "spend": {**self.spend, "seconds": round(self.spend["seconds"], 2)},
+            "cached": len(self._letters),
+            "pending": len(self._pending),
+        }
+
+
+cover_letter_speculator = CoverLetterSpeculator(
+    enabled=os.environ.get("COVER_LETTER_SPECULATION", "false").lower() == "true",
+    min_free_slots=int(os.environ.get("COVER_LETTER_SPECULATION_MIN_FREE_SLOTS", "2")),
+    max_items=int(os.environ.get("COVER_LETTER_SPECULATION_MAX_ITEMS", "500")),
+    ttl_seconds=float(os.environ.get("COVER_LETTER_SPECULATION_TTL", "1800")),
+)
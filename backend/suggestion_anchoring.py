@@ -0,0 +1,225 @@
+"""Resolve each suggestion's ``current_text`` to character offsets in the resume.
+
+The model is told to quote resume text verbatim, but quotes come back with
+collapsed whitespace, curly quotes, missing bullets, a reworded word or two,
+or text that is not in the resume at all.  Every suggestion is located once
+on the server so clients can apply it as a splice at known offsets instead
+of guessing with string search:
+
+1. exact: the quote occurs verbatim
+2. normalized: it occurs once whitespace, case, quote/dash variants and
+   bullet characters are normalized (offsets are mapped back to the original)
+3. fuzzy: the best token window, found with a sliding overlap count and
+   refined with ``difflib``, reaches ``SUGGESTION_ANCHOR_MIN_SIMILARITY``
+
+Resolved suggestions get ``current_text`` replaced by the exact resume text
+and an ``anchor`` with ``start``/``end`` offsets.  Quotes that cannot be
+located are flagged (``"status": "unverified"``, no offsets) or dropped with
+``SUGGESTION_UNANCHORED=drop``.  Suggestions without ``current_text`` add new
+content and are marked ``"new"``.  Occurrences already claimed by an earlier
+suggestion are skipped, so two suggestions never share a span.  Every
+suggestion also gets a stable ``id`` that ``/api/resumes/{id}/apply`` takes.
+"""
+import hashlib
+import os
+import re
+from difflib import SequenceMatcher
+from typing import Dict, List, Optional, Tuple
+
+from text_tokens import lower_preserving_offsets
+
+EXACT = "exact"
+NORMALIZED = "normalized"
+FUZZY = "fuzzy"
+NEW = "new"
+UNVERIFIED = "unverified"
+
+_CHAR_MAP = str.maketrans({
+    "\u2018": "'", "\u2019": "'", "\u201c": '"', "\u201d": '"',
+    "\u2013": "-", "\u2014": "-", "\u2212": "-", "\u00a0": " ",
+})
+_BULLETS = set("\u2022\u25aa\u25cf\u25e6\u2023\u2043\u00b7*")
+_WORD = re.compile(r"\w+")
+
+
+def _normalize_with_positions(text: str) -> Tuple[str, List[int]]:
+    """Normalized text plus, for each of its characters, the offset it came from"""
+    chars: List[str] = []
+    positions: List[int] = []
+    pending_space = False
+    for index, char in enumerate(text.translate(_CHAR_MAP)):
+        if char.isspace() or char in _BULLETS:
+            pending_space = bool(chars)
+            continue
+        if pending_space:
+            chars.append(" ")
+            positions.append(index - 1)
+            pending_space = False
+        # One character per position, even where lowercasing adds one ("\u0130")
+        chars.append(lower_preserving_offsets(char))
+        positions.append(index)
+    return "".join(chars), positions
+
+
+class ResumeIndex:
+    """Normalized copy and word spans of one resume, built once per analysis"""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.normalized, self._positions = _normalize_with_positions(text)
+        self._spans = [(m.start(), m.end()) for m in _WORD.finditer(text)]
+        self._words = [text[start:end].lower() for start, end in self._spans]
+        self._claimed: List[Tuple[int, int]] = []
+
+    def _free(self, start: int, end: int) -> bool:
+        return all(end <= s or start >= e for s, e in self._claimed)
+
+    def claim(self, start: int, end: int):
+        self._claimed.append((start, end))
+
+    def find_exact(self, quote: str) -> Optional[Tuple[int, int]]:
+        start = self.text.find(quote)
+        while start != -1:
+            if self._free(start, start + len(quote)):
+                return start, start + len(quote)
+            start = self.text.find(quote, start + 1)
+        return None
+
+    def find_normalized(self, quote: str) -> Optional[Tuple[int, int]]:
+        needle, _ = _normalize_with_positions(quote)
+        if not needle:
+            return None
+        at = self.normalized.find(needle)
+        while at != -1:
+            start, end = self._positions[at], self._positions[at + len(needle) - 1] + 1
+            if self._free(start, end):
+                return start, end
+            at = self.normalized.find(needle, at + 1)
+        return None
+
+    def find_fuzzy(self, quote: str, min_similarity: float) -> Optional[Tuple[int, int, float]]:
+        needle = [word.lower() for word in _WORD.findall(quote)]
+        size = len(needle)
+        if not size or size > len(self._words):
+            return None
+        wanted = set(needle)
+        hits = [1 if word in wanted else 0 for word in self._words]
+
+        # Sliding overlap count picks a handful of candidate windows in O(n)
+        windows = []
+        overlap = sum(hits[:size])
+        for start in range(len(hits) - size + 1):
+            if start:
+                overlap += hits[start + size - 1] - hits[start - 1]
+            if overlap >= size * min_similarity:
+                windows.append((overlap, start))
+        windows.sort(key=lambda w: (-w[0], w[1]))
+
+        slack = max(2, size // 4)
+        best = None
+        for _, start in windows[:5]:
+            lo, hi = max(0, start - slack), min(len(self._words), start + size + slack)
+            blocks = [b for b in SequenceMatcher(None, self._words[lo:hi], needle, autojunk=False).get_matching_blocks()
+                      if b.size]
+            if not blocks:
+                continue
+            first, last = lo + blocks[0].a, lo + blocks[-1].a + blocks[-1].size
+            matched = sum(b.size for b in blocks)
+            similarity = 2 * matched / ((last - first) + size)
+            span = (self._spans[first][0], self._spans[last - 1][1])
+            if similarity >= min_similarity and self._free(*span) and (best is None or similarity > best[2]):
+                best = (span[0], span[1], similarity)
+        if best is None:
+            return None
+        start, end, similarity = best
+        # Keep closing punctuation ("%.", ").") the quote also ends with
+        tail = re.search(r"[^\w\s]*$", quote.rstrip()).group()
+        if tail and self.text[end:end + len(tail)] == tail:
+            end += len(tail)
+        return start, end, round(similarity, 3)
+
+
+class AnchoringStats:
+    def __init__(self):
+        self.counts: Dict[str, int] = {EXACT: 0, NORMALIZED: 0, FUZZY: 0, NEW: 0, UNVERIFIED: 0}
+        self.dropped = 0
+
+    def as_dict(self) -> dict:
+        located = self.counts[EXACT] + self.counts[NORMALIZED] + self.counts[FUZZY]
+        quoted = located + self.counts[UNVERIFIED]
+        return {
+            **self.counts,
+            "dropped": self.dropped,
+            "located_rate": round(located / quoted, 3) if quoted else 0.0,
+        }
+
+
+anchoring_stats = AnchoringStats()
+
+
+def suggestion_id(suggestion: dict) -> str:
+    """Stable id of a suggestion within its analysis"""
+    anchor = suggestion.get("anchor") or {}
+    key = "\x1f".join(str(part) for part in (
+        suggestion.get("section"), suggestion.get("current_text"), suggestion.get("suggested_text"), anchor.get("start")))
+    return hashlib.blake2b(key.encode("utf-8"), digest_size=5).hexdigest()
+
+
+def _min_similarity() -> float:
+    return float(os.environ.get("SUGGESTION_ANCHOR_MIN_SIMILARITY", "0.8"))
+
+
+def drop_unanchored() -> bool:
+    return os.environ.get("SUGGESTION_UNANCHORED", "flag").lower() == "drop"
+
+
+def anchor_suggestion(index: ResumeIndex, suggestion: dict, record: bool = True) -> dict:
+    """``suggestion`` with ``anchor`` set and ``current_text`` replaced by the located resume text"""
+    quote = suggestion.get("current_text")
+    anchor = {"status": NEW if not quote else UNVERIFIED, "start": None, "end": None, "similarity": None}
+    if quote:
+        found = index.find_exact(quote)
+        if found:
+            anchor.update(status=EXACT, similarity=1.0)
+        else:
+            found = index.find_normalized(quote)
+            if found:
+                anchor.update(status=NORMALIZED, similarity=1.0)
+            else:
+                fuzzy = index.find_fuzzy(quote, _min_similarity())
+                if fuzzy:
+                    found = fuzzy[:2]
+                    anchor.update(status=FUZZY, similarity=fuzzy[2])
+        if found:
+            index.claim(*found)
+            anchor.update(start=found[0], end=found[1])
+    if record:
+        anchoring_stats.counts[anchor["status"]] += 1
+
+    anchored = {**suggestion, "anchor": anchor}
+    if anchor["start"] is not None:
+        anchored["current_text"] = index.text[anchor["start"]:anchor["end"]]
+    anchored["id"] = suggestion_id(anchored)
+    return anchored
+
+
+def anchor_analysis(analysis: dict, resume_text: str) -> dict:
+    """Anchor every suggestion; unverified quotes are flagged or dropped"""
+    index = ResumeIndex(resume_text)
+    # Higher-priority suggestions claim contested spans first
+    order = sorted(range(len(analysis.get("suggestions") or [])),
+                   key=lambda i: analysis["suggestions"][i].get("priority", 5))
+    anchored: Dict[int, dict] = {i: anchor_suggestion(index, analysis["suggestions"][i]) for i in order}
+    suggestions = [anchored[i] for i in sorted(anchored)]
+    seen: Dict[str, int] = {}
+    for suggestion in suggestions:
+        # Identical new-content suggestions would otherwise share an id
+        count = seen.get(suggestion["id"], 0)
+        seen[suggestion["id"]] = count + 1
+        if count:
+            suggestion["id"] = f"{suggestion['id']}-{count + 1}"
+    if drop_unanchored():
+        kept = [s for s in suggestions if s["anchor"]["status"] != UNVERIFIED]
+        anchoring_stats.dropped += len(suggestions) - len(kept)
+        suggestions = kept
+    return {**analysis, "suggestions": suggestions}
@@ -0,0 +1,44 @@
+"""Tokenizer shared by the local (no model call) text matchers."""
+import re
+from typing import List, Tuple
+
+_TOKEN = re.compile(r"[a-z0-9][a-z0-9+#]*(?:[./-][a-z0-9+#]+)*")
+
+
+def normalize_token(token: str) -> str:
+    """Light suffix folding, applied to both sides: "designed"/"designing"/"designs" -> "design".
+
+    The result is only a match key; terms are reported in their original form.
+    """
+    token = token.strip(".-/")
+    if len(token) > 4 and token.endswith("s") and not token.endswith(("ss", "us", "is")):
+        token = token[:-1]
+    if len(token) > 5 and token.endswith("ing"):
+        token = token[:-3]
+    elif len(token) > 4 and token.endswith("ed"):
+        token = token[:-2]
+    if len(token) > 4 and token.endswith("e"):
+        token = token[:-1]
+    return token
+
+
+def lower_preserving_offsets(text: str) -> str:
+    """``text.lower()`` with one character per input character, so offsets still index ``text``.
+
+    A few characters lowercase to more than one ("\u0130" -> "i\u0307"); those keep their first.
+    """
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        return lowered
+    return "".join(char.lower()[0] for char in text)
+
+
+def tokenize(text: str) -> List[Tuple[str, str]]:
+    """(normalized token, surface form) pairs in document order"""
+    pairs = []
+    for match in _TOKEN.finditer(lower_preserving_offsets(text)):
+        surface = text[match.start():match.end()].strip(".-/")
+        normalized = normalize_token(match.group())
+        if normalized:
+            pairs.append((normalized, surface))
+    return pairs
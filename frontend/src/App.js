@@ -1,7 +1,5 @@
 import React, { useState, useRef, useCallback } from 'react';
 import './App.css';
-import { Document, Packer, Paragraph, TextRun } from 'docx';
-import jsPDF from 'jspdf';
 
 const API_BASE_URL = process.env.REACT_APP_BACKEND_URL;
 
@@ -304,11 +302,65 @@ function App() {
     }
   };
 
+  // Rebuild the optimized resume from the original text and the applied suggestions.
+  // Anchors are offsets into original_resume that never overlap, so one sorted splice
+  // applies any set of suggestions exactly, whatever order they were toggled in.
+  const composeFromAnchors = (original, suggestions, applied) => {
+    const edits = [];
+    const additions = [];
+    suggestions.forEach((suggestion, index) => {
+      if (!applied.has(index)) return;
+      const anchor = suggestion.anchor || {};
+      if (anchor.start !== null && anchor.start !== undefined) {
+        edits.push({ start: anchor.start, end: anchor.end, text: suggestion.suggested_text || '' });
+      } else {
+        additions.push(suggestion);
+      }
+    });
+    edits.sort((a, b) => a.start - b.start);
+
+    let text = '';
+    let cursor = 0;
+    for (const edit of edits) {
+      text += original.slice(cursor, edit.start) + edit.text;
+      cursor = edit.end;
+    }
+    text += original.slice(cursor);
+
+    // New content and quotes the server could not locate have no offsets
+    for (const suggestion of additions) {
+      const label = suggestion.current_text
+        ? `${(suggestion.section || 'General').toUpperCase()} IMPROVEMENT`
+        : `NEW ${(suggestion.section || 'Additional').toUpperCase()}`;
+      text += `\n\n[${label}]\n${suggestion.suggested_text}`;
+    }
+    return text;
+  };
+
   // Apply or remove suggestion with IMPROVED handling
   const toggleSuggestion = (index, suggestion) => {
     console.log('🔧 toggleSuggestion called:', { index, suggestion, appliedSuggestions: appliedSuggestions.has(index) });
     
     const newApplied = new Set(appliedSuggestions);
+
+    const original = analysisResult?.original_resume;
+    const suggestions = getSuggestions();
+    const anchored = original && suggestions.every(s => s.anchor);
+    // Offsets are only valid while the text is exactly what the applied set produces,
+    // i.e. the resume has not been edited by hand since
+    if (anchored && (optimizedResume || original) === composeFromAnchors(original, suggestions, appliedSuggestions)) {
+      if (newApplied.has(index)) {
+        newApplied.delete(index);
+      } else {
+        newApplied.add(index);
+      }
+      setOptimizedResume(composeFromAnchors(original, suggestions, newApplied));
+      setAppliedSuggestions(newApplied);
+      console.log('🎯 Applied suggestions by anchor:', newApplied.size, 'total applied');
+      return;
+    }
+
+    // Legacy analyses without anchors, or a hand-edited resume: fall back to text matching
     
     if (appliedSuggestions.has(index)) {
       // Remove suggestion - revert back to original
@@ -665,6 +717,31 @@ function App() {
     setCurrentStep(0);
   };
 
+  // DOCX and PDF files are rendered by the backend (/api/export)
+  const downloadExport = async (kind, format, text, fileName) => {
+    const formData = new FormData();
+    formData.append('kind', kind);
+    formData.append('format', format);
+    formData.append('text', text);
+    formData.append('filename', fileName);
+
+    const response = await fetch(`${API_BASE_URL}/api/export`, {
+      method: 'POST',
+      body: formData,
+    });
+    if (!response.ok) {
+      throw new Error(`Export failed with status ${response.status}`);
+    }
+
+    const blob = await response.blob();
+    const element = document.createElement('a');
+    element.href = URL.createObjectURL(blob);
+    element.download = `${fileName}.${format}`;
+    document.body.appendChild(element);
+    element.click();
+    document.body.removeChild(element);
+  };
+
   // Download resume with format options
   const downloadResume = async (format = 'txt') => {
     const resumeContent = optimizedResume || analysisResult?.original_resume || resumeText;
@@ -677,63 +754,12 @@ function App() {
       document.body.appendChild(element);
       element.click();
       document.body.removeChild(element);
-    } else if (format === 'docx') {
-      try {
-        // Split resume content into paragraphs
-        const paragraphs = resumeContent.split('\n').map(line => {
-          return new Paragraph({
-            children: [new TextRun(line || ' ')], // Handle empty lines
-          });
-        });
-
-        // Create document
-        const doc = new Document({
-          sections: [{
-            properties: {},
-            children: paragraphs,
-          }],
-        });
-
-        // Generate and download
-        const buffer = await Packer.toBlob(doc);
-        const element = document.createElement('a');
-        element.href = URL.createObjectURL(buffer);
-        element.download = 'optimized_resume.docx';
-        document.body.appendChild(element);
-        element.click();
-        document.body.removeChild(element);
-      } catch (error) {
-        console.error('Error creating DOCX:', error);
-        alert('Error creating DOCX file. Please try TXT format.');
-      }
-    } else if (format === 'pdf') {
+    } else {
       try {
-        const pdf = new jsPDF();
-        
-        // Set font
-        pdf.setFont('helvetica', 'normal');
-        pdf.setFontSize(11);
-        
-        // Split content into lines that fit on page
-        const lines = pdf.splitTextToSize(resumeContent, 180); // 180mm width
-        
-        let y = 20; // Starting Y position
-        const lineHeight = 6;
-        const maxY = 280; // Max Y before new page
-        
-        lines.forEach((line) => {
-          if (y > maxY) {
-            pdf.addPage();
-            y = 20;
-          }
-          pdf.text(line, 15, y); // 15mm left margin
-          y += lineHeight;
-        });
-        
-        pdf.save('optimized_resume.pdf');
+        await downloadExport('resume', format, resumeContent, 'optimized_resume');
       } catch (error) {
-        console.error('Error creating PDF:', error);
-        alert('Error creating PDF file. Please try TXT format.');
+        console.error(`Error creating ${format.toUpperCase()}:`, error);
+        alert(`Error creating ${format.toUpperCase()} file. Please try TXT format.`);
       }
     }
   };
@@ -751,63 +777,12 @@ function App() {
       document.body.appendChild(element);
       element.click();
       document.body.removeChild(element);
-    } else if (format === 'docx') {
-      try {
-        // Split cover letter content into paragraphs
-        const paragraphs = coverLetterText.split('\n').map(line => {
-          return new Paragraph({
-            children: [new TextRun(line || ' ')], // Handle empty lines
-          });
-        });
-
-        // Create document
-        const doc = new Document({
-          sections: [{
-            properties: {},
-            children: paragraphs,
-          }],
-        });
-
-        // Generate and download
-        const buffer = await Packer.toBlob(doc);
-        const element = document.createElement('a');
-        element.href = URL.createObjectURL(buffer);
-        element.download = `${fileName}.docx`;
-        document.body.appendChild(element);
-        element.click();
-        document.body.removeChild(element);
-      } catch (error) {
-        console.error('Error creating DOCX:', error);
-        alert('Error creating DOCX file. Please try TXT format.');
-      }
-    } else if (format === 'pdf') {
+    } else {
       try {
-        const pdf = new jsPDF();
-        
-        // Set font
-        pdf.setFont('helvetica', 'normal');
-        pdf.setFontSize(11);
-        
-        // Split content into lines that fit on page
-        const lines = pdf.splitTextToSize(coverLetterText, 180); // 180mm width
-        
-        let y = 20; // Starting Y position
-        const lineHeight = 6;
-        const maxY = 280; // Max Y before new page
-        
-        lines.forEach((line) => {
-          if (y > maxY) {
-            pdf.addPage();
-            y = 20;
-          }
-          pdf.text(line, 15, y); // 15mm left margin
-          y += lineHeight;
-        });
-        
-        pdf.save(`${fileName}.pdf`);
+        await downloadExport('cover_letter', format, coverLetterText, fileName);
       } catch (error) {
-        console.error('Error creating PDF:', error);
-        alert('Error creating PDF file. Please try TXT format.');
+        console.error(`Error creating ${format.toUpperCase()}:`, error);
+        alert(`Error creating ${format.toUpperCase()} file. Please try TXT format.`);
       }
     }
   };
@@ -0,0 +1,17 @@
+"""Shared test setup.
+
+Backend modules are flat imports from ``backend/``, and every model call goes
+to the in-process mock backend, so the suite runs offline and quickly.
+"""
+import os
+import sys
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend")
+sys.path.insert(0, BACKEND_DIR)
+
+os.environ.setdefault("AI_MODEL_BACKENDS", "mock:default")
+os.environ.setdefault("MOCK_LLM_LATENCY", "fixed:0.01")
+os.environ.setdefault("MOCK_LLM_TAIL_PROB", "0")
+os.environ.setdefault("MOCK_LLM_SEED", "7")
+os.environ.setdefault("ANALYSIS_STORE", "memory")
+os.environ.setdefault("AI_CONTEXT_CACHE", "false")
@@ -0,0 +1,36 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import server
+from ttl_cache import TTLCache
+
+JOB_DESCRIPTION = ("Senior Python Engineer\n"
+                   + "We need Python, FastAPI, AWS and Kubernetes experience building services. " * 5)
+RESUME = "Jane Doe\nPython engineer with FastAPI and Docker.\n"
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(server, "_analysis_results", TTLCache(max_items=100, ttl_seconds=3600))
+    return TestClient(server.app)
+
+
+def analyze(client, job_description=JOB_DESCRIPTION, **extra):
+    response = client.post("/api/analyze", data={"job_description": job_description, "resume_text": RESUME, **extra})
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_identical_request_reuses_the_analysis(client):
+    assert analyze(client)["cached"] is False
+    assert analyze(client)["cached"] is True
+
+
+def test_refresh_skips_the_cache(client):
+    analyze(client)
+    assert analyze(client, refresh="true")["cached"] is False
+
+
+def test_near_duplicate_posting_is_analyzed_again(client):
+    analyze(client)
+    assert analyze(client, JOB_DESCRIPTION + "\nPosted 2024-01-02")["cached"] is False
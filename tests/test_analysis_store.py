@@ -0,0 +1,180 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+
+import analysis_store
+from analysis_store import MemoryAnalysisStore, MongoAnalysisStore, StoreUnavailableError, content_hash
+
+
+def collect(iterator):
+    async def run():
+        return [item async for item in iterator]
+    return asyncio.run(run())
+
+
+def test_documents_are_stored_once_and_compressed():
+    store = MemoryAnalysisStore(compress_threshold=100)
+    long_text = "Led a team of engineers. " * 40
+
+    async def scenario():
+        first = await store.save_document("resume", long_text)
+        again = await store.save_document("resume", "  " + long_text + "\n")
+        assert first == again == content_hash(long_text)
+        assert store._documents[first]["encoding"] == "zlib"
+        assert await store.get_document(first) == long_text
+
+    asyncio.run(scenario())
+
+
+def test_unindexed_documents_are_skipped_when_asked():
+    store = MemoryAnalysisStore()
+
+    async def scenario():
+        kept = await store.save_document("job_description", "Backend Engineer")
+        removed = await store.save_document("job_description", "Data Engineer")
+        assert await store.set_indexed(removed, False)
+        assert not await store.set_indexed("missing", False)
+        return kept, removed
+
+    kept, removed = asyncio.run(scenario())
+    assert [d for d, _ in collect(store.iter_documents("job_description", 10))] == [removed, kept]
+    assert [d for d, _ in collect(store.iter_documents("job_description", 10, indexed_only=True))] == [kept]
+
+
+def test_memory_store_is_bounded():
+    store = MemoryAnalysisStore(max_items=2)
+
+    async def scenario():
+        for index in range(3):
+            await store.save_analysis({"_id": str(index), "job_hash": "j", "resume_hash": "r", "created_at": index})
+        return [await store.get_analysis(str(index)) for index in range(3)]
+
+    first, second, third = asyncio.run(scenario())
+    assert first is None and second["_id"] == "1" and third["_id"] == "2"
+
+
+def test_memory_store_evicts_records_with_their_documents(monkeypatch):
+    store = MemoryAnalysisStore(max_items=3)
+    monkeypatch.setattr(analysis_store, "analysis_store", store)
+
+    def response(index, resume):
+        return {"analysis_id": f"a{index}", "analysis": {}, "original_resume": resume,
+                "job_description": f"Job {index}", "created_at": datetime(2024, 1, 1 + index), "source_info": None}
+
+    async def scenario():
+        await analysis_store.persist_analysis(response(0, "Jane Doe"))
+        await analysis_store.persist_analysis(response(1, "John Roe"))
+        # Reuses the oldest resume, which must survive for the new record
+        await analysis_store.persist_analysis(response(2, "Jane Doe"))
+        return [await analysis_store.load_analysis(f"a{index}") for index in range(3)]
+
+    first, second, third = asyncio.run(scenario())
+    assert first is None and second is None
+    assert third["original_resume"] == "Jane Doe" and third["job_description"] == "Job 2"
+    assert len(store._documents) <= 3
+
+
+def test_load_analysis_is_none_when_a_text_is_missing(monkeypatch):
+    store = MemoryAnalysisStore()
+    monkeypatch.setattr(analysis_store, "analysis_store", store)
+
+    async def scenario():
+        resume_hash = await store.save_document("resume", "Jane Doe")
+        await store.save_analysis({"_id": "a1", "analysis": {}, "resume_hash": resume_hash, "job_hash": "gone",
+                                   "created_at": datetime(2024, 1, 1)})
+        return await analysis_store.load_analysis("a1")
+
+    assert asyncio.run(scenario()) is None
+
+
+def test_persist_and_load_round_trip(monkeypatch):
+    monkeypatch.setattr(analysis_store, "analysis_store", MemoryAnalysisStore())
+    response = {"analysis_id": "a1", "analysis": {"suggestions": []}, "original_resume": "Jane Doe",
+                "job_description": "Backend Engineer", "created_at": datetime(2024, 1, 1), "source_info": None}
+
+    async def scenario():
+        await analysis_store.persist_analysis(response)
+        return await analysis_store.load_analysis("a1")
+
+    loaded = asyncio.run(scenario())
+    assert loaded["original_resume"] == "Jane Doe" and loaded["job_description"] == "Backend Engineer"
+
+
+class _DownCollection:
+    def __init__(self, calls):
+        self.calls = calls
+
+    async def create_index(self, *args, **kwargs):
+        self.calls.append(1)
+        raise ConnectionError("server selection timed out")
+
+
+class _DownDatabase:
+    def __init__(self, calls):
+        self.documents = self.analyses = self.cover_letters = _DownCollection(calls)
+
+
+class _DownClient:
+    def __init__(self):
+        self.calls = []
+
+    def __getitem__(self, name):
+        return _DownDatabase(self.calls)
+
+
+def test_unreachable_mongo_fails_fast_with_growing_backoff(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(analysis_store.time, "monotonic", lambda: now[0])
+    store = MongoAnalysisStore("mongodb://nowhere", "test", retry_backoff=5, max_backoff=12)
+    store._client = _DownClient()
+
+    with pytest.raises(StoreUnavailableError) as failure:
+        asyncio.run(store.get_analysis("a1"))
+    assert isinstance(failure.value.__cause__, ConnectionError) and failure.value.retry_after == 5
+    with pytest.raises(StoreUnavailableError):
+        asyncio.run(store.get_analysis("a1"))
+    assert len(store._client.calls) == 1  # the second call never reached the server
+
+    now[0] += 5.1
+    with pytest.raises(StoreUnavailableError):
+        asyncio.run(store.save_analysis({"_id": "a1"}))
+    assert store._down_until - now[0] == 10  # doubled
+    now[0] += 10.1
+    with pytest.raises(StoreUnavailableError):
+        asyncio.run(store.get_analysis("a1"))
+    assert store._down_until - now[0] == 12  # capped
+
+
+def test_persist_never_raises_while_the_store_is_down(monkeypatch):
+    store = MongoAnalysisStore("mongodb://nowhere", "test")
+    store._client = _DownClient()
+    monkeypatch.setattr(analysis_store, "analysis_store", store)
+    response = {"analysis_id": "a1", "analysis": {}, "original_resume": "r", "job_description": "j",
+                "created_at": datetime(2024, 1, 1)}
+
+    async def scenario():
+        task = analysis_store.in_background(analysis_store.persist_analysis(response))
+        await analysis_store.flush_writes()
+        return task
+
+    assert asyncio.run(scenario()).exception() is None
+
+
+def test_endpoints_answer_503_while_the_store_is_down(monkeypatch):
+    import server
+
+    store = MongoAnalysisStore("mongodb://nowhere", "test", retry_backoff=30)
+    store._client = _DownClient()
+    monkeypatch.setattr(analysis_store, "analysis_store", store)
+    monkeypatch.setattr(server, "analysis_store", store)
+    client = TestClient(server.app)
+
+    for response in (client.get("/api/analyses/a1"), client.get("/api/cover-letters/c1"),
+                     client.delete("/api/postings/p1")):
+        assert response.status_code == 503
+        assert 1 <= int(response.headers["retry-after"]) <= 30
+        detail = response.json()["detail"]
+        assert detail["error_type"] == "store_unavailable" and detail["retryable"] is True
+    assert len(store._client.calls) == 1
@@ -0,0 +1,60 @@
+import random
+
+from fastapi.testclient import TestClient
+
+import server
+from mock_llm import mock_llm
+from ats_scorer import AhoCorasick, extract_keywords, score_resume
+
+JOB_DESCRIPTION = """Frontend Engineer
+Requirements
+- 3+ years of JavaScript and React
+- Experience with Kubernetes and PostgreSQL
+- Strong JavaScript testing skills
+Benefits
+- Free snacks and gym membership"""
+
+
+def brute_force_counts(patterns, tokens):
+    counts = {}
+    for index, pattern in enumerate(patterns):
+        for start in range(len(tokens) - len(pattern) + 1):
+            if tuple(tokens[start:start + len(pattern)]) == pattern:
+                counts[index] = counts.get(index, 0) + 1
+    return counts
+
+
+def test_automaton_matches_brute_force_on_overlapping_patterns():
+    patterns = [("a", "b"), ("b",), ("a", "b", "c"), ("b", "c"), ("c", "a", "b"), ("a", "a")]
+    automaton = AhoCorasick(patterns)
+    generator = random.Random(3)
+    for _ in range(200):
+        tokens = [generator.choice("abcd") for _ in range(generator.randint(0, 30))]
+        assert automaton.count(tokens) == brute_force_counts(patterns, tokens)
+
+
+def test_keywords_skip_boilerplate_sections_and_weight_requirements():
+    keywords = {k.display: k.weight for k in extract_keywords(JOB_DESCRIPTION)}
+    assert "snacks" not in keywords and "gym" not in keywords
+    assert keywords["JavaScript"] > keywords["Frontend"]
+
+
+def test_aliases_match_the_canonical_skill():
+    score = score_resume(JOB_DESCRIPTION, "Built JS apps with React.js. Tested JS code.")
+    matched = {item["term"]: item["count"] for item in score.matched}
+    assert matched["JavaScript"] == 2 and "React" in matched
+    assert {item["term"] for item in score.missing} >= {"Kubernetes", "PostgreSQL"}
+    assert 0 < score.score < 100
+
+
+def test_full_coverage_scores_100():
+    resume = "Frontend Engineer. JavaScript, React, Kubernetes, PostgreSQL, testing."
+    assert score_resume(JOB_DESCRIPTION, resume).score == 100
+
+
+def test_endpoint_answers_without_a_model_call():
+    client = TestClient(server.app)
+    calls = mock_llm.calls
+    response = client.post("/api/ats-score", data={"job_description": JOB_DESCRIPTION, "resume_text": "React developer"})
+    assert response.status_code == 200 and response.json()["matched"][0]["term"] == "React"
+    assert mock_llm.calls == calls
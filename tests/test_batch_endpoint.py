@@ -0,0 +1,52 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+import server
+
+RESUME = "Jane Doe\nBuilt Python services handling 10k requests per second.\n"
+POSTINGS = [
+    "Backend Engineer\nPython, PostgreSQL and Kubernetes experience required for our payments team.",
+    "Data Engineer\nSpark, Airflow and Python experience required for our analytics team.",
+]
+
+
+@pytest.fixture
+def client():
+    return TestClient(server.app)
+
+
+def batch(client, job_descriptions, **extra):
+    response = client.post("/api/analyze/batch",
+                           data={"job_descriptions": job_descriptions, "resume_text": RESUME, **extra})
+    return response, [json.loads(line) for line in response.text.splitlines() if line]
+
+
+def test_one_line_per_posting_then_a_summary(client):
+    response, lines = batch(client, POSTINGS)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    results, summary = lines[:-1], lines[-1]
+    assert sorted(item["index"] for item in results) == [0, 1]
+    assert all(item["status"] == "succeeded" for item in results)
+    assert summary == {"done": True, "total": 2, "succeeded": 2}
+
+
+def test_json_array_input_and_blank_entries_keep_their_index(client):
+    _, lines = batch(client, [json.dumps([POSTINGS[0], "  "])])
+    failed = [item for item in lines[:-1] if item["status"] == "failed"]
+    assert [item["index"] for item in failed] == [1] and failed[0]["status_code"] == 400
+    assert lines[-1]["succeeded"] == 1
+
+
+def test_results_can_be_compact(client):
+    _, lines = batch(client, POSTINGS[:1], compact="true")
+    result = lines[0]["result"]
+    assert "original_resume" not in result and "resume_hash" in result
+
+
+def test_batch_size_is_limited(client, monkeypatch):
+    monkeypatch.setenv("AI_BATCH_MAX_JOBS", "1")
+    response, _ = batch(client, POSTINGS)
+    assert response.status_code == 400
@@ -0,0 +1,80 @@
+import json
+
+import bulk_analyze
+
+POSTING = "Backend Engineer\nPython, PostgreSQL and Kubernetes experience required for our payments team."
+
+
+def write_inputs(tmp_path, rows):
+    (tmp_path / "jane.txt").write_text("Jane Doe\nBuilt Python services handling 10k requests per second.\n")
+    manifest = tmp_path / "manifest.jsonl"
+    manifest.write_text("".join(json.dumps(row) + "\n" for row in rows))
+    return manifest
+
+
+def run_cli(tmp_path, manifest):
+    output = tmp_path / "results.jsonl"
+    code = bulk_analyze.main([str(manifest), "--resumes-dir", str(tmp_path), "--output", str(output)])
+    return code, [json.loads(line) for line in output.read_text().splitlines()]
+
+
+def test_results_are_written_and_checkpointed(tmp_path):
+    manifest = write_inputs(tmp_path, [
+        {"id": "a", "resume": "jane.txt", "job_description": POSTING},
+        {"id": "b", "resume": "jane.txt", "job_description": POSTING, "kind": "cover_letter"},
+    ])
+    code, records = run_cli(tmp_path, manifest)
+    assert code == 0
+    assert {record["id"]: record["status"] for record in records} == {"a": "succeeded", "b": "succeeded"}
+    assert set((tmp_path / "results.jsonl.checkpoint").read_text().split()) == {"a", "b"}
+
+
+def test_rerun_skips_finished_pairs_and_retries_failures(tmp_path):
+    manifest = write_inputs(tmp_path, [
+        {"id": "ok", "resume": "jane.txt", "job_description": POSTING},
+        {"id": "missing", "resume": "nobody.txt", "job_description": POSTING},
+    ])
+    code, records = run_cli(tmp_path, manifest)
+    assert code == 1 and len(records) == 2
+    code, records = run_cli(tmp_path, manifest)
+    # Only the failed pair ran again
+    assert [record["id"] for record in records[2:]] == ["missing"]
+
+
+def test_manifest_ids_default_to_a_stable_hash(tmp_path):
+    path = tmp_path / "manifest.csv"
+    path.write_text("resume,job_description\njane.txt,Backend Engineer\n")
+    first, second = bulk_analyze.load_manifest(str(path)), bulk_analyze.load_manifest(str(path))
+    assert first[0]["id"] == second[0]["id"] and first[0]["kind"] == "analysis"
+
+
+def test_interrupted_output_line_is_ignored(tmp_path):
+    output = tmp_path / "results.jsonl"
+    output.write_text('{"id": "a", "status": "succeeded"}\n{"id": "b", "sta')
+    assert bulk_analyze.load_finished_ids(str(tmp_path / "none.checkpoint"), str(output)) == {"a"}
+
+
+def test_every_reported_result_reaches_the_store(tmp_path, monkeypatch):
+    import asyncio
+
+    import analysis_store
+
+    store = analysis_store.MemoryAnalysisStore()
+    save_analysis = store.save_analysis
+
+    async def slow_save(record):
+        await asyncio.sleep(0.05)  # still in flight when the last result is reported
+        await save_analysis(record)
+
+    monkeypatch.setattr(store, "save_analysis", slow_save)
+    monkeypatch.setattr(analysis_store, "analysis_store", store)
+    manifest = write_inputs(tmp_path, [
+        {"id": f"p{index}", "resume": "jane.txt", "job_description": f"{POSTING}\nTeam {index}."} for index in range(5)
+    ])
+    code, records = run_cli(tmp_path, manifest)
+    assert code == 0
+
+    async def stored():
+        return [await analysis_store.load_analysis(record["result"]["analysis_id"]) for record in records]
+
+    assert all(record is not None for record in asyncio.run(stored()))
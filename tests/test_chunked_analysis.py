@@ -0,0 +1,59 @@
+import asyncio
+
+from chunked_analysis import reduce_analyses, run_chunked_analysis, split_resume
+from prompt_compression import count_tokens
+from response_schemas import Analysis, Suggestion
+
+RESUME = "\n".join(
+    ["Jane Doe", "", "Experience"]
+    + [f"- Built Python service number {i} handling payments at scale with PostgreSQL." for i in range(40)]
+    + ["", "Skills", "Python, PostgreSQL, Docker", "", "Education", "BSc Computer Science"]
+)
+
+
+def test_chunks_respect_the_budget_and_keep_every_line():
+    chunks = split_resume(RESUME, chunk_tokens=150)
+    assert len(chunks) > 1
+    assert all(count_tokens(chunk) <= 150 + 10 for chunk in chunks)
+    joined = "\n".join(chunks)
+    assert all(line in joined for line in RESUME.splitlines() if line)
+    # Sections split between lines repeat their heading
+    assert sum(chunk.startswith("Experience") for chunk in chunks) > 1
+
+
+def test_short_resume_is_one_chunk():
+    [chunk] = split_resume("Jane Doe\nBuilt Python services.", chunk_tokens=1500)
+    assert "Jane Doe" in chunk and "Built Python services." in chunk
+
+
+def suggestion(current, priority, impact="Medium"):
+    return Suggestion(current_text=current, suggested_text=f"better {current}", priority=priority, impact_level=impact)
+
+
+def test_reduce_dedupes_suggestions_and_drops_covered_gaps():
+    parts = [
+        Analysis(suggestions=[suggestion("Built Python service number 1", 4)], skills_gap=["Docker", "Kafka"],
+                 ats_keywords=["Python", "Kafka"], overall_score="60/100 - ok"),
+        Analysis(suggestions=[suggestion("built  python service number 1", 2, "High"), suggestion("BSc", 7)],
+                 skills_gap=["Kafka"], ats_keywords=["Python", "Docker"], overall_score="80/100 - good"),
+    ]
+    merged = reduce_analyses(parts, RESUME)
+    assert [(s.priority, s.impact_level) for s in merged.suggestions] == [(2, "High"), (7, "Medium")]
+    # Docker is in the Skills section, which the first chunk did not see
+    assert merged.skills_gap == ["Kafka"]
+    assert merged.ats_keywords == ["Python", "Kafka", "Docker"]
+    # Best part 80, coverage 2 of 3 keywords (67) -> 74
+    assert merged.overall_score.startswith("74/100")
+
+
+def test_run_chunked_analysis_maps_every_chunk(monkeypatch):
+    monkeypatch.setenv("AI_CHUNK_TOKENS", "150")
+    seen = []
+
+    async def analyze_chunk(job_description, chunk):
+        seen.append(chunk)
+        return {"skills_gap": [], "suggestions": [], "ats_keywords": ["Python"], "overall_score": "70/100"}
+
+    result = asyncio.run(run_chunked_analysis("Backend Engineer", RESUME, analyze_chunk))
+    assert len(seen) == len(split_resume(RESUME, 150))
+    assert result["ats_keywords"] == ["Python"]
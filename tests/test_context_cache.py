@@ -0,0 +1,39 @@
+import asyncio
+
+from context_cache import ContextCacheRegistry
+
+PROMPT = "You are a resume analyst. " * 50
+
+
+def registry():
+    return ContextCacheRegistry(enabled=True, ttl_seconds=3600, refresh_margin=300)
+
+
+def test_disabled_registry_never_creates_caches():
+    cache = ContextCacheRegistry(enabled=False, ttl_seconds=3600, refresh_margin=300)
+    assert cache.lookup("gemini-2.0-flash", "key-a", PROMPT) is None
+    assert not cache._creating
+
+
+def test_refusal_is_remembered_per_model_and_key(monkeypatch):
+    cache = registry()
+
+    def refuse(api_key):
+        if api_key == "key-a":
+            raise RuntimeError("caching not supported for this project")
+        return object()
+
+    monkeypatch.setattr(cache, "_client", refuse)
+
+    async def scenario():
+        assert cache.lookup("gemini-2.0-flash", "key-a", PROMPT) is None
+        await asyncio.gather(*cache._creating.values())
+        # Same model and key: skipped without another attempt
+        assert cache.lookup("gemini-2.0-flash", "key-a", PROMPT) is None
+        assert not cache._creating
+        # Another key for the same model is still tried
+        cache.lookup("gemini-2.0-flash", "key-b", PROMPT)
+        assert len(cache._creating) == 1
+        await asyncio.gather(*cache._creating.values(), return_exceptions=True)
+
+    asyncio.run(scenario())
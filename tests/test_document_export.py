@@ -0,0 +1,98 @@
+import io
+
+import pypdfium2
+from docx import Document
+from fastapi.testclient import TestClient
+from pdfminer.high_level import extract_text
+
+import document_export
+import server
+from document_export import (BULLET, HEADING, PDF_TEMPLATE, TEXT, TITLE, _text_width, _wrap, iter_chunks,
+                             letter_blocks, render_document, render_pdf, resume_blocks)
+
+RESUME = """Jane Doe
+jane@example.com
+EXPERIENCE
+- Led the (payments) rewrite – cut latency by 40%
+• Shipped café ordering on iOS
+SKILLS
+Python, Go"""
+
+
+def test_resume_blocks_find_title_headings_and_bullets():
+    kinds = [(block.kind, block.text) for block in resume_blocks(RESUME)]
+    assert kinds == [
+        (TITLE, "Jane Doe"),
+        (TEXT, "jane@example.com"),
+        (HEADING, "EXPERIENCE"),
+        (BULLET, "Led the (payments) rewrite – cut latency by 40%"),
+        (BULLET, "Shipped café ordering on iOS"),
+        (HEADING, "SKILLS"),
+        (TEXT, "Python, Go"),
+    ]
+    assert [b.kind for b in letter_blocks("Dear team,\n\n\nThanks.")] == [TEXT, "blank", TEXT]
+
+
+def test_wrap_respects_the_line_width():
+    text = "word " * 60 + "x" * 200
+    lines = _wrap(text, "F1", 10.5, 300)
+    assert all(_text_width(line, "F1", 10.5) <= 300 for line in lines)
+    assert "".join(lines).replace(" ", "") == text.replace(" ", "")
+
+
+def test_pdf_is_valid_and_keeps_the_text():
+    pdf = render_pdf(resume_blocks(RESUME))
+    assert pdf.startswith(b"%PDF-1.4") and pdf.rstrip().endswith(b"%%EOF")
+    extracted = extract_text(io.BytesIO(pdf))
+    for fragment in ("Jane Doe", "EXPERIENCE", "Led the (payments) rewrite – cut latency by 40%",
+                     "café ordering", "Python, Go"):
+        assert fragment in extracted
+    document = pypdfium2.PdfDocument(pdf)
+    width, height = document[0].get_size()
+    assert (round(width), round(height)) == (round(PDF_TEMPLATE.page_width), round(PDF_TEMPLATE.page_height))
+
+
+def test_long_documents_break_across_pages():
+    text = "Jane Doe\nEXPERIENCE\n" + "\n".join(f"- Achievement number {i}" for i in range(200))
+    pdf = render_pdf(resume_blocks(text))
+    document = pypdfium2.PdfDocument(pdf)
+    assert len(document) > 1
+    extracted = extract_text(io.BytesIO(pdf))
+    assert "Achievement number 0" in extracted and "Achievement number 199" in extracted
+
+
+def test_docx_uses_the_template_styles():
+    data, _ = render_document("resume", "docx", RESUME)
+    paragraphs = [(p.style.name, p.text) for p in Document(io.BytesIO(data)).paragraphs]
+    assert ("Title", "Jane Doe") in paragraphs
+    assert ("Heading 1", "SKILLS") in paragraphs
+    assert ("List Bullet", "Shipped café ordering on iOS") in paragraphs
+
+
+def test_renders_are_cached_by_content():
+    before = document_export.export_stats.renders
+    first, key = render_document("cover_letter", "pdf", "Dear team,\nUnique letter for the cache test.")
+    second, same_key = render_document("cover_letter", "pdf", "Dear team,\nUnique letter for the cache test.")
+    assert first == second and key == same_key
+    assert document_export.export_stats.renders - before == 1
+    assert render_document("resume", "pdf", "Dear team,\nUnique letter for the cache test.")[1] != key
+    assert b"".join(iter_chunks(first, 100)) == first
+
+
+def test_export_endpoint_streams_and_honours_etags():
+    client = TestClient(server.app)
+    response = client.post("/api/export", data={"format": "pdf", "text": RESUME, "filename": "Jane Doe CV"})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/pdf"
+    assert response.headers["content-disposition"] == 'attachment; filename="Jane_Doe_CV.pdf"'
+    assert "Jane Doe" in extract_text(io.BytesIO(response.content))
+
+    etag = response.headers["etag"]
+    again = client.post("/api/export", data={"format": "pdf", "text": RESUME}, headers={"If-None-Match": etag})
+    assert again.status_code == 304
+
+    resume_id = client.post("/api/resumes", data={"resume_text": RESUME}).json()["resume_id"]
+    text = client.post("/api/export", data={"format": "txt", "resume_id": resume_id})
+    assert text.text == RESUME
+    assert client.post("/api/export", data={"format": "rtf", "text": RESUME}).status_code == 400
+    assert client.post("/api/export", data={"format": "pdf"}).status_code == 400
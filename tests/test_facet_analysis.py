@@ -0,0 +1,40 @@
+import asyncio
+import json
+
+from fastapi.testclient import TestClient
+
+import server
+from facet_analysis import iter_facet_analysis, run_facet_analysis
+
+JOB_DESCRIPTION = "Backend Engineer\nPython, PostgreSQL and Kubernetes experience required for our payments team."
+RESUME = ("Jane Doe\nBuilt Python services handling 10k requests per second.\n"
+          "Migrated a monolith to Docker containers across three regions.\n")
+
+
+def test_facets_merge_into_one_analysis():
+    analysis = asyncio.run(run_facet_analysis(JOB_DESCRIPTION, RESUME))
+    assert set(analysis) >= {"ats_keywords", "skills_gap", "overall_score", "suggestions"}
+    assert "Kubernetes" in analysis["skills_gap"]
+    assert len(analysis["suggestions"]) == 2
+
+
+def test_suggestions_stream_before_the_merged_result():
+    async def collect():
+        return [event async for event in iter_facet_analysis(JOB_DESCRIPTION, RESUME)]
+
+    events = asyncio.run(collect())
+    names = [name for name, _ in events]
+    assert names[-1] == "analysis"
+    assert names.count("suggestion") == 2
+    assert {"ats_keywords", "skills_gap", "overall_score"} <= set(names)
+
+
+def test_stream_endpoint_sends_score_first_and_result_last():
+    client = TestClient(server.app)
+    response = client.post("/api/analyze/stream", data={"job_description": JOB_DESCRIPTION, "resume_text": RESUME})
+    lines = [json.loads(line) for line in response.text.splitlines() if line]
+    assert lines[0]["event"] == "ats_score"
+    assert lines[-1]["event"] == "result"
+    suggestions = [line["value"] for line in lines if line["event"] == "suggestion"]
+    # Streamed suggestions are already anchored to the resume
+    assert suggestions and all(s["anchor"]["status"] == "exact" for s in suggestions)
@@ -0,0 +1,108 @@
+import asyncio
+
+import pytest
+
+from hedging import HedgeBudget, Hedger, LatencyTracker
+
+
+def make_hedger(min_delay=0.02, ratio=1.0, samples=(0.01,) * 5):
+    hedger = Hedger(enabled=True, percentile=95, min_samples=5, min_delay=min_delay, budget=HedgeBudget(ratio=ratio))
+    for seconds in samples:
+        hedger.latency.record(seconds)
+    return hedger
+
+
+def scripted(*durations, fail=()):
+    """make_call whose n-th call sleeps ``durations[n]`` and raises if n is in ``fail``"""
+    calls = []
+
+    async def make_call():
+        attempt = len(calls)
+        calls.append(attempt)
+        await asyncio.sleep(durations[attempt])
+        if attempt in fail:
+            raise RuntimeError(f"attempt {attempt} failed")
+        return attempt
+
+    return make_call, calls
+
+
+def test_percentile():
+    tracker = LatencyTracker()
+    for seconds in range(1, 101):
+        tracker.record(seconds)
+    assert tracker.percentile(50) == 51 and tracker.percentile(95) == 95
+
+
+def test_no_hedge_until_enough_samples():
+    hedger = make_hedger(samples=())
+    make_call, calls = scripted(0.05)
+    assert asyncio.run(hedger.call(make_call)) == 0
+    assert len(calls) == 1 and hedger.stats.hedges_fired == 0
+
+
+def test_slow_primary_loses_to_the_hedge():
+    hedger = make_hedger()
+    make_call, calls = scripted(0.5, 0.01)
+    assert asyncio.run(hedger.call(make_call)) == 1
+    assert hedger.stats.hedges_fired == 1 and hedger.stats.hedge_wins == 1
+
+
+def test_fast_primary_never_hedges():
+    hedger = make_hedger(min_delay=0.2)
+    make_call, calls = scripted(0.01)
+    assert asyncio.run(hedger.call(make_call)) == 0
+    assert len(calls) == 1
+
+
+def test_failed_hedge_falls_back_to_the_primary():
+    hedger = make_hedger()
+    make_call, _ = scripted(0.08, 0.01, fail={1})
+    assert asyncio.run(hedger.call(make_call)) == 0
+    assert hedger.stats.primary_wins_after_hedge == 1
+
+
+def test_both_failing_raises_the_primary_error():
+    hedger = make_hedger()
+    make_call, _ = scripted(0.05, 0.01, fail={0, 1})
+    with pytest.raises(RuntimeError, match="attempt 0"):
+        asyncio.run(hedger.call(make_call))
+
+
+def test_budget_denies_extra_hedges():
+    budget = HedgeBudget(ratio=0.1)
+    for _ in range(10):
+        budget.record_call()
+    assert budget.try_acquire() is True
+    assert budget.try_acquire() is False
+
+
+@pytest.mark.parametrize("capacity, hedged", [(2, True), (1, False)])
+def test_hedge_needs_its_own_scheduler_slot(monkeypatch, capacity, hedged):
+    import hedging
+    from model_scheduler import ModelScheduler, parse_weights
+
+    scheduler = ModelScheduler(capacity, parse_weights(""), interactive_slo=60)
+    monkeypatch.setattr(hedging, "model_scheduler", scheduler)
+    hedger = make_hedger()
+    make_call, calls = scripted(0.1, 0.01)
+    peak = []
+
+    async def tracked():
+        peak.append(scheduler.stats()["in_flight"])
+        return await make_call()
+
+    async def scenario():
+        # The caller holds one slot for the primary, as send_model_message does
+        async with scheduler.slot():
+            return await hedger.call(tracked)
+
+    result = asyncio.run(scenario())
+    assert max(peak) <= capacity
+    assert scheduler.stats()["in_flight"] == 0
+    if hedged:
+        assert result == 1 and peak == [1, 2]
+        assert scheduler.stats()["classes"]["speculative"]["served"] == 1
+    else:
+        assert result == 0 and calls == [0]
+        assert hedger.stats.slot_denied == 1
@@ -0,0 +1,119 @@
+import asyncio
+import math
+
+from fastapi.testclient import TestClient
+
+import server
+from analysis_store import MemoryAnalysisStore
+from job_index import JobIndex, _terms, warm_from_store
+
+POSTINGS = {
+    "frontend": "Frontend Engineer\nBuild React interfaces in JavaScript and TypeScript with CSS.",
+    "platform": "Platform Engineer\nRun Kubernetes clusters, Terraform and AWS infrastructure.",
+    "data": "Data Scientist\nTrain machine learning models in Python with pandas and SQL.",
+    "backend": "Backend Engineer\nWrite Python services on PostgreSQL, deployed to Kubernetes.",
+}
+
+
+def build_index(**kwargs):
+    index = JobIndex(dim=256, **kwargs)
+    for posting_id, text in POSTINGS.items():
+        index.add(posting_id, text)
+    return index
+
+
+def reference_bm25(index, query, posting_id, k1=1.2, b=0.75):
+    documents = {pid: _terms(index.get(pid).job_description) for pid in index._slots}
+    avgdl = sum(len(terms) for terms in documents.values()) / len(documents)
+    terms = documents[posting_id]
+    score = 0.0
+    for term in set(_terms(query)):
+        df = sum(1 for doc in documents.values() if term in doc)
+        tf = terms.count(term)
+        if not tf:
+            continue
+        idf = math.log(1 + (len(documents) - df + 0.5) / (df + 0.5))
+        score += idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * len(terms) / avgdl))
+    return score
+
+
+def test_search_ranks_the_matching_posting_first():
+    index = build_index()
+    results = index.search("Senior engineer with k8s and Terraform on AWS", top_k=2)
+    assert results[0]["posting_id"] == "platform"
+    assert len(results) == 2
+    assert results[0]["score"] >= results[1]["score"]
+    # Aliases are folded before indexing, so "k8s" finds "Kubernetes"
+    assert results[0]["bm25"] > 0
+
+
+def test_bm25_matches_the_textbook_formula():
+    index = build_index()
+    query = "Python and Kubernetes services"
+    for result in index.search(query, top_k=4):
+        expected = reference_bm25(index, query, result["posting_id"])
+        assert math.isclose(result["bm25"], expected, abs_tol=1e-3)
+
+
+def test_replace_and_remove_keep_the_postings_consistent():
+    index = build_index()
+    index.add("data", "Data Engineer\nBuild Spark pipelines in Scala.")
+    assert len(index) == 4
+    assert index.search("Scala Spark", top_k=1)[0]["posting_id"] == "data"
+    assert all(r["bm25"] == 0 for r in index.search("pandas", top_k=4))
+
+    assert index.remove("frontend")
+    assert not index.remove("frontend")
+    assert index.get("frontend") is None
+    assert "frontend" not in [r["posting_id"] for r in index.search("React JavaScript", top_k=10)]
+    # The freed slot is reused
+    index.add("mobile", "Mobile Engineer\nShip iOS apps in Swift.")
+    assert index._next_slot == 4
+
+
+def test_oldest_postings_are_evicted_past_the_cap():
+    index = build_index(max_postings=3)
+    assert len(index) == 3
+    assert index.get("frontend") is None
+    assert index.stats()["evicted"] == 1
+    index.add("platform", POSTINGS["platform"])  # re-adding makes it the newest
+    index.add("mobile", "Mobile Engineer\nShip iOS apps in Swift.")
+    assert index.get("platform") is not None
+    assert index.get("data") is None
+
+
+def test_warm_from_store_skips_postings_flagged_as_deleted():
+    async def scenario():
+        store = MemoryAnalysisStore()
+        ids = [await store.save_document("job_description", text) for text in POSTINGS.values()]
+        await store.save_document("resume", "Jane Doe\nPython developer")
+        await store.set_indexed(ids[1], False)
+        index = JobIndex(dim=256)
+        added = await warm_from_store(store, limit=100, index=index)
+        return ids, index, added
+
+    ids, index, added = asyncio.run(scenario())
+    assert added == 3
+    assert index.get(ids[1]) is None
+    assert all(index.get(digest) is not None for digest in ids[:1] + ids[2:])
+
+
+def test_postings_endpoints_add_match_and_delete(monkeypatch):
+    monkeypatch.setattr(server, "job_index", JobIndex(dim=256))
+    client = TestClient(server.app)
+    created = client.post("/api/postings", data={"job_description": POSTINGS["platform"], "title": "Platform"})
+    assert created.status_code == 201
+    posting_id = created.json()["posting_id"]
+    client.post("/api/postings", data={"job_description": POSTINGS["frontend"]})
+
+    fetched = client.get(f"/api/postings/{posting_id}").json()
+    assert fetched["title"] == "Platform"
+    assert fetched["job_description"] == POSTINGS["platform"]
+
+    matched = client.post("/api/jobs/match", data={"resume_text": "Kubernetes and Terraform on AWS", "top_k": 1}).json()
+    assert matched["total_postings"] == 2
+    assert [r["posting_id"] for r in matched["results"]] == [posting_id]
+
+    assert client.delete(f"/api/postings/{posting_id}").json()["total_postings"] == 1
+    assert client.get(f"/api/postings/{posting_id}").status_code == 404
+    assert client.delete("/api/postings/unknown").status_code == 404
@@ -0,0 +1,124 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from job_queue import (EXPIRED, FAILED, PRIORITY_BATCH, PRIORITY_NORMAL, PRIORITY_SPECULATIVE, QUEUED, SUCCEEDED, Job,
+                       JobQueue, MemoryQueueBackend, RedisQueueBackend, SQLiteQueueBackend, call_class_for)
+from model_scheduler import BATCH, INTERACTIVE, SPECULATIVE, call_class
+
+
+def redis_backend():
+    fakeredis = pytest.importorskip("fakeredis")
+    backend = RedisQueueBackend.__new__(RedisQueueBackend)
+    backend._redis = fakeredis.aioredis.FakeRedis()
+    backend._jobs_key, backend._queue_key = "test:data", "test:queue"
+    return backend
+
+
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        return MemoryQueueBackend()
+    if request.param == "sqlite":
+        return SQLiteQueueBackend(str(tmp_path / "jobs.sqlite3"))
+    return redis_backend()
+
+
+def test_backend_pops_by_priority_then_age(backend):
+    async def scenario():
+        batch = Job("analysis", {"n": 1}, priority=PRIORITY_BATCH, created_at=1.0)
+        normal_late = Job("analysis", {"n": 2}, priority=PRIORITY_NORMAL, created_at=3.0)
+        normal_early = Job("analysis", {"n": 3}, priority=PRIORITY_NORMAL, created_at=2.0)
+        for job in (batch, normal_early, normal_late):
+            await backend.put(job)
+        order = [(await backend.pop()).id for _ in range(3)]
+        assert order == [normal_early.id, normal_late.id, batch.id]
+        assert await backend.pop() is None
+
+    asyncio.run(scenario())
+
+
+def test_backend_round_trips_and_removes_jobs(backend):
+    async def scenario():
+        job = Job("cover_letter", {"job_description": "x", "resume_text": "y"})
+        await backend.put(job)
+        job.status, job.result = SUCCEEDED, {"short_version": "hi"}
+        await backend.update(job)
+        stored = await backend.get(job.id)
+        assert stored.status == SUCCEEDED and stored.result == {"short_version": "hi"}
+        assert [j.id for j in await backend.all_jobs()] == [job.id]
+        await backend.remove(job.id)
+        assert await backend.get(job.id) is None
+
+    asyncio.run(scenario())
+
+
+def test_sqlite_queue_survives_a_restart(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+
+    async def scenario():
+        job = Job("analysis", {"n": 1})
+        await SQLiteQueueBackend(path).put(job)
+        reopened = SQLiteQueueBackend(path)
+        assert (await reopened.get(job.id)).status == QUEUED
+        assert (await reopened.pop()).id == job.id
+
+    asyncio.run(scenario())
+
+
+def queue_with(handler, **options):
+    queue = JobQueue(MemoryQueueBackend(), workers=2, **options)
+    queue.register("echo", handler)
+    return queue
+
+
+def test_jobs_run_and_finish():
+    seen_classes = []
+
+    async def handler(payload):
+        seen_classes.append(call_class.get())
+        if payload.get("fail"):
+            raise HTTPException(status_code=503, detail={"error_type": "service_unavailable"})
+        return {"echo": payload["value"]}
+
+    async def scenario():
+        queue = queue_with(handler)
+        ok = await queue.submit("echo", {"value": 1}, priority=PRIORITY_BATCH)
+        bad = await queue.submit("echo", {"fail": True})
+        ok, bad = await queue.wait(ok.id), await queue.wait(bad.id)
+        await queue.stop()
+        return ok, bad
+
+    ok, bad = asyncio.run(scenario())
+    assert ok.status == SUCCEEDED and ok.public_view()["result"] == {"echo": 1}
+    assert bad.status == FAILED and bad.error_status == 503
+    assert BATCH in seen_classes
+
+
+def test_unknown_kind_is_rejected():
+    queue = queue_with(lambda payload: None)
+    with pytest.raises(HTTPException) as raised:
+        asyncio.run(queue.submit("nope", {}))
+    assert raised.value.status_code == 400
+
+
+def test_jobs_expire_when_not_picked_up_in_time():
+    async def handler(payload):
+        return "ran"
+
+    async def scenario():
+        queue = queue_with(handler)
+        job = await queue.submit("echo", {}, expiry_seconds=-1)
+        job = await queue.wait(job.id)
+        await queue.stop()
+        return job
+
+    job = asyncio.run(scenario())
+    assert job.status == EXPIRED and job.error["error_type"] == "expired"
+
+
+def test_call_class_for_priority():
+    assert call_class_for(0) == INTERACTIVE
+    assert call_class_for(PRIORITY_NORMAL) == call_class_for(PRIORITY_BATCH) == BATCH
+    assert call_class_for(PRIORITY_SPECULATIVE) == SPECULATIVE
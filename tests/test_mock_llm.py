@@ -0,0 +1,73 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from mock_llm import MockLLM, MockLLMConfig, canned_response, create_mock_app
+from prompt_digests import JOB_DIGEST_SYSTEM_PROMPT
+from response_schemas import parse_analysis, parse_job_digest
+from retry_engine import RateLimitError, ServiceUnavailableError
+
+USER_TEXT = """JOB DESCRIPTION:
+Senior Engineer with Python, Kubernetes and Terraform.
+
+CURRENT RESUME:
+Jane Doe
+Built Python services handling 10k requests per second.
+
+Please analyze."""
+
+
+def config(monkeypatch, **env):
+    defaults = {"MOCK_LLM_LATENCY": "fixed:0", "MOCK_LLM_TAIL_PROB": "0", "MOCK_LLM_SEED": "1"}
+    for name, value in {**defaults, **env}.items():
+        monkeypatch.setenv(name, value)
+    return MockLLMConfig()
+
+
+def test_canned_analysis_matches_the_schema():
+    analysis = parse_analysis(canned_response("Analyze this resume", USER_TEXT))
+    assert "Kubernetes" in analysis.skills_gap
+    assert analysis.suggestions[0].current_text == "Built Python services handling 10k requests per second."
+
+
+def test_digest_prompts_get_digest_responses():
+    digest = parse_job_digest(canned_response(JOB_DIGEST_SYSTEM_PROMPT, "JOB POSTING:\nSenior Engineer with Python"))
+    assert digest.seniority == "senior"
+
+
+@pytest.mark.parametrize("latency, low, high", [("fixed:2", 2, 2), ("uniform:1,3", 1, 3), ("lognormal:2,0.1", 1, 4)])
+def test_latency_distributions(monkeypatch, latency, low, high):
+    samples = [config(monkeypatch, MOCK_LLM_LATENCY=latency).sample_latency() for _ in range(50)]
+    assert low <= min(samples) and max(samples) <= high
+
+
+def test_tail_latency(monkeypatch):
+    assert config(monkeypatch, MOCK_LLM_TAIL_PROB="1", MOCK_LLM_TAIL_LATENCY="30").sample_latency() == 30
+
+
+def test_injected_errors_are_typed(monkeypatch):
+    provider = MockLLM(config(monkeypatch, MOCK_LLM_ERROR_429="1", MOCK_LLM_RETRY_AFTER="5"))
+    with pytest.raises(RateLimitError) as raised:
+        asyncio.run(provider.generate("Analyze", USER_TEXT))
+    assert raised.value.retry_after == 5
+    provider = MockLLM(config(monkeypatch, MOCK_LLM_ERROR_429="0", MOCK_LLM_ERROR_503="1"))
+    with pytest.raises(ServiceUnavailableError):
+        asyncio.run(provider.generate("Analyze", USER_TEXT))
+
+
+def test_stream_reassembles_to_the_full_response(monkeypatch):
+    provider = MockLLM(config(monkeypatch))
+
+    async def collect():
+        return "".join([chunk async for chunk in provider.stream("Analyze", USER_TEXT, chunk_chars=16)])
+
+    assert asyncio.run(collect()) == canned_response("Analyze", USER_TEXT)
+
+
+def test_http_server_maps_errors_to_status_codes(monkeypatch):
+    config(monkeypatch, MOCK_LLM_ERROR_429="1", MOCK_LLM_RETRY_AFTER="3")
+    client = TestClient(create_mock_app())
+    response = client.post("/v1/generate", json={"system_prompt": "Analyze", "user_text": USER_TEXT})
+    assert response.status_code == 429 and response.headers["retry-after"] == "3"
+    assert client.get("/v1/stats").json() == {"calls": 1}
@@ -0,0 +1,72 @@
+import asyncio
+
+import pytest
+
+from model_router import ModelBackend, ModelRouter
+from retry_engine import RateLimitError, ServiceUnavailableError
+
+
+def make_router(*names, failure_threshold=2):
+    backends = [ModelBackend("mock", name) for name in names]
+    return ModelRouter(backends, cooldown=30, failure_threshold=failure_threshold)
+
+
+def answering(failures):
+    """call(backend) that raises failures[backend.model] if present, else returns the model name"""
+    seen = []
+
+    async def call(backend):
+        seen.append(backend.model)
+        error = failures.get(backend.model)
+        if error is not None:
+            raise error
+        return backend.model
+
+    return call, seen
+
+
+def test_fails_over_to_the_next_backend():
+    router = make_router("primary", "secondary")
+    call, seen = answering({"primary": ServiceUnavailableError()})
+    assert asyncio.run(router.route(call)) == "secondary"
+    assert seen == ["primary", "secondary"]
+
+
+def test_rate_limited_backend_is_benched_for_retry_after():
+    router = make_router("primary", "secondary")
+    call, _ = answering({"primary": RateLimitError(retry_after=60)})
+    asyncio.run(router.route(call))
+    assert [b.model for b in router.candidates()] == ["secondary", "primary"]
+    assert router.backends[0].status()["rate_limited_for_seconds"] > 55
+
+
+def test_circuit_opens_after_consecutive_failures():
+    router = make_router("primary", failure_threshold=2)
+    call, _ = answering({"primary": ServiceUnavailableError()})
+    with pytest.raises(ServiceUnavailableError):
+        asyncio.run(router.route(call))
+    assert router.backends[0].status()["healthy"]
+    with pytest.raises(ServiceUnavailableError):
+        asyncio.run(router.route(call))
+    assert not router.backends[0].status()["healthy"]
+
+
+def test_faster_backend_is_preferred():
+    router = make_router("slow", "fast")
+    for _ in range(5):
+        router.backends[0].record_success(2.0)
+        router.backends[1].record_success(0.5)
+    assert router.candidates()[0].model == "fast"
+
+
+def test_all_failing_raises_the_last_error():
+    router = make_router("a", "b")
+    call, _ = answering({"a": ServiceUnavailableError("a down"), "b": RateLimitError("b limited")})
+    with pytest.raises(RateLimitError):
+        asyncio.run(router.route(call))
+
+
+def test_from_env_parses_backends(monkeypatch):
+    monkeypatch.setenv("AI_MODEL_BACKENDS", "mock:one, mock:two,")
+    router = ModelRouter.from_env()
+    assert [b.name for b in router.backends] == ["mock:one", "mock:two"]
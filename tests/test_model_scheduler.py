@@ -0,0 +1,140 @@
+import asyncio
+
+import pytest
+
+import model_scheduler
+from model_scheduler import BATCH, INTERACTIVE, SPECULATIVE, ModelScheduler, call_class, parse_weights
+from retry_engine import PreemptedError
+
+
+def scheduler(capacity=1, slo=1e9, **weights):
+    return ModelScheduler(capacity, {**parse_weights(""), **weights}, slo)
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_parse_weights_fills_in_missing_classes():
+    assert parse_weights("interactive:8, batch:2,unknown:5") == {INTERACTIVE: 8.0, BATCH: 2.0, SPECULATIVE: 1.0}
+    assert parse_weights("speculative:0")[SPECULATIVE] == 0.01
+
+
+def test_free_slots_are_granted_immediately():
+    async def scenario():
+        sched = scheduler(capacity=2)
+        async with sched.slot(BATCH):
+            assert sched.headroom() == 1
+            token = call_class.set(SPECULATIVE)
+            try:
+                async with sched.slot():
+                    assert sched.stats()["classes"][SPECULATIVE]["in_flight"] == 1
+            finally:
+                call_class.reset(token)
+        return sched
+
+    sched = asyncio.run(scenario())
+    assert sched.headroom() == 2
+    assert sched.stats()["classes"][BATCH]["served"] == 1
+
+
+def test_waiting_calls_share_slots_by_weight():
+    async def scenario():
+        sched = scheduler(capacity=1, interactive=3.0, batch=1.0)
+        release = asyncio.Event()
+        order = []
+
+        async def blocker():
+            async with sched.slot(BATCH):
+                await release.wait()
+
+        async def call(name):
+            async with sched.slot(name):
+                order.append(name)
+
+        tasks = [asyncio.ensure_future(blocker())]
+        await settle()
+        tasks += [asyncio.ensure_future(call(BATCH)) for _ in range(8)]
+        tasks += [asyncio.ensure_future(call(INTERACTIVE)) for _ in range(8)]
+        await settle()
+        assert sched.headroom() == 0 and sched.waiting() == 16
+        release.set()
+        await asyncio.gather(*tasks)
+        return order
+
+    order = asyncio.run(scenario())
+    # Finish tags up to 2.0: interactive at 1/3 steps, batch at whole steps
+    assert order[:8].count(INTERACTIVE) == 6
+    assert order[-1] == BATCH
+
+
+def test_slo_risk_preempts_queued_speculative_calls(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(model_scheduler.time, "monotonic", lambda: now[0])
+
+    async def scenario():
+        sched = scheduler(capacity=1, slo=2.0)
+        release = asyncio.Event()
+        order = []
+
+        async def blocker():
+            async with sched.slot(INTERACTIVE):
+                await release.wait()
+
+        async def call(name):
+            async with sched.slot(name):
+                order.append(name)
+
+        first = asyncio.ensure_future(blocker())
+        await settle()
+        speculative = asyncio.ensure_future(call(SPECULATIVE))
+        batch = asyncio.ensure_future(call(BATCH))
+        await settle()
+        interactive = asyncio.ensure_future(call(INTERACTIVE))
+        await settle()
+        now[0] += 5.0
+        release.set()
+        await asyncio.gather(first, batch, interactive)
+        with pytest.raises(PreemptedError):
+            await speculative
+        return sched, order
+
+    sched, order = asyncio.run(scenario())
+    assert order == [INTERACTIVE, BATCH]
+    stats = sched.stats()
+    assert stats["slo_escalations"] == 1
+    assert stats["classes"][SPECULATIVE]["preempted"] == 1
+    assert stats["classes"][SPECULATIVE]["served"] == 0
+    assert stats["classes"][INTERACTIVE]["wait_ms"]["max"] == 5000.0
+
+
+def test_cancelled_waiters_leave_the_queue():
+    async def scenario():
+        sched = scheduler(capacity=1)
+        release = asyncio.Event()
+
+        async def blocker():
+            async with sched.slot(INTERACTIVE):
+                await release.wait()
+
+        async def call(name):
+            async with sched.slot(name):
+                pass
+
+        first = asyncio.ensure_future(blocker())
+        await settle()
+        waiter = asyncio.ensure_future(call(BATCH))
+        await settle()
+        assert sched.waiting() == 1
+        waiter.cancel()
+        await settle()
+        assert sched.waiting() == 0
+        release.set()
+        await first
+        assert sched.stats()["in_flight"] == 0
+        await asyncio.wait_for(call(BATCH), timeout=1)
+        return sched
+
+    sched = asyncio.run(scenario())
+    assert sched.stats()["classes"][BATCH]["served"] == 1
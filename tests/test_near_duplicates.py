@@ -0,0 +1,118 @@
+import random
+
+import numpy as np
+
+from near_duplicates import (NearDuplicateDetector, SimHashIndex, _Entry, canonical_url, jaccard,
+                             posting_tokens, shingle_hashes, simhash)
+
+POSTING = """Senior Backend Engineer
+Posted 2024-03-01 - Req 48213
+About the role
+You will design and operate the Python services behind our payments platform,
+own PostgreSQL schemas and queues, and mentor two junior engineers.
+Requirements
+- 5+ years building distributed systems in Python or Go
+- Deep experience with PostgreSQL, Redis and Kafka
+- Comfortable running services on Kubernetes in AWS
+- Clear written communication across time zones
+Benefits
+- Health insurance, 401k matching and a learning budget
+Apply at https://jobs.example.com/apply?utm_source=board"""
+
+
+def detector(**overrides):
+    settings = dict(enabled=True, threshold=6, min_jaccard=0.9, min_shingles=20, max_items=100, ttl_seconds=3600)
+    settings.update(overrides)
+    return NearDuplicateDetector(**settings)
+
+
+def entry(fingerprint):
+    return _Entry(fingerprint, "title", np.array([], dtype=np.uint64))
+
+
+def test_canonical_url_strips_tracking_and_cosmetic_differences():
+    assert canonical_url("HTTPS://Jobs.Example.com/posting/42/?utm_source=li&gh_src=x&id=7#apply") == \
+        "https://jobs.example.com/posting/42?id=7"
+    assert canonical_url("https://jobs.example.com/posting/42?b=2&a=1") == \
+        canonical_url("https://jobs.example.com/posting/42/?a=1&b=2&fbclid=abc")
+    assert canonical_url("https://example.com") == "https://example.com/"
+
+
+def test_boilerplate_dates_and_urls_are_left_out_of_the_fingerprint():
+    tokens = posting_tokens(POSTING)
+    assert "48213" not in tokens and "2024" not in tokens
+    assert not any("example" in token for token in tokens)
+    assert "5+" in tokens  # short numbers are requirements
+
+
+def test_simhash_distance_tracks_similarity():
+    tokens = posting_tokens(POSTING)
+    edited = tokens[:]
+    edited[10] = "rust"
+    other = posting_tokens("Pastry Chef\nBake bread, croissants and cakes every morning for our bakery café.")
+    base = simhash(shingle_hashes(tokens))
+    near = bin(base ^ simhash(shingle_hashes(edited))).count("1")
+    far = bin(base ^ simhash(shingle_hashes(other))).count("1")
+    assert near < far
+    assert simhash({}) == 0
+
+
+def test_band_index_finds_every_fingerprint_within_the_threshold():
+    generator = random.Random(11)
+    index = SimHashIndex(threshold=4, max_items=1000)
+    fingerprints = {f"k{i}": generator.getrandbits(64) for i in range(200)}
+    base = fingerprints["k0"]
+    for distance in range(1, 8):
+        bits = generator.sample(range(64), distance)
+        fingerprints[f"near{distance}"] = base ^ sum(1 << bit for bit in bits)
+    for key, fingerprint in fingerprints.items():
+        index.add(key, entry(fingerprint))
+
+    found = {key: distance for key, distance, _ in index.candidates(base)}
+    expected = {key: bin(fp ^ base).count("1") for key, fp in fingerprints.items()
+                if bin(fp ^ base).count("1") <= 4}
+    assert found == expected
+
+
+def test_band_index_evicts_the_oldest_entries():
+    index = SimHashIndex(threshold=2, max_items=2)
+    for key, fingerprint in (("a", 1), ("b", 2), ("c", 4)):
+        index.add(key, entry(fingerprint))
+    assert len(index) == 2
+    assert "a" not in [key for key, _, _ in index.candidates(1)]
+
+
+def test_jaccard_of_sorted_unique_arrays():
+    a = np.array([1, 2, 3, 4], dtype=np.uint64)
+    b = np.array([3, 4, 5], dtype=np.uint64)
+    assert jaccard(a, b) == 2 / 5
+    assert jaccard(a[:0], b[:0]) == 1.0
+
+
+def test_repost_with_new_date_and_footer_reuses_the_key():
+    dedupe = detector()
+    first = dedupe.job_key(POSTING)
+    repost = POSTING.replace("2024-03-01", "2024-04-15").replace("48213", "51007") \
+        .replace("learning budget", "generous learning budget")
+    second = dedupe.job_key(repost)
+    assert first.key == first.content_hash and not first.reused
+    assert second.key == first.key and second.reused
+    # Whitespace-only changes match on normalized text
+    assert dedupe.job_key("  " + POSTING.replace("\n", "\n\n")).key == first.key
+    assert dedupe.stats()["new_postings"] == 1
+
+
+def test_changed_title_or_requirements_are_not_duplicates():
+    dedupe = detector()
+    first = dedupe.job_key(POSTING)
+    junior = dedupe.job_key(POSTING.replace("Senior Backend Engineer", "Junior Backend Engineer"))
+    rewritten = dedupe.job_key(POSTING.replace("5+ years building distributed systems in Python or Go",
+                                               "A degree in accounting and fluency in SAP and Excel macros"))
+    assert junior.key != first.key
+    assert rewritten.key != first.key
+
+
+def test_disabled_detector_keys_on_exact_content():
+    dedupe = detector(enabled=False)
+    assert dedupe.job_key(POSTING).key != dedupe.job_key(POSTING.replace("\n", "\n\n")).key
+    assert dedupe.stats()["lookups"] == 0
@@ -0,0 +1,67 @@
+import pytest
+
+from prompt_compression import JD_BOILERPLATE, compress_job_description, compress_resume, count_tokens
+
+JOB_DESCRIPTION = """Senior Backend Engineer
+
+About Us
+We are a fast-growing fintech company on a mission to make payments simple.
+
+Requirements
+- 5+ years of Python
+- Experience with PostgreSQL and Kubernetes
+
+Responsibilities
+- Design and run payment APIs
+
+Benefits
+- Unlimited PTO
+- Free lunch
+
+Equal Opportunity
+We are an equal opportunity employer and hire without regard to race, color or religion.
+"""
+
+
+@pytest.mark.parametrize("line", [
+    "We use cookies to improve your experience.",
+    "Accept all cookies",
+    "Read our privacy policy",
+    "Apply now",
+    "Share this job",
+    "© 2024 Acme Inc. All rights reserved.",
+    "Qualified applicants will receive consideration without regard to race, color, religion or sex.",
+    "sexual orientation, gender identity, national origin, disability",
+])
+def test_banner_lines_are_boilerplate(line):
+    assert JD_BOILERPLATE.search(line)
+
+
+@pytest.mark.parametrize("line", [
+    "Experience building cookie-less ad attribution",
+    "Own our cookie consent platform and privacy policy engine",
+    "Apply now-casting models to demand forecasts",
+    "Ensure reasonable accommodation workflows in our HR product meet ADA requirements",
+])
+def test_real_requirements_are_kept(line):
+    assert not JD_BOILERPLATE.search(line)
+
+
+def test_job_description_drops_boilerplate_sections_first():
+    result = compress_job_description(JOB_DESCRIPTION, token_budget=1000)
+    assert "5+ years of Python" in result.text
+    assert "Unlimited PTO" not in result.text and "equal opportunity" not in result.text
+    assert set(result.dropped_sections) == {"Benefits", "Equal Opportunity"}
+    assert result.compressed_tokens < result.original_tokens
+
+
+def test_tight_budget_keeps_requirements_over_company_blurb():
+    result = compress_job_description(JOB_DESCRIPTION, token_budget=30)
+    assert "5+ years of Python" in result.text
+    assert "fintech" not in result.text
+
+
+def test_resume_is_untouched_under_budget():
+    resume = "Experience\nLed a team of 5.\n\nInterests\nChess"
+    result = compress_resume(resume, token_budget=count_tokens(resume) + 1)
+    assert result.text == resume and result.dropped_sections == []
@@ -0,0 +1,107 @@
+import asyncio
+
+import pytest
+
+import prompt_digests
+from ttl_cache import TTLCache
+
+LONG_POSTING = "Senior Backend Engineer\n" + "\n".join(
+    f"- Responsibility {i}: design, build and operate Python services on Kubernetes with PostgreSQL and Kafka."
+    for i in range(30))
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache(monkeypatch):
+    monkeypatch.setattr(prompt_digests, "_digests", TTLCache(max_items=100, ttl_seconds=3600))
+
+
+def counting_builder(result="digest", delay=0.01, fail=False):
+    calls = []
+
+    async def build(text):
+        calls.append(text)
+        await asyncio.sleep(delay)
+        if fail:
+            raise ValueError("model returned an empty job digest")
+        return result
+
+    return build, calls
+
+
+def test_digest_is_built_once_and_cached():
+    build, calls = counting_builder()
+
+    async def scenario():
+        first = await prompt_digests._build_digest("job_description", "text", build)
+        second = await prompt_digests._build_digest("job_description", "text", build)
+        return first, second
+
+    assert asyncio.run(scenario()) == ("digest", "digest")
+    assert len(calls) == 1
+
+
+def test_concurrent_requests_share_one_call():
+    build, calls = counting_builder(delay=0.05)
+
+    async def scenario():
+        return await asyncio.gather(*(prompt_digests._build_digest("resume", "same", build) for _ in range(5)))
+
+    assert asyncio.run(scenario()) == ["digest"] * 5
+    assert len(calls) == 1
+
+
+def test_failure_falls_back_and_is_not_cached():
+    build, calls = counting_builder(fail=True)
+
+    async def scenario():
+        first = await prompt_digests._build_digest("resume", "text", build)
+        second = await prompt_digests._build_digest("resume", "text", build)
+        return first, second
+
+    assert asyncio.run(scenario()) == (None, None)
+    assert len(calls) == 2
+
+
+def test_disabled_digests_pass_the_text_through(monkeypatch):
+    monkeypatch.setenv("AI_PROMPT_DIGESTS", "false")
+    assert asyncio.run(prompt_digests.job_description_for_prompt(LONG_POSTING)) == LONG_POSTING
+
+
+def test_enabled_digest_replaces_a_long_posting(monkeypatch):
+    monkeypatch.setenv("AI_PROMPT_DIGESTS", "true")
+    prompt = asyncio.run(prompt_digests.job_description_for_prompt(LONG_POSTING))
+    assert prompt.startswith("(Requirements digest of the original posting)")
+    assert prompt_digests.count_tokens(prompt) < prompt_digests.count_tokens(LONG_POSTING)
+
+
+def test_digest_that_does_not_shrink_the_prompt_is_skipped():
+    assert prompt_digests._prefer_digest("short", "a much longer digest than the source") == "short"
+
+
+def test_cover_letters_keep_the_job_description_itself(monkeypatch):
+    import server
+
+    monkeypatch.setenv("AI_PROMPT_DIGESTS", "true")
+    prompts = []
+
+    async def fake_letters(job_description, resume_text):
+        prompts.append((job_description, resume_text))
+        return {"short_version": "s", "long_version": "l"}
+
+    async def no_job_digest(text):
+        raise AssertionError("cover letters must not use the JD digest")
+
+    async def resume_digest(text):
+        return "(Profile digest of the candidate's resume)\nBackend engineer"
+
+    monkeypatch.setattr(server, "get_cover_letter_response", fake_letters)
+    monkeypatch.setattr(prompt_digests, "_digest_job_description", no_job_digest)
+    monkeypatch.setattr(prompt_digests, "_digest_resume", resume_digest)
+    posting = "About Acme\nAcme builds payment software.\n" + LONG_POSTING
+    resume = "Jane Doe\n" + "\n".join(f"- Built service {i} in Python on Kubernetes for payments." for i in range(40))
+
+    result = asyncio.run(server.get_cover_letter_response_with_retry(posting, resume))
+    assert result.success
+    job_description, resume_text = prompts[0]
+    assert "Acme" in job_description
+    assert resume_text.startswith("(Profile digest")
@@ -0,0 +1,55 @@
+import pytest
+
+from response_schemas import IncrementalJSONParser, MalformedResponseError, parse_analysis, repair_json
+
+
+def test_valid_json_is_parsed_as_is():
+    assert repair_json('{"a": [1, 2]}') == {"a": [1, 2]}
+
+
+def test_fenced_json_with_trailing_prose():
+    text = 'Here you go:\n```json\n{"a": 1}\n```\nLet me know if you need more.'
+    assert repair_json(text) == {"a": 1}
+
+
+def test_trailing_commas_and_python_literals():
+    assert repair_json('{"a": [1, 2,], "b": True, "c": None,}') == {"a": [1, 2], "b": True, "c": None}
+
+
+def test_truncated_output_keeps_complete_values():
+    assert repair_json('{"a": "done", "b": ["x", "y') == {"a": "done", "b": ["x", "y"]}
+    assert repair_json('{"a": 1, "b": ') == {"a": 1}
+    assert repair_json('{"a": 1, "partial_k') == {"a": 1}
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ("line one\nline two", "line one\nline two"),
+    ("cr\r\nlf", "cr\r\nlf"),
+    ("tab\tseparated", "tab\tseparated"),
+    ("bell\x07 and form\x0cfeed", "bell\x07 and form\x0cfeed"),
+    ("nul\x00byte", "nul\x00byte"),
+])
+def test_raw_control_characters_in_strings_are_escaped(raw, expected):
+    assert repair_json('{"text": "' + raw + '",}') == {"text": expected}
+
+
+def test_snapshot_while_streaming():
+    parser = IncrementalJSONParser()
+    parser.feed('{"suggestions": [{"suggested_text": "Led\tteam"}, {"sugg')
+    assert parser.snapshot() == {"suggestions": [{"suggested_text": "Led\tteam"}, {}]}
+    parser.feed('ested_text": "Shipped"}]}')
+    assert parser.snapshot() == {"suggestions": [{"suggested_text": "Led\tteam"}, {"suggested_text": "Shipped"}]}
+
+
+def test_no_json_raises():
+    with pytest.raises(MalformedResponseError):
+        repair_json("I could not analyze this resume.")
+
+
+def test_parse_analysis_coerces_fields():
+    analysis = parse_analysis('{"suggestions": [{"suggested_text": "x", "current_text": "N/A", '
+                              '"impact_level": "high", "priority": "3 (medium)"}]}')
+    suggestion = analysis.suggestions[0]
+    assert suggestion.current_text is None
+    assert suggestion.impact_level == "High"
+    assert suggestion.priority == 3
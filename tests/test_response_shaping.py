@@ -0,0 +1,95 @@
+import json
+from datetime import datetime
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+import server
+from analysis_store import content_hash
+from response_shaping import dumps, dumps_line, parse_fields, select_fields, shape_response
+
+RESPONSE = {
+    "analysis_id": "a1",
+    "original_resume": "Jane Doe\nPython",
+    "job_description": "Backend Engineer",
+    "cover_letter_id": None,
+    "ats_score": {"score": 72, "matched": ["python"], "missing": []},
+    "analysis": {
+        "summary": "",
+        "suggestions": [
+            {"id": "s1", "section": "skills", "suggested_text": "Python, Go", "anchor": {"start": 9, "end": 15}},
+            {"id": "s2", "section": "summary", "suggested_text": "Backend engineer", "anchor": None},
+        ],
+    },
+}
+
+
+def test_compact_hashes_echoed_inputs_and_drops_empty_values():
+    shaped = shape_response(RESPONSE, compact=True)
+    assert "original_resume" not in shaped and "job_description" not in shaped
+    assert shaped["resume_hash"] == content_hash(RESPONSE["original_resume"])
+    assert shaped["job_description_hash"] == content_hash(RESPONSE["job_description"])
+    assert "cover_letter_id" not in shaped
+    assert shaped["ats_score"] == {"score": 72, "matched": ["python"]}
+    assert "summary" not in shaped["analysis"]
+    assert "anchor" not in shaped["analysis"]["suggestions"][1]
+    assert RESPONSE["original_resume"] == "Jane Doe\nPython"  # input left untouched
+
+
+def test_default_comes_from_the_environment(monkeypatch):
+    assert shape_response(RESPONSE) == RESPONSE
+    monkeypatch.setenv("API_COMPACT_RESPONSES", "true")
+    assert "resume_hash" in shape_response(RESPONSE)
+    assert shape_response(RESPONSE, compact=False) == RESPONSE
+
+
+def test_parse_fields_builds_a_path_tree():
+    assert parse_fields(None) is None and parse_fields(" ") is None
+    assert parse_fields("ats_score.score, analysis.suggestions.id,analysis.suggestions.section") == {
+        "ats_score": {"score": {}},
+        "analysis": {"suggestions": {"id": {}, "section": {}}},
+        "analysis_id": {},
+    }
+    # A shorter path keeps everything below it
+    assert parse_fields("analysis,analysis.suggestions.id")["analysis"] == {}
+
+
+def test_select_fields_walks_through_lists():
+    shaped = shape_response(RESPONSE, compact=False, fields="ats_score.score,analysis.suggestions.id,missing.path")
+    assert shaped == {
+        "analysis_id": "a1",
+        "ats_score": {"score": 72},
+        "analysis": {"suggestions": [{"id": "s1"}, {"id": "s2"}]},
+    }
+    assert select_fields([1, 2], {"a": {}}) == [1, 2]
+
+
+def test_asking_for_an_echoed_input_in_compact_mode_gets_its_hash():
+    shaped = shape_response(RESPONSE, compact=True, fields="original_resume")
+    assert shaped == {"analysis_id": "a1", "resume_hash": content_hash(RESPONSE["original_resume"])}
+
+
+def test_dumps_handles_numpy_dates_and_ndjson_lines():
+    payload = {"score": np.float32(0.5), 1: "non-string key", "when": datetime(2024, 1, 2), "tags": {"a"}}
+    decoded = json.loads(dumps(payload))
+    assert decoded == {"score": 0.5, "1": "non-string key", "when": "2024-01-02T00:00:00", "tags": ["a"]}
+    line = dumps_line({"event": "done"})
+    assert line == b'{"event":"done"}\n'
+
+
+def test_analysis_endpoints_accept_compact_and_fields():
+    client = TestClient(server.app)
+    analyzed = client.post("/api/analyze", data={
+        "job_description": "Backend Engineer\nPython and PostgreSQL services for our payments team.",
+        "resume_text": "Jane Doe\nBuilt Python services on PostgreSQL.",
+        "fields": "ats_score.score,analysis.suggestions.id",
+    })
+    assert analyzed.status_code == 200
+    body = analyzed.json()
+    assert set(body) == {"analysis_id", "ats_score", "analysis"}
+    assert set(body["ats_score"]) == {"score"}
+    assert body["analysis"]["suggestions"] and all(set(s) == {"id"} for s in body["analysis"]["suggestions"])
+
+    reloaded = client.get(f"/api/analyses/{body['analysis_id']}", params={"compact": "true"}).json()
+    assert "original_resume" not in reloaded
+    assert reloaded["resume_hash"] == content_hash("Jane Doe\nBuilt Python services on PostgreSQL.")
@@ -0,0 +1,136 @@
+import asyncio
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+import server
+from resume_edits import apply_suggestions, plan_edits, splice
+from suggestion_anchoring import anchor_analysis
+
+RESUME = (
+    "Jane Doe\n"
+    "EXPERIENCE\n"
+    "- Built Python services for payments.\n"
+    "- Ran the on-call rotation.\n"
+    "SKILLS\n"
+    "Python, Go\n"
+    "EDUCATION\n"
+    "BSc Computer Science"
+)
+
+SUGGESTIONS = [
+    {"section": "experience", "current_text": "Built Python services for payments.",
+     "suggested_text": "Built Python payment services handling 2M requests a day."},
+    {"section": "skills", "current_text": "Python, Go", "suggested_text": "Python, Go, PostgreSQL"},
+    {"section": "experience", "current_text": "Ran the on-call rotation.", "suggested_text": ""},
+    {"section": "skills", "current_text": None, "suggested_text": "Kubernetes (CKA)"},
+    {"section": "summary", "current_text": "Managed a team of forty", "suggested_text": "Led forty people"},
+]
+
+
+def anchored():
+    return anchor_analysis({"suggestions": [dict(s) for s in SUGGESTIONS]}, RESUME)["suggestions"]
+
+
+def ids():
+    return [suggestion["id"] for suggestion in anchored()]
+
+
+def test_plan_edits_inserts_new_content_at_the_end_of_its_section():
+    edits, unusable = plan_edits(RESUME, anchored())
+    rewrite, skills, removal, new, missing = ids()
+    assert list(unusable) == [missing]
+    assert RESUME[:edits[new].start].endswith("Python, Go")
+    assert edits[new].text == "\nKubernetes (CKA)"
+    assert RESUME[edits[removal].start:edits[removal].end] == "Ran the on-call rotation."
+
+
+def test_splice_matches_applying_edits_one_at_a_time():
+    edits, _ = plan_edits(RESUME, anchored())
+    text, spans = splice(RESUME, edits.values())
+    expected = RESUME
+    # Right to left, so earlier offsets stay valid
+    for edit in sorted(edits.values(), key=lambda e: e.key, reverse=True):
+        expected = expected[:edit.start] + edit.text + expected[edit.end:]
+    assert text == expected
+    for sid, (start, end) in spans.items():
+        assert text[start:end] == edits[sid].text
+
+
+def test_apply_reports_skipped_ids_and_hunks_against_the_previous_text():
+    suggestions = anchored()
+    rewrite, skills, removal, new, missing = ids()
+    first, response = apply_suggestions(RESUME, suggestions, [skills, rewrite, missing, "bogus"], None, "a1")
+    assert response["changes_base"] == "original"
+    assert first.applied == [rewrite, skills]
+    assert [s["suggestion_id"] for s in response["skipped"]] == [missing, "bogus"]
+    assert "2M requests" in first.text and "PostgreSQL" in first.text
+
+    second, response = apply_suggestions(RESUME, suggestions, [skills, new], first, "a1")
+    assert response["changes_base"] == "previous"
+    patched = first.text
+    for hunk in sorted(response["changes"], key=lambda h: h["start"], reverse=True):
+        patched = patched[:hunk["start"]] + hunk["text"] + patched[hunk["end"]:]
+    assert patched == second.text
+    assert {(h["suggestion_id"], h["action"]) for h in response["changes"]} == {(rewrite, "revert"), (new, "apply")}
+
+
+@pytest.fixture
+def stored_analysis():
+    client = TestClient(server.app)
+    resume_id = client.post("/api/resumes", data={"resume_text": RESUME}).json()["resume_id"]
+    stored = server.resume_store.get(resume_id)
+    asyncio.run(server.analysis_store.save_analysis({
+        "_id": "apply-test", "resume_hash": stored.content_hash, "analysis": {"suggestions": SUGGESTIONS},
+    }))
+    return client, resume_id
+
+
+def test_apply_endpoint_sets_and_toggles_suggestions(stored_analysis):
+    client, resume_id = stored_analysis
+    rewrite, skills, removal, new, missing = ids()
+    url = f"/api/resumes/{resume_id}/apply"
+
+    full = client.post(url, data={"analysis_id": "apply-test", "suggestion_ids": [rewrite, removal]}).json()
+    assert full["applied"] == [rewrite, removal]
+    assert "on-call" not in full["text"]
+
+    toggled = client.post(url, data={"analysis_id": "apply-test", "suggestion_ids": json.dumps([removal, skills]),
+                                     "toggle": "true"}).json()
+    assert toggled["applied"] == [rewrite, skills]
+    assert "on-call" in toggled["text"] and "PostgreSQL" in toggled["text"]
+    assert {h["action"] for h in toggled["changes"]} == {"apply", "revert"}
+
+    cleared = client.post(url, data={"analysis_id": "apply-test"}).json()
+    assert cleared["text"] == RESUME and cleared["applied"] == []
+
+
+def test_apply_endpoint_rejects_other_resumes_and_bad_input(stored_analysis):
+    client, resume_id = stored_analysis
+    other = client.post("/api/resumes", data={"resume_text": "John Roe\nJava"}).json()["resume_id"]
+    assert client.post(f"/api/resumes/{other}/apply", data={"analysis_id": "apply-test"}).status_code == 409
+    assert client.post(f"/api/resumes/{resume_id}/apply", data={"analysis_id": "missing"}).status_code == 404
+    bad = client.post(f"/api/resumes/{resume_id}/apply", data={"analysis_id": "apply-test", "suggestion_ids": "[oops"})
+    assert bad.status_code == 400
+
+
+def test_apply_works_before_the_analysis_is_persisted(monkeypatch):
+    async def never_lands(response):
+        return None
+
+    monkeypatch.setattr(server, "persist_analysis", never_lands)
+    client = TestClient(server.app)
+    resume_id = client.post("/api/resumes", data={"resume_text": RESUME}).json()["resume_id"]
+    analyzed = client.post("/api/analyze", data={
+        "job_description": "Backend Engineer\nPython, PostgreSQL and Kubernetes for our payments team.",
+        "resume_id": resume_id,
+    }).json()
+    assert asyncio.run(server.analysis_store.get_analysis(analyzed["analysis_id"])) is None
+
+    wanted = [s["id"] for s in analyzed["analysis"]["suggestions"] if s["anchor"]["start"] is not None][:1]
+    assert wanted
+    applied = client.post(f"/api/resumes/{resume_id}/apply",
+                          data={"analysis_id": analyzed["analysis_id"], "suggestion_ids": wanted})
+    assert applied.status_code == 200
+    assert applied.json()["applied"] == wanted
@@ -0,0 +1,50 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import server
+import ttl_cache
+from resume_store import ResumeStore, normalize_resume_text
+
+JOB_DESCRIPTION = "Backend Engineer\nPython, PostgreSQL and Kubernetes experience required for our payments team."
+
+
+def test_normalization_makes_identical_resumes_hash_the_same():
+    store = ResumeStore(max_items=10, ttl_seconds=60)
+    windows = store.add("Jane Doe\r\n\r\n\r\n\r\nPython engineer  \r\n", source="text")
+    unix = store.add("Jane Doe\n\nPython engineer\n", source="text")
+    assert windows.text == "Jane Doe\n\nPython engineer"
+    assert windows.content_hash == unix.content_hash and windows.resume_id != unix.resume_id
+    assert normalize_resume_text("a\x00b") == "ab"
+
+
+def test_lookups_extend_the_session(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(ttl_cache.time, "monotonic", lambda: now[0])
+    store = ResumeStore(max_items=10, ttl_seconds=60)
+    resume = store.add("Jane Doe", source="text")
+    now[0] += 50
+    assert store.get(resume.resume_id) is resume
+    now[0] += 50
+    assert store.get(resume.resume_id) is resume  # 100s after upload, 50s after the last lookup
+    now[0] += 61
+    assert store.get(resume.resume_id) is None
+
+
+@pytest.fixture
+def client():
+    return TestClient(server.app)
+
+
+def test_upload_once_then_reference_by_id(client):
+    uploaded = client.post("/api/resumes", data={"resume_text": "Jane Doe\nBuilt Python services.\n"})
+    assert uploaded.status_code == 201
+    resume_id = uploaded.json()["resume_id"]
+    assert client.get(f"/api/resumes/{resume_id}").json()["text"] == "Jane Doe\nBuilt Python services."
+    analyzed = client.post("/api/analyze", data={"job_description": JOB_DESCRIPTION, "resume_id": resume_id})
+    assert analyzed.status_code == 200
+    assert analyzed.json()["original_resume"] == "Jane Doe\nBuilt Python services."
+
+
+def test_unknown_resume_id_is_404(client):
+    response = client.post("/api/ats-score", data={"job_description": JOB_DESCRIPTION, "resume_id": "nope"})
+    assert response.status_code == 404
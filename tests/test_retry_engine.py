@@ -0,0 +1,108 @@
+import asyncio
+
+import pytest
+
+import retry_engine
+from retry_engine import (AuthenticationError, ProviderTimeoutError, RateLimitError, RetryBudget, RetryPolicy,
+                          ServiceUnavailableError, UnknownProviderError, classify_provider_exception,
+                          client_retry_after, run_with_retry)
+
+
+class _HTTPError(Exception):
+    def __init__(self, message, status_code=None, headers=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    slept = []
+
+    async def fake_sleep(seconds):
+        slept.append(seconds)
+
+    monkeypatch.setattr(retry_engine.asyncio, "sleep", fake_sleep)
+    return slept
+
+
+def flaky(*errors, result="ok"):
+    """An operation that raises ``errors`` in turn, then returns ``result``"""
+    calls = []
+
+    async def operation():
+        calls.append(1)
+        if len(calls) <= len(errors):
+            raise errors[len(calls) - 1]
+        return result
+
+    return operation, calls
+
+
+@pytest.mark.parametrize("exc, expected", [
+    (_HTTPError("boom", status_code=503), ServiceUnavailableError),
+    (_HTTPError("slow down", status_code=429), RateLimitError),
+    (_HTTPError("bad key", status_code=401), AuthenticationError),
+    (asyncio.TimeoutError(), ProviderTimeoutError),
+    (Exception("Resource has been exhausted (e.g. check quota)"), RateLimitError),
+    (Exception("The model is overloaded"), ServiceUnavailableError),
+    (Exception("something odd"), UnknownProviderError),
+])
+def test_classification(exc, expected):
+    assert type(classify_provider_exception(exc)) is expected
+
+
+def test_retry_after_is_read_from_headers_and_messages():
+    assert classify_provider_exception(_HTTPError("x", 429, {"retry-after": "7"})).retry_after == 7.0
+    assert classify_provider_exception(Exception("429 quota exceeded, retry in 12s")).retry_after == 12.0
+
+
+def test_backoff_is_full_jitter_and_capped():
+    policy = RetryPolicy(base_delay=1.0, max_delay=5.0)
+    delays = [policy.backoff(attempt) for attempt in range(10) for _ in range(20)]
+    assert min(delays) >= 0 and max(delays) <= 5.0
+    assert all(policy.backoff(0) <= 1.0 for _ in range(50))
+
+
+def test_retries_until_success(sleeps):
+    operation, calls = flaky(_HTTPError("busy", 503), _HTTPError("busy", 503))
+    result = asyncio.run(run_with_retry(operation, "test", RetryPolicy(max_retries=3), RetryBudget(ratio=1.0)))
+    assert result == "ok" and len(calls) == 3 and len(sleeps) == 2
+
+
+def test_non_retryable_errors_are_raised_at_once(sleeps):
+    operation, calls = flaky(_HTTPError("bad key", 401))
+    with pytest.raises(AuthenticationError):
+        asyncio.run(run_with_retry(operation, "test", RetryPolicy(max_retries=3), RetryBudget()))
+    assert len(calls) == 1 and sleeps == []
+
+
+def test_retry_after_overrides_shorter_backoff(sleeps):
+    operation, _ = flaky(_HTTPError("slow down", 429, {"retry-after": "4"}))
+    asyncio.run(run_with_retry(operation, "test", RetryPolicy(base_delay=0.01), RetryBudget(ratio=1.0)))
+    assert sleeps == [4.0]
+
+
+def test_long_waits_go_back_to_the_client(sleeps):
+    operation, calls = flaky(_HTTPError("slow down", 429, {"retry-after": "60"}))
+    policy = RetryPolicy(max_total_delay=30.0)
+    with pytest.raises(RateLimitError) as raised:
+        asyncio.run(run_with_retry(operation, "test", policy, RetryBudget(ratio=1.0)))
+    assert len(calls) == 1 and sleeps == []
+    assert client_retry_after(raised.value, policy) == 60
+
+
+def test_budget_caps_retries_to_a_share_of_traffic():
+    budget = RetryBudget(ratio=0.2, window_seconds=60, min_retries_per_second=0)
+    for _ in range(10):
+        budget.record_request()
+    assert [budget.try_acquire_retry() for _ in range(3)] == [True, True, False]
+    assert budget.stats()["retries"] == 2
+
+
+def test_exhausted_budget_stops_retrying(sleeps):
+    budget = RetryBudget(ratio=0.0, min_retries_per_second=0)
+    operation, calls = flaky(_HTTPError("busy", 503))
+    with pytest.raises(ServiceUnavailableError):
+        asyncio.run(run_with_retry(operation, "test", RetryPolicy(max_retries=3), budget))
+    assert len(calls) == 1
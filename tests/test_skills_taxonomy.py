@@ -0,0 +1,81 @@
+from skills_taxonomy import SkillsTaxonomy, taxonomy
+from text_tokens import tokenize
+
+
+def small_taxonomy():
+    return SkillsTaxonomy("test", [
+        {"canonical": "Machine Learning", "aliases": ["ml"]},
+        {"canonical": "Machine", "aliases": []},
+        {"canonical": "Go", "aliases": ["golang"], "match_canonical": False},
+    ])
+
+
+def test_aliases_fold_to_canonical_names():
+    assert taxonomy.canonicalize("JS") == "JavaScript"
+    assert taxonomy.canonicalize("ReactJS") == "React"
+    assert taxonomy.canonicalize("React.js") == "React"
+    assert taxonomy.canonicalize("k8s") == "Kubernetes"
+    assert taxonomy.canonicalize("postgres") == "PostgreSQL"
+
+
+def test_filler_words_and_versions_do_not_change_the_skill():
+    assert taxonomy.canonicalize("Python programming") == "Python"
+    assert taxonomy.canonicalize("Python 3.11") == "Python"
+    assert taxonomy.canonicalize("React framework") == "React"
+
+
+def test_terms_that_are_not_one_skill_are_kept_as_written():
+    assert taxonomy.canonicalize("  weekly team lunches ") == "weekly team lunches"
+    assert taxonomy.canonicalize("React and Kubernetes") == "React and Kubernetes"
+    assert taxonomy.canonicalize("React Native apps") != "React"
+
+
+def test_scan_prefers_the_longest_match():
+    index = small_taxonomy()
+    tokens = [token for token, _ in tokenize("machine learning and machine vision")]
+    names = [index.names[match.skill] for match in index.scan(tokens)]
+    assert names == ["Machine Learning", "Machine"]
+
+
+def test_match_canonical_false_only_matches_aliases():
+    index = small_taxonomy()
+    assert index.skills_in("we go to golang meetups") == {"Go"}
+    assert index.skills_in("let's go") == set()
+
+
+def test_canonical_tokens_replace_alias_spans():
+    pairs = taxonomy.canonical_tokens(tokenize("Deployed to k8s with vanilla js"))
+    assert ("skill:kubernetes", "Kubernetes") in pairs
+    assert ("skill:javascript", "JavaScript") in pairs
+    assert all(token not in ("vanilla", "js", "k8s") for token, _ in pairs)
+
+
+def test_canonicalize_terms_dedupes_keeping_first_position():
+    before = taxonomy.aliases_rewritten
+    terms = taxonomy.canonicalize_terms(["JS", "React", "JavaScript", "ReactJS", "Docker", "docker"])
+    assert terms == ["JavaScript", "React", "Docker"]
+    assert taxonomy.aliases_rewritten - before == 3  # "docker" gains its canonical casing
+
+
+def test_canonicalize_analysis_drops_gaps_covered_by_a_synonym():
+    analysis = {
+        "skills_gap": ["Kubernetes", "golang", "Go"],
+        "ats_keywords": ["JS", "javascript", "k8s"],
+        "summary": "kept",
+    }
+    before = taxonomy.gaps_dropped
+    result = taxonomy.canonicalize_analysis(analysis, "Ran services on k8s clusters.")
+    assert result["skills_gap"] == ["Go"]
+    assert result["ats_keywords"] == ["JavaScript", "Kubernetes"]
+    assert result["summary"] == "kept"
+    assert taxonomy.gaps_dropped - before == 1
+    assert analysis["skills_gap"] == ["Kubernetes", "golang", "Go"]
+
+
+def test_missing_data_file_leaves_an_empty_taxonomy(monkeypatch, tmp_path):
+    import skills_taxonomy
+
+    monkeypatch.setenv("SKILLS_TAXONOMY_PATH", str(tmp_path / "missing.json"))
+    empty = skills_taxonomy.load_taxonomy()
+    assert empty.stats()["skills"] == 0
+    assert empty.canonicalize("k8s") == "k8s"
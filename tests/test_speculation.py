@@ -0,0 +1,134 @@
+import asyncio
+
+import speculation
+import ttl_cache
+from job_queue import JobQueue, MemoryQueueBackend
+from speculation import SPECULATIVE_KIND, CoverLetterSpeculator
+
+KEY = ("job-key", "resume-hash")
+LETTERS = {"cover_letter_id": "c1", "short_version": "short", "long_version": "long"}
+
+
+def make_speculator(**overrides):
+    options = {"enabled": True, "min_free_slots": 0, "max_items": 10, "ttl_seconds": 60}
+    options.update(overrides)
+    return CoverLetterSpeculator(**options)
+
+
+def test_claim_serves_a_prepared_letter_once():
+    speculator = make_speculator()
+    speculator.finish(KEY, LETTERS, started=0.0, prompt_tokens=100)
+    assert asyncio.run(speculator.claim(KEY)) == LETTERS
+    assert asyncio.run(speculator.claim(KEY)) is None
+    stats = speculator.stats()
+    assert stats["served"] == 1 and stats["hit_rate"] == 1.0
+
+
+def test_claim_does_not_serve_an_expired_letter(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(ttl_cache.time, "monotonic", lambda: now[0])
+    speculator = make_speculator(ttl_seconds=60)
+    speculator.finish(KEY, LETTERS, started=now[0], prompt_tokens=100)
+    now[0] += 61
+    assert asyncio.run(speculator.claim(KEY)) is None
+    stats = speculator.stats()
+    assert stats["served"] == 0 and stats["hit_rate"] == 0.0
+
+
+def queue_with(monkeypatch, workers, handler=None):
+    queue = JobQueue(MemoryQueueBackend(), workers=workers)
+    queue.register(SPECULATIVE_KIND, handler or (lambda payload: None))
+    monkeypatch.setattr(speculation, "job_queue", queue)
+    return queue
+
+
+def test_claim_cancels_a_speculative_job_that_has_not_started(monkeypatch):
+    queue_with(monkeypatch, workers=0)
+    speculator = make_speculator()
+
+    async def scenario():
+        await speculator.schedule(KEY, {"n": 1})
+        await speculator.schedule(KEY, {"n": 1})
+        assert await speculator.claim(KEY) is None
+        # The worker that picks it up later must not spend the call
+        assert not speculator.should_run(KEY)
+
+    asyncio.run(scenario())
+    stats = speculator.stats()
+    assert stats["scheduled"] == 1 and stats["cancelled"] == 1
+    assert stats["skipped"] == {"already_speculated": 1}
+    assert stats["pending"] == 0
+
+
+def test_claim_joins_a_running_speculative_job(monkeypatch):
+    speculator = make_speculator()
+
+    async def scenario():
+        started, release = asyncio.Event(), asyncio.Event()
+
+        async def handler(payload):
+            assert speculator.should_run(KEY)
+            started.set()
+            await release.wait()
+            speculator.finish(KEY, LETTERS, started=0.0, prompt_tokens=50)
+            return LETTERS
+
+        queue_with(monkeypatch, workers=1, handler=handler)
+        await speculator.schedule(KEY, {"n": 1})
+        await started.wait()
+        claim = asyncio.ensure_future(speculator.claim(KEY))
+        await asyncio.sleep(0.01)
+        assert not claim.done()
+        release.set()
+        letters = await claim
+        await speculation.job_queue.stop()
+        return letters
+
+    assert asyncio.run(scenario()) == LETTERS
+    stats = speculator.stats()
+    assert stats["joined"] == 1 and stats["served"] == 0 and stats["hit_rate"] == 1.0
+
+
+def test_speculation_needs_free_model_slots(monkeypatch):
+    queue_with(monkeypatch, workers=0)
+    headroom = [1]
+    monkeypatch.setattr(speculation, "model_headroom", lambda: headroom[0])
+    speculator = make_speculator(min_free_slots=2)
+
+    async def scenario():
+        await speculator.schedule(KEY, {"n": 1})
+        headroom[0] = 4
+        await speculator.schedule(KEY, {"n": 1})
+        # Busy again by the time a worker picks it up
+        headroom[0] = 0
+        return speculator.should_run(KEY)
+
+    assert asyncio.run(scenario()) is False
+    assert speculator.stats()["skipped"] == {"no_headroom": 1, "no_headroom_at_start": 1}
+
+
+def test_preempted_and_failed_calls_are_counted():
+    speculator = make_speculator()
+    speculator.preempted(KEY)
+    speculator.finish(KEY, None, started=0.0, prompt_tokens=80)
+    stats = speculator.stats()
+    assert stats["skipped"] == {"preempted": 1}
+    assert stats["failed"] == 1 and stats["spend"]["calls"] == 1 and stats["spend"]["prompt_tokens"] == 80
+    assert asyncio.run(speculator.claim(KEY)) is None
+
+
+def test_disabled_speculator_does_nothing(monkeypatch):
+    queue_with(monkeypatch, workers=0)
+    speculator = make_speculator(enabled=False)
+    asyncio.run(speculator.schedule(KEY, {"n": 1}))
+    assert speculator.stats()["scheduled"] == 0
+
+
+def test_letters_are_only_shared_by_identical_job_descriptions():
+    import server
+
+    posting = ("Backend Engineer\nAbout us\nAcme builds payment software for small shops.\n"
+               "Requirements\n- Python, PostgreSQL and Kubernetes\n- 5+ years of backend work")
+    other_company = posting.replace("Acme", "Globex")
+    assert server.cover_letter_key(posting, "resume") == server.cover_letter_key(posting + "\n", "resume")
+    assert server.cover_letter_key(posting, "resume") != server.cover_letter_key(other_company, "resume")
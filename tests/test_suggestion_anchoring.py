@@ -0,0 +1,66 @@
+from suggestion_anchoring import EXACT, FUZZY, NEW, NORMALIZED, UNVERIFIED, anchor_analysis
+
+RESUME = (
+    "Jane Doe\n"
+    "EXPERIENCE\n"
+    "•  Led a team of 5 engineers building “payments” APIs.\n"
+    "• Migrated the monolith to Kubernetes, cutting deploy time by 40%.\n"
+    "SKILLS\n"
+    "Python, Go, PostgreSQL\n"
+)
+
+
+def anchor(*suggestions, resume=RESUME):
+    analysis = anchor_analysis({"suggestions": [dict(s) for s in suggestions]}, resume)
+    return analysis["suggestions"]
+
+
+def located(suggestion, resume=RESUME):
+    return resume[suggestion["anchor"]["start"]:suggestion["anchor"]["end"]]
+
+
+def test_exact_quote():
+    [suggestion] = anchor({"current_text": "Python, Go, PostgreSQL", "suggested_text": "Python, Go, PostgreSQL, Redis"})
+    assert suggestion["anchor"]["status"] == EXACT
+    assert located(suggestion) == "Python, Go, PostgreSQL"
+
+
+def test_normalized_quote_maps_back_to_original_text():
+    quote = 'Led a team of 5 engineers building "payments" APIs.'
+    [suggestion] = anchor({"current_text": quote, "suggested_text": "Led five engineers..."})
+    assert suggestion["anchor"]["status"] == NORMALIZED
+    assert located(suggestion) == "Led a team of 5 engineers building “payments” APIs."
+    assert suggestion["current_text"] == located(suggestion)
+
+
+def test_fuzzy_quote():
+    quote = "Migrated our monolith to Kubernetes, cutting deploy time by 40%."
+    [suggestion] = anchor({"current_text": quote, "suggested_text": "..."})
+    assert suggestion["anchor"]["status"] == FUZZY
+    assert located(suggestion) == "Migrated the monolith to Kubernetes, cutting deploy time by 40%."
+
+
+def test_unlocatable_and_new_suggestions_have_no_offsets():
+    unverified, new = anchor(
+        {"current_text": "Won the Turing Award", "suggested_text": "..."},
+        {"current_text": None, "suggested_text": "Certifications: CKA"},
+    )
+    assert unverified["anchor"]["status"] == UNVERIFIED and unverified["anchor"]["start"] is None
+    assert new["anchor"]["status"] == NEW and new["anchor"]["start"] is None
+
+
+def test_suggestions_never_share_a_span():
+    first, second = anchor(
+        {"current_text": "Python", "suggested_text": "Python 3", "priority": 1},
+        {"current_text": "Python", "suggested_text": "CPython", "priority": 2},
+    )
+    assert first["anchor"]["start"] is not None
+    assert second["anchor"]["status"] == UNVERIFIED
+    assert first["id"] != second["id"]
+
+
+def test_offsets_survive_characters_that_lowercase_to_two():
+    resume = "İstanbul office\n  Led   team of 5 engineers."
+    [suggestion] = anchor({"current_text": "led team of 5 engineers.", "suggested_text": "..."}, resume=resume)
+    assert suggestion["anchor"]["status"] == NORMALIZED
+    assert located(suggestion, resume) == "Led   team of 5 engineers."
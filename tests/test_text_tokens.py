@@ -0,0 +1,25 @@
+from text_tokens import lower_preserving_offsets, normalize_token, tokenize
+
+
+def test_normalize_token_folds_suffixes():
+    assert {normalize_token(word) for word in ("designed", "designing", "designs", "design")} == {"design"}
+    assert normalize_token("kubernetes") == "kubernet"
+    assert normalize_token("status") == "status"
+
+
+def test_tokenize_keeps_compound_technical_terms():
+    assert [surface for _, surface in tokenize("Built C++ and C# services on Node.js, CI/CD.")] == [
+        "Built", "C++", "and", "C#", "services", "on", "Node.js", "CI/CD"]
+
+
+def test_lowering_keeps_offsets_for_expanding_characters():
+    text = "İstanbul office, Python"
+    assert "İ".lower() != "i"  # lowercases to two characters
+    assert len(lower_preserving_offsets(text)) == len(text)
+    # Surface forms come from the original text at the matched offsets
+    assert tokenize(text) == [("istanbul", "İstanbul"), ("offic", "office"), ("python", "Python")]
+
+
+def test_non_ascii_text_before_a_token_does_not_shift_it():
+    pairs = tokenize("İİİ Kubernetes and Go")
+    assert ("kubernet", "Kubernetes") in pairs and ("go", "Go") in pairs